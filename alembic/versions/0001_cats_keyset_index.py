@@ -0,0 +1,33 @@
+"""add keyset pagination index on cats
+
+Revision ID: 0001_cats_keyset_index
+Revises: 
+Create Date: 2026-10-18 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_cats_keyset_index'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_cats_created_at_id",
+        "cats",
+        ["created_at", "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_cats_created_at_id", table_name="cats", if_exists=True)
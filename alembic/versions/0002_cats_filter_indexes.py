@@ -0,0 +1,47 @@
+"""add filter and search indexes on cats
+
+Revision ID: 0002_cats_filter_indexes
+Revises: 0001_cats_keyset_index
+Create Date: 2026-10-18 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_cats_filter_indexes'
+down_revision: Union[str, Sequence[str], None] = '0001_cats_keyset_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_cats_owner_id_created_at_id",
+        "cats",
+        ["owner_id", "created_at", "id"],
+        if_not_exists=True,
+    )
+    op.create_index("ix_cats_breed", "cats", ["breed"], if_not_exists=True)
+    op.create_index("ix_cats_birth_date", "cats", ["birth_date"], if_not_exists=True)
+    op.create_index(
+        "ix_cats_name_trgm",
+        "cats",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_cats_name_trgm", table_name="cats", if_exists=True)
+    op.drop_index("ix_cats_birth_date", table_name="cats", if_exists=True)
+    op.drop_index("ix_cats_breed", table_name="cats", if_exists=True)
+    op.drop_index("ix_cats_owner_id_created_at_id", table_name="cats", if_exists=True)
@@ -0,0 +1,45 @@
+"""add cat_photos table
+
+Revision ID: 0003_cat_photos
+Revises: 0002_cats_filter_indexes
+Create Date: 2026-10-18 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_cat_photos'
+down_revision: Union[str, Sequence[str], None] = '0002_cats_filter_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "cat_photos",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "cat_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("cats.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("storage_key", sa.String(255), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=True),
+        sa.Column("content_type", sa.String(100), nullable=True),
+        sa.Column("size", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_cat_photos_cat_id", "cat_photos", ["cat_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_cat_photos_cat_id", table_name="cat_photos")
+    op.drop_table("cat_photos")
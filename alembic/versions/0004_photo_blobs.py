@@ -0,0 +1,69 @@
+"""add photo_blobs table for content-addressed photo storage
+
+Revision ID: 0004_photo_blobs
+Revises: 0003_cat_photos
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_photo_blobs'
+down_revision: Union[str, Sequence[str], None] = '0003_cat_photos'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "photo_blobs",
+        sa.Column("digest", sa.String(64), primary_key=True),
+        sa.Column("size", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    # 旧的存储键与摘要使用相同的目录布局，直接沿用为对象摘要
+    op.alter_column(
+        "cat_photos",
+        "storage_key",
+        new_column_name="blob_digest",
+        type_=sa.String(64),
+        existing_type=sa.String(255),
+        existing_nullable=False,
+    )
+    op.execute(
+        """
+        INSERT INTO photo_blobs (digest, size, ref_count, created_at)
+        SELECT blob_digest, MAX(size), COUNT(*), MIN(created_at)
+        FROM cat_photos
+        GROUP BY blob_digest
+        """
+    )
+    op.create_index("ix_cat_photos_blob_digest", "cat_photos", ["blob_digest"])
+    op.create_foreign_key(
+        "fk_cat_photos_blob_digest",
+        "cat_photos",
+        "photo_blobs",
+        ["blob_digest"],
+        ["digest"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("fk_cat_photos_blob_digest", "cat_photos", type_="foreignkey")
+    op.drop_index("ix_cat_photos_blob_digest", table_name="cat_photos")
+    op.alter_column(
+        "cat_photos",
+        "blob_digest",
+        new_column_name="storage_key",
+        type_=sa.String(255),
+        existing_type=sa.String(64),
+        existing_nullable=False,
+    )
+    op.drop_table("photo_blobs")
@@ -0,0 +1,47 @@
+"""add listing and search indexes on users
+
+Revision ID: 0006_users_list_indexes
+Revises: 0005_users_token_version
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_users_list_indexes'
+down_revision: Union[str, Sequence[str], None] = '0005_users_token_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index("ix_users_created_at_id", "users", ["created_at", "id"], if_not_exists=True)
+    op.create_index(
+        "ix_users_username_trgm",
+        "users",
+        ["username"],
+        postgresql_using="gin",
+        postgresql_ops={"username": "gin_trgm_ops"},
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_users_email_trgm",
+        "users",
+        ["email"],
+        postgresql_using="gin",
+        postgresql_ops={"email": "gin_trgm_ops"},
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_email_trgm", table_name="users", if_exists=True)
+    op.drop_index("ix_users_username_trgm", table_name="users", if_exists=True)
+    op.drop_index("ix_users_created_at_id", table_name="users", if_exists=True)
@@ -0,0 +1,34 @@
+"""add feed pagination indexes on posts
+
+Revision ID: 0007_posts_feed_indexes
+Revises: 0006_users_list_indexes
+Create Date: 2026-10-18 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_posts_feed_indexes'
+down_revision: Union[str, Sequence[str], None] = '0006_users_list_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 键集分页要求排序键非空
+    op.execute("UPDATE posts SET likes = 0 WHERE likes IS NULL")
+    op.alter_column("posts", "likes", existing_type=sa.Integer(), nullable=False, server_default="0")
+    op.create_index("ix_posts_created_at_id", "posts", ["created_at", "id"], if_not_exists=True)
+    op.create_index("ix_posts_likes_id", "posts", ["likes", "id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_posts_likes_id", table_name="posts", if_exists=True)
+    op.drop_index("ix_posts_created_at_id", table_name="posts", if_exists=True)
+    op.alter_column("posts", "likes", existing_type=sa.Integer(), nullable=True, server_default=None)
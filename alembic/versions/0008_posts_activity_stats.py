@@ -0,0 +1,52 @@
+"""add posts.comment_count and posts.last_activity_at
+
+Revision ID: 0008_posts_activity_stats
+Revises: 0007_posts_feed_indexes
+Create Date: 2026-10-18 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008_posts_activity_stats'
+down_revision: Union[str, Sequence[str], None] = '0007_posts_feed_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "posts",
+        sa.Column("comment_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("posts", sa.Column("last_activity_at", sa.DateTime(), nullable=True))
+    # 初次回填；之后如有偏差可运行 scripts/backfill_post_stats.py 重新计算
+    op.execute(
+        """
+        UPDATE posts SET
+            comment_count = (SELECT count(*) FROM comments WHERE comments.post_id = posts.id),
+            last_activity_at = COALESCE(
+                (SELECT max(comments.created_at) FROM comments WHERE comments.post_id = posts.id),
+                posts.created_at
+            )
+        """
+    )
+    op.execute("UPDATE posts SET last_activity_at = now() WHERE last_activity_at IS NULL")
+    op.alter_column("posts", "last_activity_at", existing_type=sa.DateTime(), nullable=False)
+    op.create_index(
+        "ix_posts_last_activity_at_id", "posts", ["last_activity_at", "id"], if_not_exists=True
+    )
+    op.create_index("ix_posts_comment_count_id", "posts", ["comment_count", "id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_posts_comment_count_id", table_name="posts", if_exists=True)
+    op.drop_index("ix_posts_last_activity_at_id", table_name="posts", if_exists=True)
+    op.drop_column("posts", "last_activity_at")
+    op.drop_column("posts", "comment_count")
@@ -0,0 +1,52 @@
+"""add comments.parent_id and comment pagination indexes
+
+Revision ID: 0010_comment_threads
+Revises: 0009_post_likes
+Create Date: 2026-10-18 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010_comment_threads'
+down_revision: Union[str, Sequence[str], None] = '0009_post_likes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("comments", sa.Column("parent_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        "fk_comments_parent_id_comments",
+        "comments",
+        "comments",
+        ["parent_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_index(
+        "ix_comments_post_id_created_at_id",
+        "comments",
+        ["post_id", "created_at", "id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_comments_parent_id_created_at_id",
+        "comments",
+        ["parent_id", "created_at", "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_comments_parent_id_created_at_id", table_name="comments", if_exists=True)
+    op.drop_index("ix_comments_post_id_created_at_id", table_name="comments", if_exists=True)
+    op.drop_constraint("fk_comments_parent_id_comments", "comments", type_="foreignkey")
+    op.drop_column("comments", "parent_id")
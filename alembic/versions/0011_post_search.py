@@ -0,0 +1,53 @@
+"""add full-text search vectors to posts and comments
+
+Revision ID: 0011_post_search
+Revises: 0010_comment_threads
+Create Date: 2026-10-18 19:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011_post_search'
+down_revision: Union[str, Sequence[str], None] = '0010_comment_threads'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 生成列在添加时会重写整张表并计算已有行的向量
+    op.execute(
+        "ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(content, '')), 'B')) STORED"
+    )
+    op.execute(
+        "ALTER TABLE comments ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "to_tsvector('simple', coalesce(content, ''))) STORED"
+    )
+    op.create_index(
+        "ix_posts_search_vector",
+        "posts",
+        ["search_vector"],
+        postgresql_using="gin",
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_comments_search_vector",
+        "comments",
+        ["search_vector"],
+        postgresql_using="gin",
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_comments_search_vector", table_name="comments", if_exists=True)
+    op.drop_index("ix_posts_search_vector", table_name="posts", if_exists=True)
+    op.drop_column("comments", "search_vector")
+    op.drop_column("posts", "search_vector")
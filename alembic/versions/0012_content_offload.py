@@ -0,0 +1,37 @@
+"""add content_external flags for offloaded post/comment bodies
+
+Revision ID: 0012_content_offload
+Revises: 0011_post_search
+Create Date: 2026-10-18 20:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012_content_offload'
+down_revision: Union[str, Sequence[str], None] = '0011_post_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 带常量默认值的非空列在 PostgreSQL 11+ 中只修改元数据，不重写表
+    op.add_column(
+        "posts",
+        sa.Column("content_external", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.add_column(
+        "comments",
+        sa.Column("content_external", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("comments", "content_external")
+    op.drop_column("posts", "content_external")
@@ -0,0 +1,30 @@
+"""add content_key so edited post bodies are written to a new document
+
+Revision ID: 0013_post_content_key
+Revises: 0012_content_offload
+Create Date: 2026-10-18 22:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013_post_content_key'
+down_revision: Union[str, Sequence[str], None] = '0012_content_offload'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 可空列只修改元数据；已外置的正文仍以帖子ID为文档ID，无需回填
+    op.add_column("posts", sa.Column("content_key", postgresql.UUID(as_uuid=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("posts", "content_key")
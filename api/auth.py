@@ -8,27 +8,64 @@ from api.schemas.user import TokenData
 from api.database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from api.models.user_model import DBUser as User
+from uuid import uuid4
+from api.config import settings
+from api.principals import Principal, principal_cache
+from api.token_store import get_revocation_store
 
-SECRET_KEY = "your-secret-key"
+SECRET_KEY = settings.JWT_SECRET_KEY
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
 
-def create_access_token(data: dict):
-    """创建测试用的JWT token"""
+def _encode_token(data: dict, token_type: str, expires_delta: timedelta) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    expire = datetime.now(timezone.utc) + expires_delta
+    # jti 用于登出或轮换时单独吊销该令牌
+    to_encode.update({"exp": expire, "jti": uuid4().hex, "type": token_type})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def create_access_token(data: dict):
+    """创建JWT访问令牌
+
+    data 通常为 Principal.claims()，包含 uid/adm/tv 声明时鉴权无需查询数据库。
+    """
+    return _encode_token(data, ACCESS_TOKEN_TYPE, timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+def create_refresh_token(principal: Principal) -> str:
+    """创建刷新令牌，只用于 /users/refresh 换取新的访问令牌"""
+    return _encode_token(principal.claims(), REFRESH_TOKEN_TYPE, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+
+def issue_tokens(principal: Principal) -> dict:
+    """为登录或刷新成功的用户签发一对令牌"""
+    return {
+        "access_token": create_access_token(principal.claims()),
+        "refresh_token": create_refresh_token(principal),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+async def revoke_token(payload: dict) -> None:
+    """按 jti 吊销已解码的令牌，记录保留到令牌过期"""
+    jti = payload.get("jti")
+    if jti and payload.get("exp"):
+        await get_revocation_store().revoke_token(jti, float(payload["exp"]))
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login")
 
 from typing import Optional
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: AsyncSession = Depends(get_db)
-) -> User:
+) -> Principal:
+    """校验令牌并返回当前用户身份
+
+    带声明的令牌不访问数据库，权限或禁用状态变化时由 UserService 递增令牌版本并吊销旧令牌；
+    旧令牌命中身份缓存时同样不访问数据库。
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -42,15 +79,35 @@ async def get_current_user(
         token_data = TokenData(username=str(username))
     except JWTError:
         raise credentials_exception
-    
-    user = await User.get_by_username(db, username=token_data.username)
-    if user is None:
+    # 刷新令牌不能用作访问令牌
+    if payload.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
         raise credentials_exception
-    return user
+
+    # 自包含声明的令牌直接构造身份，只检查是否已被吊销
+    principal = Principal.from_claims(payload)
+    if principal is not None:
+        if await get_revocation_store().is_revoked(payload.get("jti"), principal.id, principal.token_version):
+            raise credentials_exception
+        return principal
+
+    # 没有声明的旧令牌按 sub 缓存身份，用户被修改时由 UserService 清除
+    principal = principal_cache.get(token_data.username)
+    if principal is None:
+        user = await User.get_by_username(db, username=token_data.username)
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.set(token_data.username, principal)
+    if principal.disabled:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User is disabled"
+        )
+    return principal
 
 async def get_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     if not current_user.is_admin:  # type: ignore
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -58,10 +115,12 @@ async def get_admin_user(
         )
     return current_user
 
-def decode_access_token(token: str) -> dict:
-    """解码JWT token并返回payload"""
+def decode_access_token(token: str, token_type: str = ACCESS_TOKEN_TYPE) -> dict:
+    """解码JWT token并返回payload，令牌类型不符时同样视为无效"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        if payload.get("type", ACCESS_TOKEN_TYPE) != token_type:
+            raise JWTError("Unexpected token type")
         return payload
     except JWTError:
         raise HTTPException(
@@ -0,0 +1,214 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from api.config import settings
+from api.metrics import register_metrics
+
+
+def cat_tag(cat_id) -> str:
+    return f"cat:{cat_id}"
+
+
+def post_tag(post_id) -> str:
+    return f"post:{post_id}"
+
+
+class ResponseCache(ABC):
+    """读接口的响应缓存
+
+    值为可JSON序列化的数据（通常是 schema.model_dump(mode="json")），
+    每个条目带有若干实体标签，服务层在修改实体后按标签清除相关条目。
+    条目同时受 TTL 限制，与失效并发的读请求最多写回一份在 TTL 内过期的旧数据。
+    """
+
+    def __init__(self, ttl: float = settings.CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """命中时返回缓存的值，否则返回None"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, tags: Iterable[str] = ()) -> None:
+        pass
+
+    @abstractmethod
+    async def invalidate(self, *tags: str) -> None:
+        """清除带有任一标签的全部条目"""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+class LRUResponseCache(ResponseCache):
+    """进程内 TTL+LRU 缓存，条目数超过 maxsize 时淘汰最久未使用的条目"""
+
+    def __init__(self, maxsize: int = settings.CACHE_MAXSIZE, ttl: float = settings.CACHE_TTL):
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[Any, float, Tuple[str, ...]]]" = OrderedDict()
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    async def set(self, key: str, value: Any, tags: Iterable[str] = ()) -> None:
+        tags = tuple(tags)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, tags)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    async def invalidate(self, *tags: str) -> None:
+        with self._lock:
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            **super().stats(),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisResponseCache(ResponseCache):
+    """基于 Redis 的共享缓存
+
+    每个标签对应一个记录条目键的集合，失效时删除集合中的全部键。
+    容量淘汰由 Redis 的 maxmemory 策略负责，淘汰次数见 INFO stats 的 evicted_keys。
+    """
+
+    def __init__(
+        self,
+        url: str = settings.REDIS_URL,
+        prefix: str = "catalogue:cache",
+        ttl: float = settings.CACHE_TTL
+    ):
+        import redis.asyncio as redis
+
+        super().__init__(ttl)
+        self._redis = redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:entry:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._redis.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, tags: Iterable[str] = ()) -> None:
+        ttl = max(1, int(self.ttl))
+        entry_key = self._key(key)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(entry_key, json.dumps(value, separators=(",", ":")), ex=ttl)
+            for tag in tags:
+                # 标签集合比其中的条目活得更久，失效时多删除几个已过期的键没有影响
+                pipe.sadd(self._tag_key(tag), entry_key)
+                pipe.expire(self._tag_key(tag), ttl * 2)
+            await pipe.execute()
+
+    async def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = await self._redis.smembers(tag_key)
+            if keys:
+                await self._redis.delete(*keys)
+                self.invalidations += len(keys)
+            await self._redis.delete(tag_key)
+
+    async def clear(self) -> None:
+        async for key in self._redis.scan_iter(match=f"{self.prefix}:*"):
+            await self._redis.delete(key)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", **super().stats()}
+
+
+def build_cache(backend: str = settings.CACHE_BACKEND) -> Optional[ResponseCache]:
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return LRUResponseCache()
+    if backend == "redis":
+        return RedisResponseCache()
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """获取响应缓存（进程内单例），未启用时返回None"""
+    global _cache
+    if settings.CACHE_BACKEND == "none":
+        return None
+    if _cache is None:
+        _cache = build_cache()
+        register_metrics("response_cache", lambda: _cache.stats())
+    return _cache
@@ -6,10 +6,46 @@ class Settings(BaseSettings):
     DB_HOST: str = "localhost"
     DB_PORT: str = "5432"
     DB_NAME: str = "catalogue"
+    DB_ECHO: bool = False  # 输出所有SQL语句，仅用于调试
+    DB_POOL_SIZE: int = 10  # 每个进程常驻的连接数
+    DB_MAX_OVERFLOW: int = 10  # 高峰时允许额外创建的连接数
+    DB_POOL_TIMEOUT: float = 30  # 取连接的最长等待时间(秒)
+    DB_POOL_RECYCLE: int = 1800  # 连接最长存活时间(秒)，-1表示不回收
+    DB_POOL_PRE_PING: bool = True  # 取连接时检测连接是否可用
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg预编译语句缓存，使用pgbouncer事务模式时设为0
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 单条语句超时(毫秒)，0表示不限制
     MONGO_URI: str = "mongodb://localhost:27017"
     MONGO_DB: str = "catalogue"
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:5174"]
     PG_DATA_DIR: str = "./pgdata"  # 使用项目下的pgdata目录
+    PASSWORD_HASH_WORKERS: int = 4  # 密码哈希线程数，即同时进行的bcrypt计算上限
+    PASSWORD_SCHEMES: list[str] = ["bcrypt"]  # 第一个为新哈希使用的算法，其余仅用于校验旧哈希
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # bcrypt计算成本，调整后旧哈希在下次登录时自动升级
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536  # KiB
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+    JWT_SECRET_KEY: str = "your-secret-key"  # 生产环境必须通过环境变量覆盖
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    REFRESH_COOKIE_SECURE: bool = False  # 部署在HTTPS后应设为True
+    REVOCATION_BACKEND: str = "memory"  # 令牌吊销记录后端: memory 或 redis
+    REDIS_URL: str = "redis://localhost:6379/0"
+    PRINCIPAL_CACHE_SIZE: int = 10000  # 已认证身份缓存的最大条目数
+    PRINCIPAL_CACHE_TTL: float = 60  # 已认证身份缓存的有效期(秒)
+    PHOTO_STORAGE_DIR: str = "./media/photos"  # 本地照片存储目录
+    PHOTO_CHUNK_SIZE: int = 1024 * 1024  # 上传文件流式写盘的块大小(字节)
+    THUMBNAIL_SIZES: list[int] = [128, 512]  # 缩略图边长(像素)
+    THUMBNAIL_WORKERS: int = 2  # 生成缩略图的进程数
+    UPLOAD_SESSION_TTL: int = 24 * 3600  # 分片上传会话闲置过期时间(秒)
+    UPLOAD_MAX_CHUNK_SIZE: int = 8 * 1024 * 1024  # 单个分片的最大字节数
+    LIKE_BUFFER_ENABLED: bool = False  # 合并热门帖子的点赞计数后定期批量写入
+    LIKE_FLUSH_INTERVAL: float = 1.0  # 点赞计数批量写入间隔(秒)
+    CONTENT_STORE_BACKEND: str = "none"  # 帖子/评论正文外置存储: none、mongo 或 memory
+    CONTENT_OFFLOAD_THRESHOLD: int = 2000  # 超过该字符数的正文写入外置存储
+    CONTENT_EXCERPT_LENGTH: int = 200  # 外置正文在数据库中保留的摘要字符数
+    CACHE_BACKEND: str = "none"  # 读接口响应缓存: none、memory 或 redis
+    CACHE_TTL: float = 60  # 缓存条目有效期(秒)，也是失效遗漏时数据陈旧的上限
+    CACHE_MAXSIZE: int = 10000  # memory 后端的最大条目数
 
     class Config:
         env_file = ".env"
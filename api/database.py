@@ -1,15 +1,93 @@
+import time
 from typing import AsyncGenerator
 from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from api.config import settings
 from api.base import Base
+from api.metrics import register_metrics
 
 DATABASE_URL = f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True  # 添加echo参数便于调试
-)
+class PoolMetrics:
+    """连接池取连接的等待时间统计"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, waited: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+        }
+
+class MeteredAsyncQueuePool(AsyncAdaptedQueuePool):
+    """记录取连接等待时间的连接池，用于按进程估算连接数"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.observe(time.perf_counter() - started)
+        return conn
+
+    def recreate(self):
+        # dispose() 时会重建连接池，保留累计的统计
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            **self.metrics.as_dict(),
+        }
+
+def _connect_args() -> dict:
+    """asyncpg 连接参数：预编译语句缓存与语句超时"""
+    connect_args = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+    return connect_args
+
+def build_engine(url: str = DATABASE_URL):
+    """按配置创建异步引擎"""
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=MeteredAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=_connect_args()
+    )
+
+engine = build_engine()
+register_metrics("db_pool", lambda: engine.pool.stats())
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     expire_on_commit=False
@@ -23,6 +101,9 @@ async def create_tables():
     async with engine.begin() as conn:
         # 添加类型检查以确保conn是AsyncConnection
         if hasattr(conn, 'run_sync'):
+            if engine.dialect.name == "postgresql":
+                # 猫咪名称搜索的 trigram 索引依赖该扩展
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
             await conn.run_sync(Base.metadata.create_all)
         else:
             # 回退到直接执行
@@ -37,6 +118,17 @@ def register_models():
     import api.models.user
     return Base.metadata.tables
 
+def dialect_insert(session: AsyncSession, model):
+    """返回当前方言的 INSERT 构造，以便使用 ON CONFLICT 子句"""
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT is not supported for {dialect}")
+    return insert(model)
+
 # 获取数据库会话
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     if not Base.metadata.tables:
@@ -44,4 +136,4 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
 
-__all__ = ['AsyncSessionLocal', 'get_db']
+__all__ = ['AsyncSessionLocal', 'get_db', 'dialect_insert']
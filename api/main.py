@@ -1,16 +1,39 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from .auth import get_admin_user
 from .config import settings
+from .metrics import collect_metrics
+from .pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
 from .routers.cats import router as cats_router
 from .routers.users import router as users_router
 from .routers.posts import router as posts_router
+from .services.content_store import get_content_store
+from .services.like_buffer import get_like_buffer
+from .services.thumbnails import get_thumbnail_generator
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    like_buffer = get_like_buffer()
+    if like_buffer is not None:
+        like_buffer.start()
+    yield
+    # 写入尚未刷新的点赞计数
+    if like_buffer is not None:
+        await like_buffer.stop()
+    content_store = get_content_store()
+    if content_store is not None:
+        content_store.close()
+    # 关闭缩略图进程池
+    get_thumbnail_generator().shutdown()
 
 def create_app():
     app = FastAPI(
         title="CATalogue API",
         description="猫咪档案管理平台API",
         version="1.0.0",
-        openapi_url="/api/v1/openapi.json"
+        openapi_url="/api/v1/openapi.json",
+        lifespan=lifespan
     )
 
     # 中间件配置
@@ -20,6 +43,7 @@ def create_app():
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER],
     )
 
     # 路由配置 - 移除重复前缀
@@ -42,6 +66,11 @@ def create_app():
     @app.get("/api/v1/health")
     async def health_check():
         return {"status": "healthy"}
+
+    # 指标包含连接池、缓存与外置存储的内部状态，只对管理员开放
+    @app.get("/api/v1/metrics", dependencies=[Depends(get_admin_user)])
+    async def metrics():
+        return collect_metrics()
     
     return app
 
@@ -0,0 +1,14 @@
+from typing import Callable, Dict
+
+# 各模块注册的指标采集函数，/api/v1/metrics 按名称汇总输出
+_providers: Dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], dict]) -> None:
+    """注册一组指标，同名注册会覆盖之前的采集函数"""
+    _providers[name] = provider
+
+
+def collect_metrics() -> Dict[str, dict]:
+    """采集所有已注册的指标"""
+    return {name: provider() for name, provider in _providers.items()}
@@ -1,4 +1,5 @@
 from .cat import Cat
 from .user import DBUser as User
+from .post import Post, Comment, PostLike
 
-__all__ = ["Cat", "User"]
+__all__ = ["Cat", "User", "Post", "Comment", "PostLike"]
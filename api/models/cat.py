@@ -1,9 +1,11 @@
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import UUID, uuid4
-from sqlalchemy import Column, String, Date, DateTime, ForeignKey
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Index, Integer
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import relationship
 from pydantic import BaseModel, Field, field_validator
+from api.config import settings
 from api.db import Base
 
 # SQLAlchemy Model
@@ -18,6 +20,70 @@ class DBCat(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # 照片记录随猫咪一起用一次 IN 查询加载
+    photo_records = relationship(
+        "DBCatPhoto",
+        order_by="DBCatPhoto.created_at",
+        lazy="selectin",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+    @property
+    def photos(self) -> List[str]:
+        return [photo.url for photo in self.photo_records]
+
+    @property
+    def thumbnails(self) -> Dict[str, List[str]]:
+        """按边长分组的缩略图地址，与 photos 顺序一致"""
+        return {
+            str(size): [photo.thumbnail_url(size) for photo in self.photo_records]
+            for size in settings.THUMBNAIL_SIZES
+        }
+
+    __table_args__ = (
+        # 列表键集分页按 (created_at, id) 排序
+        Index("ix_cats_created_at_id", "created_at", "id"),
+        # "我的猫咪" 按主人过滤后仍可沿用分页顺序
+        Index("ix_cats_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_cats_breed", "breed"),
+        Index("ix_cats_birth_date", "birth_date"),
+        # PostgreSQL 下使用 pg_trgm 支持名称的 ILIKE 前缀/模糊搜索
+        Index(
+            "ix_cats_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
+class DBPhotoBlob(Base):
+    """按内容摘要去重的照片对象，ref_count 记录引用它的照片数"""
+    __tablename__ = "photo_blobs"
+
+    digest = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False, default=0)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class DBCatPhoto(Base):
+    __tablename__ = "cat_photos"
+
+    id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
+    cat_id = Column(PG_UUID(as_uuid=True), ForeignKey("cats.id", ondelete="CASCADE"), nullable=False, index=True)
+    blob_digest = Column(String(64), ForeignKey("photo_blobs.digest"), nullable=False, index=True)
+    filename = Column(String(255), nullable=True)
+    content_type = Column(String(100), nullable=True)
+    size = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    @property
+    def url(self) -> str:
+        return f"/api/v1/cats/{self.cat_id}/photos/{self.id}"
+
+    def thumbnail_url(self, size: int) -> str:
+        return f"{self.url}?size={size}"
+
 # Pydantic Models
 class CatBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -34,6 +100,7 @@ class CatUpdate(BaseModel):
 class Cat(CatBase):
     id: UUID
     owner_id: UUID
+    thumbnails: Dict[str, List[str]] = Field(default_factory=dict)
     created_at: datetime
     updated_at: datetime
 
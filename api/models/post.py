@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, DDL, String, Text, Integer, DateTime, ForeignKey, Index, event
 from datetime import datetime
 from uuid import UUID, uuid4
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
@@ -11,24 +11,118 @@ class Post(Base):
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
     title = Column(String(100), nullable=False)
     content = Column(Text, nullable=False)
+    # 为True时 content 只是摘要，完整正文在外置存储的 posts_content 中
+    content_external = Column(Boolean, nullable=False, default=False, server_default="false")
+    # 外置正文的文档ID，每次修改正文都换用新的文档，为空时文档ID即帖子ID
+    content_key = Column(PG_UUID(as_uuid=True), nullable=True)
     author_id = Column(PG_UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    likes = Column(Integer, default=0)
+    likes = Column(Integer, nullable=False, default=0, server_default="0")
+    # 冗余统计，由 PostService 在增删评论时于同一事务中维护
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_activity_at = Column(DateTime, nullable=False, default=datetime.now)
 
-    # 关系定义
-    author = relationship("DBUser", back_populates="posts", lazy="joined")
-    comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan", lazy="joined")
+    # 关系定义：默认禁止隐式加载，由 PostService 按查询指定加载方式
+    author = relationship("DBUser", back_populates="posts", lazy="raise")
+    comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan", lazy="raise")
+
+    __table_args__ = (
+        # 帖子列表按各排序方式倒序键集分页
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_likes_id", "likes", "id"),
+        Index("ix_posts_last_activity_at_id", "last_activity_at", "id"),
+        Index("ix_posts_comment_count_id", "comment_count", "id"),
+    )
 
 class Comment(Base):
     __tablename__ = "comments"
 
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
     content = Column(Text, nullable=False)
+    # 为True时 content 只是摘要，完整正文在外置存储的 comments_content 中
+    content_external = Column(Boolean, nullable=False, default=False, server_default="false")
     author_id = Column(PG_UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     post_id = Column(PG_UUID(as_uuid=True), ForeignKey("posts.id"), nullable=False)
+    # 回复所属的顶层评论，只支持一层回复
+    parent_id = Column(PG_UUID(as_uuid=True), ForeignKey("comments.id", ondelete="CASCADE"), nullable=True)
     created_at = Column(DateTime, default=datetime.now)
 
     # 关系定义
-    author = relationship("DBUser", back_populates="comments", lazy="joined")
-    post = relationship("Post", back_populates="comments", lazy="joined")
+    author = relationship("DBUser", back_populates="comments", lazy="raise")
+    post = relationship("Post", back_populates="comments", lazy="raise")
+
+    __table_args__ = (
+        # 帖子下的评论与某条评论的回复都按 (created_at, id) 键集分页
+        Index("ix_comments_post_id_created_at_id", "post_id", "created_at", "id"),
+        Index("ix_comments_parent_id_created_at_id", "parent_id", "created_at", "id"),
+    )
+
+class PostLike(Base):
+    """用户对帖子的点赞记录，主键保证同一用户只能点赞一次"""
+    __tablename__ = "post_likes"
+
+    user_id = Column(PG_UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    post_id = Column(PG_UUID(as_uuid=True), ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        # 按帖子删除点赞记录
+        Index("ix_post_likes_post_id", "post_id"),
+    )
+
+
+# 全文检索使用的 PostgreSQL 分词配置；simple 不做词干处理，对中英文混排更稳妥
+SEARCH_TS_CONFIG = "simple"
+
+# 检索用的 tsvector 生成列与 FTS5 虚拟表不映射到ORM，列表查询不会读取。
+# create_all 时按方言创建，已有数据库通过 0011 迁移添加。
+_SEARCH_DDL = {
+    "posts": {
+        "postgresql": [
+            "ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(content, '')), 'B')) STORED",
+            "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING gin (search_vector)",
+        ],
+        "sqlite": [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(title, content, content='posts')",
+            "CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN "
+            "INSERT INTO posts_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content); END",
+            "CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN "
+            "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+            "VALUES ('delete', old.rowid, old.title, old.content); END",
+            "CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title, content ON posts BEGIN "
+            "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+            "VALUES ('delete', old.rowid, old.title, old.content); "
+            "INSERT INTO posts_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content); END",
+        ],
+    },
+    "comments": {
+        "postgresql": [
+            "ALTER TABLE comments ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+            f"to_tsvector('{SEARCH_TS_CONFIG}', coalesce(content, ''))) STORED",
+            "CREATE INDEX IF NOT EXISTS ix_comments_search_vector ON comments USING gin (search_vector)",
+        ],
+        "sqlite": [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(content, content='comments')",
+            "CREATE TRIGGER IF NOT EXISTS comments_fts_ai AFTER INSERT ON comments BEGIN "
+            "INSERT INTO comments_fts(rowid, content) VALUES (new.rowid, new.content); END",
+            "CREATE TRIGGER IF NOT EXISTS comments_fts_ad AFTER DELETE ON comments BEGIN "
+            "INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.rowid, old.content); END",
+            "CREATE TRIGGER IF NOT EXISTS comments_fts_au AFTER UPDATE OF content ON comments BEGIN "
+            "INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.rowid, old.content); "
+            "INSERT INTO comments_fts(rowid, content) VALUES (new.rowid, new.content); END",
+        ],
+    },
+}
+
+for _table in (Post.__table__, Comment.__table__):
+    for _dialect, _statements in _SEARCH_DDL[_table.name].items():
+        for _statement in _statements:
+            event.listen(_table, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+    event.listen(
+        _table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {_table.name}_fts").execute_if(dialect="sqlite")
+    )
@@ -4,8 +4,9 @@ from uuid import UUID, uuid4
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from api.models.user_model import DBUser
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from api.schemas.user import UserBase, UserCreate, UserUpdate
+from api.security import password_hasher
 
 class UserInDB(BaseModel):
     id: UUID = Field(default_factory=uuid4)
@@ -15,6 +16,7 @@ class UserInDB(BaseModel):
     hashed_password: str
     disabled: bool = False
     is_admin: bool = Field(default=False)
+    token_version: int = 0
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
 
@@ -113,6 +115,7 @@ class UserInDB(BaseModel):
                 'hashed_password': user.hashed_password,
                 'disabled': user.disabled,
                 'is_admin': user.is_admin,
+                'token_version': user.token_version or 0,
                 'created_at': user.created_at,
                 'updated_at': user.updated_at
             })
@@ -133,6 +136,7 @@ class UserInDB(BaseModel):
                 'hashed_password': user.hashed_password,
                 'disabled': user.disabled,
                 'is_admin': user.is_admin,
+                'token_version': user.token_version or 0,
                 'created_at': user.created_at,
                 'updated_at': user.updated_at
             })
@@ -175,29 +179,31 @@ class UserInDB(BaseModel):
     @classmethod
     async def authenticate(cls, username: str, password: str, db: AsyncSession):
         user = await cls.get(username, db)
-        if not user or not cls.verify_password(password, user.hashed_password):
+        if not user:
+            return None
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            # 算法或成本参数已调整，登录成功时顺便升级哈希
+            await cls.update_password_hash(user.id, new_hash, db)
+            user.hashed_password = new_hash
         return user
 
     @classmethod
-    def verify_password(cls, plain_password: str, hashed_password: str) -> bool:
-        from passlib.context import CryptContext
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        return pwd_context.verify(plain_password, hashed_password)
+    async def update_password_hash(cls, user_id: UUID, hashed_password: str, db: AsyncSession):
+        await db.execute(
+            update(DBUser).where(DBUser.id == user_id).values(hashed_password=hashed_password)
+        )
+        await db.commit()
 
     @classmethod
-    def get_password_hash(cls, password: str) -> str:
-        # 简化示例，实际应该使用bcrypt等安全哈希算法
-        return password
+    async def verify_password(cls, plain_password: str, hashed_password: str) -> bool:
+        return await password_hasher.verify(plain_password, hashed_password)
 
     @classmethod
-    async def get_current_user(cls, token: str, db: AsyncSession):
-        # 简化示例，实际应该验证JWT token
-        # 这里假设token是username
-        user = await cls.get(token, db)
-        if not user:
-            return None
-        return user
+    async def get_password_hash(cls, password: str) -> str:
+        return await password_hasher.hash(password)
 
     async def update(self, user_update: "UserUpdate", db: AsyncSession):
         # 创建临时UserInDB用于更新
@@ -205,7 +211,7 @@ class UserInDB(BaseModel):
         update_data = user_update.model_dump(exclude_unset=True)
         
         if "password" in update_data:
-            temp_user.hashed_password = self.get_password_hash(update_data.pop("password"))
+            temp_user.hashed_password = await self.get_password_hash(update_data.pop("password"))
         
         for field, value in update_data.items():
             if value is not None and hasattr(temp_user, field):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, select
+from sqlalchemy import Column, String, Boolean, DateTime, Index, Integer, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from uuid import UUID, uuid4
@@ -21,9 +21,29 @@ class DBUser(Base):
     hashed_password = Column(String(255), nullable=False)
     disabled = Column(Boolean, default=False)
     is_admin = Column(Boolean, default=False)
+    # 每次修改密码、禁用或调整权限时递增，使此前签发的令牌失效
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     # 关系定义
     posts = relationship("Post", back_populates="author")
     comments = relationship("Comment", back_populates="author")
+
+    __table_args__ = (
+        # 管理后台用户列表按 (created_at, id) 键集分页
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # PostgreSQL 下使用 pg_trgm 支持用户名/邮箱的 ILIKE 前缀搜索
+        Index(
+            "ix_users_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+    )
@@ -0,0 +1,125 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from api.exceptions import BadRequestException
+
+# 下一页游标通过响应头返回，保持列表接口的响应体结构不变
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# 符合条件的总行数（PostgreSQL 下为估算值）
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"uuid": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "uuid" in value:
+            return UUID(value["uuid"])
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """将排序键编码为不透明的游标字符串"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _check_value(value: Any, expected: type) -> Any:
+    # bool 是 int 的子类，JSON 中的 true/false 不能当作数值
+    if isinstance(value, bool) and expected is not bool:
+        raise TypeError("unexpected cursor value")
+    if expected is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, expected):
+        raise TypeError("unexpected cursor value")
+    return value
+
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """解码游标并按排序列的类型逐个校验，格式或类型不正确时抛出400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor size mismatch")
+        return [_check_value(_decode_value(v), t) for v, t in zip(values, types)]
+    except (ValueError, TypeError):
+        raise BadRequestException("Invalid cursor")
+
+
+def keyset_after(columns: Sequence[Any], values: Sequence[Any], descending: bool = False):
+    """生成 (c1, c2, ...) > (v1, v2, ...) 的行比较条件
+
+    展开为 OR/AND 形式以兼容不支持行值比较的数据库。
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        prefix = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*prefix, step))
+    return or_(*clauses)
+
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], bool]:
+    """按 limit+1 查询的结果拆分出当前页以及是否还有下一页"""
+    rows = list(rows)
+    return rows[:limit], len(rows) > limit
+
+
+def next_cursor_for(rows: Sequence[Any], has_more: bool, *attrs: str) -> Optional[str]:
+    """根据当前页最后一行生成下一页游标"""
+    if not has_more or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(*(getattr(last, attr) for attr in attrs))
+
+
+def like_prefix(value: str) -> str:
+    """转义 LIKE 通配符并生成前缀匹配模式，配合 escape="\\" 使用"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+class _ExplainJSON(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <stmt>，内层语句的参数仍作为绑定参数传递"""
+    inherit_cache = False
+
+    def __init__(self, stmt):
+        self.stmt = stmt
+
+
+@compiles(_ExplainJSON)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+async def estimate_count(db: AsyncSession, stmt) -> int:
+    """返回查询结果的行数
+
+    PostgreSQL 下读取查询计划中的估算行数，不扫描数据；
+    其他数据库执行精确的 COUNT。stmt 不应包含排序与分页条件。
+    """
+    if db.bind.dialect.name == "postgresql":
+        result = await db.execute(_ExplainJSON(stmt))
+        plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    result = await db.execute(select(func.count()).select_from(stmt.order_by(None).subquery()))
+    return result.scalar_one()
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+
+from api.config import settings
+from api.metrics import register_metrics
+
+
+@dataclass(frozen=True)
+class Principal:
+    """已认证请求的身份信息
+
+    只包含鉴权需要的字段，不可变，可以安全地在请求之间共享。
+    """
+    id: UUID
+    username: str
+    is_admin: bool = False
+    disabled: bool = False
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            is_admin=bool(user.is_admin),
+            disabled=bool(user.disabled),
+            token_version=getattr(user, "token_version", None) or 0,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> Optional["Principal"]:
+        """从令牌声明构造身份，缺少 uid/adm/tv 声明的旧令牌返回None"""
+        if not all(claim in payload for claim in ("sub", "uid", "adm", "tv")):
+            return None
+        try:
+            return cls(
+                id=UUID(str(payload["uid"])),
+                username=str(payload["sub"]),
+                is_admin=bool(payload["adm"]),
+                token_version=int(payload["tv"]),
+            )
+        except (TypeError, ValueError):
+            return None
+
+    def claims(self) -> dict:
+        """签发访问令牌时写入的声明"""
+        return {
+            "sub": self.username,
+            "uid": str(self.id),
+            "adm": self.is_admin,
+            "tv": self.token_version,
+        }
+
+
+class PrincipalCache:
+    """按令牌 sub 缓存 Principal 的 TTL+LRU 缓存
+
+    条目数超过 maxsize 时淘汰最久未使用的条目，同时按用户ID建立索引，
+    用户被修改、禁用或删除时可以一次清除该用户的所有条目。
+    """
+
+    def __init__(self, maxsize: int = settings.PRINCIPAL_CACHE_SIZE, ttl: float = settings.PRINCIPAL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Principal, float]]" = OrderedDict()
+        self._by_user: Dict[UUID, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _unlink(self, key: str, principal: Principal) -> None:
+        keys = self._by_user.get(principal.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[principal.id]
+
+    def get(self, key: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._unlink(key, principal)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def set(self, key: str, principal: Principal) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._unlink(key, previous[0])
+            self._entries[key] = (principal, time.monotonic() + self.ttl)
+            self._by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, (old_principal, _) = self._entries.popitem(last=False)
+                self._unlink(old_key, old_principal)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id) -> None:
+        """清除某个用户的全部缓存条目"""
+        user_id = user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+        with self._lock:
+            for key in self._by_user.pop(user_id, set()):
+                self._entries.pop(key, None)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+# 用户删除后其所有令牌都不再有效
+REVOKE_ALL = 2 ** 31
+
+principal_cache = PrincipalCache()
+register_metrics("principal_cache", lambda: principal_cache.stats())
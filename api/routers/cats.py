@@ -1,40 +1,126 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, status
-from typing import List
+import os
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Header, Request, UploadFile, File, Depends, Query, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import AsyncIterator, List, Literal, Optional
 from uuid import UUID
+from datetime import date
 from ..models.cat import Cat, CatUpdate
-from ..schemas.cat import CatCreate
+from ..schemas.cat import CatCreate, PhotoUploadCreate, PhotoUploadStatus
 from ..services.cat_service import CatService
+from ..services.photo_storage import PhotoStorage, get_photo_storage
+from ..services.thumbnails import (
+    THUMBNAIL_MEDIA_TYPE,
+    ThumbnailGenerator,
+    get_thumbnail_generator,
+    thumbnail_key,
+)
+from ..services.upload_sessions import UploadSessionManager, get_upload_manager
+from ..pagination import NEXT_CURSOR_HEADER
+from ..database import AsyncSessionLocal, get_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
 
 router = APIRouter(prefix="/api/v1/cats", tags=["cats"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# 允许上传的照片类型
+ALLOWED_PHOTO_TYPES = ("image/jpeg", "image/png")
+# 照片按内容寻址，同一地址的内容永不改变，可长期缓存
+PHOTO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 缩略图尚未生成时返回的是原图，只允许短时间缓存
+PHOTO_FALLBACK_CACHE_CONTROL = "public, max-age=60"
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """按弱比较判断 If-None-Match 是否命中当前ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
 @router.get("/", response_model=List[Cat])
-async def list_cats(skip: int = 0, limit: int = 100):
-    cats = await CatService.get_all_cats()
-    return cats[skip:skip+limit]
+async def list_cats(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    owner_id: Optional[UUID] = None,
+    breed: Optional[str] = Query(None, max_length=50),
+    born_after: Optional[date] = None,
+    born_before: Optional[date] = None,
+    name: Optional[str] = Query(None, min_length=1, max_length=100, description="名称前缀，不区分大小写"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    获取猫咪列表，下一页游标通过 X-Next-Cursor 响应头返回
+    """
+    cats, next_cursor = await CatService(db).get_cats_page(
+        limit=limit,
+        cursor=cursor,
+        skip=skip,
+        owner_id=owner_id,
+        breed=breed,
+        born_after=born_after,
+        born_before=born_before,
+        name=name
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return cats
+
+@router.get("/export")
+async def export_cats(format: Literal["ndjson", "json"] = "ndjson"):
+    """
+    流式导出全部猫咪，ndjson 每行一条记录，json 输出为单个数组
+    """
+    # 响应体在请求依赖清理之后才开始发送，导出流使用自己的会话
+    async def stream_cats() -> AsyncIterator[Cat]:
+        async with AsyncSessionLocal() as session:
+            async for cat in CatService(session).stream_cats():
+                yield cat
+
+    async def ndjson_lines() -> AsyncIterator[str]:
+        async for cat in stream_cats():
+            yield Cat.model_validate(cat).model_dump_json() + "\n"
+
+    async def json_array() -> AsyncIterator[str]:
+        yield "["
+        first = True
+        async for cat in stream_cats():
+            yield ("" if first else ",") + Cat.model_validate(cat).model_dump_json()
+            first = False
+        yield "]"
+
+    if format == "json":
+        return StreamingResponse(json_array(), media_type="application/json")
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 @router.post("/", response_model=Cat, status_code=status.HTTP_201_CREATED)
-async def create_cat(cat: CatCreate):
-    return await CatService.create_cat(cat)
+async def create_cat(cat: CatCreate, db: AsyncSession = Depends(get_db)):
+    return await CatService(db).create_cat(cat)
 
 @router.get("/{cat_id}", response_model=Cat)
-async def get_cat(cat_id: UUID):
-    cat = await CatService.get_cat_by_id(cat_id)
+async def get_cat(cat_id: UUID, db: AsyncSession = Depends(get_db)):
+    cat = await CatService(db).get_cat(cat_id)
     if not cat:
         raise HTTPException(status_code=404, detail="Cat not found")
     return cat
 
 @router.put("/{cat_id}", response_model=Cat)
-async def update_cat(cat_id: UUID, cat: CatUpdate):
-    updated_cat = await CatService.update_cat(cat_id, cat.model_dump())
+async def update_cat(cat_id: UUID, cat: CatUpdate, db: AsyncSession = Depends(get_db)):
+    updated_cat = await CatService(db).update_cat(cat_id, cat.model_dump(exclude_unset=True))
     if not updated_cat:
         raise HTTPException(status_code=404, detail="Cat not found")
     return updated_cat
 
 @router.delete("/{cat_id}")
-async def delete_cat(cat_id: UUID):
-    success = await CatService.delete_cat(cat_id)
+async def delete_cat(
+    cat_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    storage: PhotoStorage = Depends(get_photo_storage)
+):
+    success = await CatService(db, storage).delete_cat(cat_id)
     if not success:
         raise HTTPException(status_code=404, detail="Cat not found")
     return {"message": "Cat deleted successfully"}
@@ -42,11 +128,15 @@ async def delete_cat(cat_id: UUID):
 @router.post("/{cat_id}/photos")
 async def upload_cat_photos(
     cat_id: UUID,
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
-    token: str = Depends(oauth2_scheme)
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    storage: PhotoStorage = Depends(get_photo_storage),
+    thumbnails: ThumbnailGenerator = Depends(get_thumbnail_generator)
 ):
     """
-    上传猫咪照片
+    上传猫咪照片，缩略图在响应返回后由后台任务生成
     """
     if not files:
         raise HTTPException(
@@ -55,9 +145,8 @@ async def upload_cat_photos(
         )
     
     # 验证文件类型
-    allowed_types = ["image/jpeg", "image/png"]
     for file in files:
-        if file.content_type not in allowed_types:
+        if file.content_type not in ALLOWED_PHOTO_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid file type: {file.content_type}"
@@ -69,8 +158,7 @@ async def upload_cat_photos(
             raise ValueError("Empty filename not allowed")
             
         # 调用服务层上传照片
-        result = await CatService.upload_photos(cat_id, files)
-        return result
+        result = await CatService(db, storage, thumbnails).upload_photos(cat_id, files, background_tasks)
         
     except OSError as e:
         if "No space left on device" in str(e):
@@ -87,3 +175,151 @@ async def upload_cat_photos(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="Cat not found")
+    return result
+
+@router.post("/{cat_id}/uploads", response_model=PhotoUploadStatus, status_code=status.HTTP_201_CREATED)
+async def create_photo_upload(
+    cat_id: UUID,
+    upload: PhotoUploadCreate,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    storage: PhotoStorage = Depends(get_photo_storage),
+    uploads: UploadSessionManager = Depends(get_upload_manager)
+):
+    """
+    创建可续传的分片上传会话
+    """
+    if upload.content_type not in ALLOWED_PHOTO_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file type: {upload.content_type}"
+        )
+    if not await CatService(db, storage).get_cat_by_id(cat_id):
+        raise HTTPException(status_code=404, detail="Cat not found")
+    session = await uploads.create(
+        storage,
+        cat_id,
+        upload.filename,
+        upload.content_type,
+        upload.size
+    )
+    return session.to_dict()
+
+@router.put("/{cat_id}/uploads/{upload_id}/chunks/{index}", response_model=PhotoUploadStatus)
+async def put_photo_upload_chunk(
+    cat_id: UUID,
+    upload_id: str,
+    index: int,
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    storage: PhotoStorage = Depends(get_photo_storage),
+    uploads: UploadSessionManager = Depends(get_upload_manager)
+):
+    """
+    上传第 index 个分片（从0开始），请求体为原始字节，直接追加到存储
+
+    分片必须按序上传；重复上传已接收的分片会直接返回当前进度。
+    """
+    if index < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid chunk index")
+    session = uploads.get(cat_id, upload_id)
+    session = await uploads.write_chunk(storage, session, index, request.stream())
+    return session.to_dict()
+
+@router.get("/{cat_id}/uploads/{upload_id}", response_model=PhotoUploadStatus)
+async def get_photo_upload(
+    cat_id: UUID,
+    upload_id: str,
+    token: str = Depends(oauth2_scheme),
+    uploads: UploadSessionManager = Depends(get_upload_manager)
+):
+    """
+    查询分片上传进度，客户端据此从 next_chunk 继续上传
+    """
+    return uploads.get(cat_id, upload_id).to_dict()
+
+@router.post("/{cat_id}/uploads/{upload_id}/complete")
+async def complete_photo_upload(
+    cat_id: UUID,
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    storage: PhotoStorage = Depends(get_photo_storage),
+    thumbnails: ThumbnailGenerator = Depends(get_thumbnail_generator),
+    uploads: UploadSessionManager = Depends(get_upload_manager)
+):
+    """
+    完成分片上传，返回格式与 upload_cat_photos 相同
+    """
+    session = uploads.get(cat_id, upload_id)
+    try:
+        result = await CatService(db, storage, thumbnails).complete_upload(session, uploads, background_tasks)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Cat not found")
+    return result
+
+@router.delete("/{cat_id}/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_photo_upload(
+    cat_id: UUID,
+    upload_id: str,
+    token: str = Depends(oauth2_scheme),
+    storage: PhotoStorage = Depends(get_photo_storage),
+    uploads: UploadSessionManager = Depends(get_upload_manager)
+):
+    """
+    取消分片上传并删除已接收的数据
+    """
+    await uploads.abort(storage, uploads.get(cat_id, upload_id))
+
+@router.api_route("/{cat_id}/photos/{photo_id}", methods=["GET", "HEAD"])
+async def get_cat_photo(
+    cat_id: UUID,
+    photo_id: UUID,
+    size: Optional[int] = Query(None, description="缩略图边长，缩略图尚未生成时返回原图"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    storage: PhotoStorage = Depends(get_photo_storage),
+    thumbnails: ThumbnailGenerator = Depends(get_thumbnail_generator)
+):
+    """
+    下载猫咪照片
+
+    ETag取自内容摘要，命中 If-None-Match 时返回304；
+    Range/If-Range 由 FileResponse 处理，支持断点续传。
+    """
+    if size is not None and size not in thumbnails.sizes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported thumbnail size: {size}"
+        )
+    photo = await CatService(db, storage, thumbnails).get_photo(cat_id, photo_id)
+    path = storage.local_path(photo.blob_digest) if photo else None
+    if not path:
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    media_type = photo.content_type
+    etag = f'"{photo.blob_digest}"'
+    cache_control = PHOTO_CACHE_CONTROL
+    if size is not None:
+        thumbnail_path = storage.local_path(thumbnail_key(photo.blob_digest, size))
+        if thumbnail_path and os.path.exists(thumbnail_path):
+            path, media_type = thumbnail_path, THUMBNAIL_MEDIA_TYPE
+            etag = f'"{photo.blob_digest}-{size}"'
+        else:
+            cache_control = PHOTO_FALLBACK_CACHE_CONTROL
+
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -1,39 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from typing import List, Literal, Optional
 from uuid import UUID
 
-from api.database import get_db
+from api.pagination import NEXT_CURSOR_HEADER
 from api.schemas.post import Post, Comment, CommentCreate
-from api.models.user_model import DBUser as User
-from api.schemas.post import PostCreate, PostUpdate
-from api.services.post_service import PostService
+from api.schemas.post import PostCreate, PostDetail, PostLikeStatus, PostSearchResult, PostUpdate
+from api.services.post_service import PostService, get_post_service
 from api.auth import get_current_user
+from api.principals import Principal
 
 router = APIRouter(prefix="/api/v1")
 
 @router.post("/posts", response_model=Post, status_code=status.HTTP_201_CREATED, tags=["社区帖子"])
 async def create_post(
     post: PostCreate,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return await PostService(db).create_post(post, str(current_user.id))
+    return await service.create_post(post, str(current_user.id))
 
 @router.get("/posts", response_model=List[Post], tags=["社区帖子"])
 async def get_posts(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort: Literal["new", "top", "active", "comments"] = "new",
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return await PostService(db).get_posts()
+    """
+    获取帖子列表，下一页游标通过 X-Next-Cursor 响应头返回
+    """
+    posts, next_cursor = await service.get_posts_page(limit=limit, cursor=cursor, sort=sort)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return posts
 
-@router.get("/posts/{post_id}", response_model=Post, tags=["社区帖子"])
+# 需要声明在 /posts/{post_id} 之前，否则 search 会被当作帖子ID
+@router.get("/posts/search", response_model=List[PostSearchResult], tags=["社区帖子"])
+async def search_posts(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    全文检索帖子标题、正文与评论，按相关度排序，下一页游标通过 X-Next-Cursor 响应头返回
+    """
+    results, next_cursor = await service.search_posts(q, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return results
+
+@router.get("/posts/{post_id}", response_model=PostDetail, tags=["社区帖子"])
 async def get_post(
     post_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    include_comments: bool = False,
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
 ):
-    post = await PostService(db).get_post(post_id)
+    post = await service.get_post(post_id, include_comments=include_comments)
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="帖子不存在")
     return post
@@ -42,10 +70,10 @@ async def get_post(
 async def update_post(
     post_id: UUID,
     post: PostUpdate,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
 ):
-    updated_post = await PostService(db).update_post(post_id, post, str(current_user.id))
+    updated_post = await service.update_post(post_id, post, current_user)
     if not updated_post:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN if updated_post is None else status.HTTP_404_NOT_FOUND,
@@ -56,32 +84,63 @@ async def update_post(
 @router.delete("/posts/{post_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["社区帖子"])
 async def delete_post(
     post_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
+):
+    await service.delete_post(post_id, current_user)
+
+@router.post("/posts/{post_id}/like", response_model=PostLikeStatus, tags=["社区帖子"])
+async def like_post(
+    post_id: UUID,
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
+):
+    return await service.like_post(post_id, current_user.id)
+
+@router.delete("/posts/{post_id}/like", response_model=PostLikeStatus, tags=["社区帖子"])
+async def unlike_post(
+    post_id: UUID,
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
 ):
-    await PostService(db).delete_post(post_id, str(current_user.id))
+    return await service.unlike_post(post_id, current_user.id)
 
 @router.post("/posts/{post_id}/comments", response_model=Comment, status_code=status.HTTP_201_CREATED, tags=["社区帖子"])
 async def create_comment(
     post_id: UUID,
     comment: CommentCreate,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return await PostService(db).create_comment(post_id, comment, str(current_user.id))
+    return await service.create_comment(post_id, comment, str(current_user.id))
 
 @router.get("/posts/{post_id}/comments", response_model=List[Comment], tags=["社区帖子"])
 async def get_comments(
     post_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    parent_id: Optional[UUID] = Query(None, description="获取该评论的回复，不传时获取顶层评论"),
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return await PostService(db).get_comments(post_id)
+    """
+    获取帖子评论，下一页游标通过 X-Next-Cursor 响应头返回
+    """
+    comments, next_cursor = await service.get_comments_page(
+        post_id,
+        limit=limit,
+        cursor=cursor,
+        parent_id=parent_id
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return comments
 
 @router.delete("/comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["社区帖子"])
 async def delete_comment(
     comment_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    service: PostService = Depends(get_post_service),
+    current_user: Principal = Depends(get_current_user)
 ):
-    await PostService(db).delete_comment(comment_id, str(current_user.id))
+    await service.delete_comment(comment_id, current_user)
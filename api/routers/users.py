@@ -1,16 +1,40 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from ..models.user import UserInDB, UserCreate, UserUpdate, PasswordResetRequest, PasswordResetConfirm
-from ..models.user_model import DBUser
+from ..schemas.user import Token, TokenRefresh
 from ..database import get_db
+from ..pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from ..config import settings
+from ..auth import (
+    ACCESS_TOKEN_TYPE, REFRESH_TOKEN_TYPE, decode_access_token, get_admin_user,
+    get_current_user, issue_tokens, revoke_token
+)
+from ..principals import Principal, principal_cache
+from ..services.user_service import UserService
+from ..token_store import get_revocation_store
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 from uuid import UUID
 
 router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# 登出时访问令牌可能已经过期，不强制要求
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login", auto_error=False)
+
+REFRESH_COOKIE_NAME = "refresh_token"
+# 刷新令牌Cookie只随 /users 下的请求发送
+REFRESH_COOKIE_PATH = "/api/v1/users"
+
+def _set_refresh_cookie(response: Response, refresh_token: str) -> None:
+    response.set_cookie(
+        REFRESH_COOKIE_NAME,
+        refresh_token,
+        max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600,
+        path=REFRESH_COOKIE_PATH,
+        httponly=True,
+        secure=settings.REFRESH_COOKIE_SECURE,
+        samesite="lax"
+    )
 
 @router.post("/register", response_model=UserInDB, status_code=status.HTTP_201_CREATED)
 async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
@@ -24,15 +48,16 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
         username=user.username,
         email=user.email,
         full_name=user.full_name,
-        hashed_password=UserInDB.get_password_hash(user.password),
+        hashed_password=await UserInDB.get_password_hash(user.password),
         is_admin=user.is_admin
     )
     await user_in_db.save(db)
     return user_in_db
 
-@router.post("/login")
+@router.post("/login", response_model=Token)
 async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    response: Response,
     db: AsyncSession = Depends(get_db)
 ):
     user = await UserInDB.authenticate(
@@ -45,105 +70,139 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
-    return {"access_token": user.username, "token_type": "bearer"}
+    if user.disabled:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User is disabled"
+        )
+    tokens = issue_tokens(Principal.from_user(user))
+    _set_refresh_cookie(response, tokens["refresh_token"])
+    return tokens
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    request: Request,
+    response: Response,
+    body: Optional[TokenRefresh] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """用刷新令牌换取新的令牌对，旧刷新令牌随即失效"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    token = (body.refresh_token if body else None) or request.cookies.get(REFRESH_COOKIE_NAME)
+    if not token:
+        raise credentials_exception
+    payload = decode_access_token(token, REFRESH_TOKEN_TYPE)
+    principal = Principal.from_claims(payload)
+    if principal is None:
+        raise credentials_exception
+    if await get_revocation_store().is_revoked(payload.get("jti"), principal.id, principal.token_version):
+        raise credentials_exception
+    # 刷新频率低，这里重新读取用户，使禁用和权限变更在下一次刷新时生效
+    user = await UserInDB.get_by_id(principal.id, db)
+    if not user or user.disabled or user.token_version != principal.token_version:
+        raise credentials_exception
+    await revoke_token(payload)
+    tokens = issue_tokens(Principal.from_user(user))
+    _set_refresh_cookie(response, tokens["refresh_token"])
+    return tokens
+
+@router.post("/logout")
+async def logout(
+    request: Request,
+    response: Response,
+    token: Annotated[Optional[str], Depends(optional_oauth2_scheme)] = None
+):
+    """吊销当前的访问令牌和刷新令牌"""
+    candidates = (
+        (token, ACCESS_TOKEN_TYPE),
+        (request.cookies.get(REFRESH_COOKIE_NAME), REFRESH_TOKEN_TYPE),
+    )
+    for raw_token, token_type in candidates:
+        if not raw_token:
+            continue
+        try:
+            payload = decode_access_token(raw_token, token_type)
+        except HTTPException:
+            continue
+        await revoke_token(payload)
+    response.delete_cookie(REFRESH_COOKIE_NAME, path=REFRESH_COOKIE_PATH)
+    return {"message": "Logged out"}
 
-@router.get("/me")
+@router.get("/me", response_model=UserInDB)
 async def read_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    user = await UserInDB.get_current_user(token, db)
+    user = await UserInDB.get_by_id(current_user.id, db)
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
+        raise HTTPException(status_code=404, detail="User not found")
     return user
 
 @router.put("/me")
 async def update_current_user(
     user_update: UserUpdate,
-    token: Annotated[str, Depends(oauth2_scheme)],
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    current_user = await UserInDB.get_current_user(token, db)
-    if not current_user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
+    user = await UserInDB.get_by_id(current_user.id, db)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
     # 直接使用UserUpdate对象更新
-    updated_user = await current_user.update(user_update, db)
+    updated_user = await user.update(user_update, db)
+    principal_cache.invalidate_user(current_user.id)
     return updated_user
 
 @router.delete("/me")
 async def delete_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    current_user = await UserInDB.get_current_user(token, db)
-    if not current_user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
-    await current_user.delete(db)
+    if not await UserService(db).delete_user(current_user.id):
+        raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted successfully"}
 
 # 管理员用户管理端点
 @router.get("/", response_model=List[UserInDB])
 async def list_users(
-    token: Annotated[str, Depends(oauth2_scheme)],
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="用户名或邮箱前缀，不区分大小写"),
+    is_admin: Optional[bool] = None,
+    disabled: Optional[bool] = None,
+    current_user: Principal = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
-    current_user = await UserInDB.get_current_user(token, db)
-    if not current_user or not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin permission required"
-        )
-    
-    # 获取所有用户
-    result = await db.execute(select(DBUser))
-    db_users = result.scalars().all()
-    
-    # 转换为UserInDB对象列表并保留管理员状态
-    users = []
-    for db_user in db_users:
-        user_dict = {
-            "id": db_user.id,
-            "username": db_user.username,
-            "email": db_user.email,
-            "full_name": db_user.full_name,
-            "hashed_password": db_user.hashed_password,
-            "disabled": db_user.disabled,
-            "is_admin": bool(db_user.is_admin)
-        }
-        user_in_db = UserInDB.model_validate(user_dict)
-        users.append(user_in_db)
-    
-    # 过滤掉当前用户（管理员自己） - 统一转换为字符串比较
-    current_user_id_str = str(current_user.id)
-    filtered_users = [user for user in users if str(user.id) != current_user_id_str]
-    
-    print(f"Total users: {len(users)}, Filtered users count: {len(filtered_users)}")
-    print(f"Current user id: {current_user.id}, Type: {type(current_user.id)}")
-    print(f"User ids: {[str(user.id) for user in users]}")
-    
-    return filtered_users
+    """
+    获取除当前管理员以外的用户列表，下一页游标与总数分别通过
+    X-Next-Cursor、X-Total-Count 响应头返回
+    """
+    users, next_cursor, total = await UserService(db).list_users(
+        limit=limit,
+        cursor=cursor,
+        exclude_id=current_user.id,
+        q=q,
+        is_admin=is_admin,
+        disabled=disabled,
+        # 翻页请求不需要重复计算总数
+        with_total=cursor is None
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+    return users
 
 @router.get("/{user_id}", response_model=UserInDB)
 async def get_user(
     user_id: UUID,
-    token: Annotated[str, Depends(oauth2_scheme)],
+    current_user: Principal = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
-    current_user = await UserInDB.get_current_user(token, db)
-    if not current_user or not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin permission required"
-        )
     user = await UserInDB.get_by_id(user_id, db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -153,38 +212,23 @@ async def get_user(
 async def update_user(
     user_id: UUID,
     user_update: UserUpdate,
-    token: Annotated[str, Depends(oauth2_scheme)],
+    current_user: Principal = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
-    current_user = await UserInDB.get_current_user(token, db)
-    if not current_user or not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin permission required"
-        )
-    user = await UserInDB.get_by_id(user_id, db)
-    if not user:
+    # 权限或禁用状态变化时由服务层吊销该用户已签发的令牌并清除身份缓存
+    updated_user = await UserService(db).admin_update_user(user_id, user_update)
+    if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
-    # 直接使用UserUpdate对象更新
-    updated_user = await user.update(user_update, db)
     return updated_user
 
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: UUID,
-    token: Annotated[str, Depends(oauth2_scheme)],
+    current_user: Principal = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
-    current_user = await UserInDB.get_current_user(token, db)
-    if not current_user or not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin permission required"
-        )
-    user = await UserInDB.get_by_id(user_id, db)
-    if not user:
+    if not await UserService(db).delete_user(user_id):
         raise HTTPException(status_code=404, detail="User not found")
-    await user.delete(db)
     return {"message": "User deleted successfully"}
 
 @router.post("/password/reset")
@@ -18,3 +18,18 @@ class Cat(CatBase):
 
     class Config:
         orm_mode = True
+
+class PhotoUploadCreate(BaseModel):
+    """创建分片上传会话"""
+    filename: Optional[str] = Field(None, max_length=255)
+    content_type: str = Field(..., max_length=100)
+    size: Optional[int] = Field(None, gt=0, description="文件总字节数，提供时完成上传会校验")
+
+class PhotoUploadStatus(BaseModel):
+    upload_id: str
+    cat_id: UUID
+    filename: Optional[str] = None
+    content_type: str
+    total_size: Optional[int] = None
+    next_chunk: int
+    received_bytes: int
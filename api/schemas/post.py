@@ -1,5 +1,5 @@
 from pydantic import BaseModel, field_validator
-from typing import Optional, Union
+from typing import List, Optional, Union
 from datetime import datetime
 from uuid import UUID
 from .user import User
@@ -20,6 +20,8 @@ class Post(PostBase):
     created_at: datetime
     updated_at: datetime
     likes: int
+    comment_count: int = 0
+    last_activity_at: Optional[datetime] = None
     author: Optional[User] = None
 
     @field_validator('id', 'author_id', mode='before')
@@ -40,7 +42,9 @@ class Post(PostBase):
                 "author_id": "123e4567-e89b-12d3-a456-426614174000",
                 "created_at": "2025-01-01T00:00:00",
                 "updated_at": "2025-01-01T00:00:00",
-                "likes": 0
+                "likes": 0,
+                "comment_count": 0,
+                "last_activity_at": "2025-01-01T00:00:00"
             }
         }
 
@@ -48,16 +52,18 @@ class CommentBase(BaseModel):
     content: str
 
 class CommentCreate(CommentBase):
-    pass
+    # 回复某条评论；回复的回复会挂到同一条顶层评论下
+    parent_id: Optional[UUID] = None
 
 class Comment(CommentBase):
     id: str
     author_id: str
     post_id: str
+    parent_id: Optional[str] = None
     created_at: datetime
     author: Optional[User] = None
 
-    @field_validator('id', 'author_id', 'post_id', mode='before')
+    @field_validator('id', 'author_id', 'post_id', 'parent_id', mode='before')
     def parse_uuid(cls, v):
         if v is None:
             return None
@@ -77,3 +83,19 @@ class Comment(CommentBase):
                 "created_at": "2025-01-01T00:00:00"
             }
         }
+
+class PostDetail(Post):
+    # 仅在请求 include_comments 时返回评论
+    comments: Optional[List[Comment]] = None
+
+class PostSearchResult(Post):
+    rank: float
+    # 匹配词以 <mark> 标出，其余内容已做HTML转义；对应字段没有命中时为空
+    title_highlight: Optional[str] = None
+    content_highlight: Optional[str] = None
+    comment_highlight: Optional[str] = None
+
+class PostLikeStatus(BaseModel):
+    post_id: str
+    liked: bool
+    likes: int
@@ -53,6 +53,12 @@ class UserUpdate(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+class TokenRefresh(BaseModel):
+    # 浏览器客户端使用HttpOnly Cookie，其他客户端可以在请求体中传递
+    refresh_token: Optional[str] = None
 
 class PasswordResetRequest(BaseModel):
     email: str
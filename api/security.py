@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from passlib.context import CryptContext
+
+from api.config import settings
+from api.metrics import register_metrics
+
+T = TypeVar("T")
+
+
+def build_crypt_context(
+    schemes=None,
+    bcrypt_rounds: int = settings.PASSWORD_BCRYPT_ROUNDS
+) -> CryptContext:
+    """按配置创建密码哈希上下文
+
+    第一个算法用于生成新哈希，其余算法标记为过时，
+    成本参数与当前配置不一致的哈希也会被 needs_update() 判定为需要升级。
+    """
+    schemes = list(schemes or settings.PASSWORD_SCHEMES)
+    if "argon2" in schemes:
+        from passlib.hash import argon2
+        if not argon2.has_backend():
+            raise RuntimeError("argon2 password hashing requires the argon2-cffi package")
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        argon2__time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+        argon2__memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
+
+
+# 进程内共享的哈希上下文，避免每次请求重新初始化后端
+pwd_context = build_crypt_context()
+
+
+class PasswordHasher:
+    """密码哈希服务
+
+    bcrypt 每次计算耗时上百毫秒，放在事件循环里会阻塞同一进程的所有请求。
+    这里在独立的有界线程池中执行 hash/verify（bcrypt 计算时会释放GIL），
+    并统计排队深度与等待时间，便于在登录高峰时观察与调整并发数。
+    """
+
+    def __init__(
+        self,
+        context: Optional[CryptContext] = None,
+        max_workers: int = settings.PASSWORD_HASH_WORKERS
+    ):
+        self.max_workers = max_workers
+        self.context = context or pwd_context
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.wait_seconds_total = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+        def task():
+            # 工作线程开始执行时，任务从排队转为执行中
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.wait_seconds_total += time.perf_counter() - submitted
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        try:
+            future = self._get_executor().submit(task)
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            raise
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # 请求被取消时，尚未开始执行的任务直接出队
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+            raise
+
+    def _verify(self, password: str, hashed_password: str) -> bool:
+        try:
+            return self.context.verify(password, hashed_password)
+        except ValueError:
+            # 无法识别的哈希格式视为校验失败
+            return False
+
+    def _verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        try:
+            return self.context.verify_and_update(password, hashed_password)
+        except ValueError:
+            return False, None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self._verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """校验密码，哈希需要升级时同时返回按当前配置生成的新哈希"""
+        return await self._run(self._verify_and_update, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "queued": self.queued,
+            "active": self.active,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "wait_seconds_avg": round(self.wait_seconds_total / self.completed, 6) if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+register_metrics("password_hasher", lambda: password_hasher.stats())
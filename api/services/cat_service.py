@@ -1,83 +1,385 @@
-from typing import Sequence, Optional, AsyncGenerator
+import errno
+from collections import Counter
+from datetime import date, datetime
+from typing import AsyncGenerator, Awaitable, Callable, List, Optional, Sequence, Tuple
 from uuid import UUID
+from fastapi import BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, true
-from sqlalchemy.sql.expression import bindparam
-from ..models.cat import DBCat as Cat, DBCat
+from sqlalchemy import bindparam, delete, update
+from ..models.cat import Cat as CatResponse, DBCat as Cat, DBCat, DBCatPhoto, DBPhotoBlob
 from ..schemas.cat import CatCreate as SchemaCatCreate
-from ..database import AsyncSessionLocal, get_db
+from ..cache import ResponseCache, cat_tag, get_cache
+from ..metrics import register_metrics
+from ..singleflight import SingleFlight
+from .photo_storage import PhotoStorage, StoredPhoto, get_photo_storage
+from .thumbnails import ThumbnailGenerator, get_thumbnail_generator
+from .upload_sessions import UploadSession, UploadSessionManager
+from ..database import dialect_insert
+from ..pagination import decode_cursor, keyset_after, like_prefix, next_cursor_for, split_page
+
+# 猫咪列表的稳定排序键，与 ix_cats_created_at_id 索引对应
+CAT_ORDER_KEYS = ("created_at", "id")
+# 导出时每批从服务端游标拉取的行数
+EXPORT_BATCH_SIZE = 500
+# 允许通过 update_cat 修改的列
+UPDATABLE_FIELDS = ("name", "breed", "birth_date")
+
+# 猫咪详情的并发读取合并，键的第一个元素为猫咪ID
+cat_flights = SingleFlight()
+register_metrics("cat_singleflight", lambda: cat_flights.stats())
 
 class CatService:
-    @staticmethod
-    async def get_all_cats() -> Sequence[Cat]:
-        async with AsyncSessionLocal() as session:
-            stmt = select(Cat)
-            result = await session.execute(stmt)
-            return list(result.scalars())
+    def __init__(
+        self,
+        db: AsyncSession,
+        storage: Optional[PhotoStorage] = None,
+        thumbnails: Optional[ThumbnailGenerator] = None,
+        cache: Optional[ResponseCache] = None
+    ):
+        self.db = db
+        self.storage = storage or get_photo_storage()
+        self.thumbnails = thumbnails or get_thumbnail_generator()
+        self.cache = cache or get_cache()
 
-    @staticmethod
-    async def get_cat_by_id(cat_id: UUID) -> Optional[Cat]:
-        async with AsyncSessionLocal() as session:
-            stmt = select(Cat).where(Cat.id == cat_id)
-            result = await session.execute(stmt)
-            return result.scalar_one_or_none()
+    async def _invalidate(self, cat_id: UUID) -> None:
+        """猫咪信息或照片变化后清除其缓存"""
+        cat_flights.forget(cat_id)
+        if self.cache is not None:
+            await self.cache.invalidate(cat_tag(cat_id))
 
-    @staticmethod
-    async def create_cat(cat_data: SchemaCatCreate) -> Cat:
-        async with AsyncSessionLocal() as session:
-            cat_data_dict = cat_data.model_dump()
-            db_cat_data = {
-                'name': cat_data_dict['name'],
-                'breed': cat_data_dict['breed'],
-                'birth_date': cat_data_dict['birth_date'],
-                'owner_id': cat_data_dict['owner_id']
-            }
-            cat = DBCat(**db_cat_data)
-            session.add(cat)
-            await session.commit()
-            await session.refresh(cat)
-            return cat
+    async def get_all_cats(self) -> Sequence[Cat]:
+        result = await self.db.execute(select(Cat))
+        return list(result.scalars())
 
     @staticmethod
-    async def update_cat(cat_id: UUID, cat_data: dict) -> Optional[Cat]:
-        async with AsyncSessionLocal() as session:
-            stmt = select(Cat).where(Cat.id == cat_id)
-            result = await session.execute(stmt)
-            cat = result.scalar_one_or_none()
-            if cat:
-                for key, value in cat_data.items():
-                    setattr(cat, key, value)
-                await session.commit()
-                await session.refresh(cat)
-            return cat
+    def _apply_filters(
+        stmt,
+        owner_id: Optional[UUID] = None,
+        breed: Optional[str] = None,
+        born_after: Optional[date] = None,
+        born_before: Optional[date] = None,
+        name: Optional[str] = None
+    ):
+        """为查询附加过滤条件，每个条件都有对应索引"""
+        if owner_id is not None:
+            stmt = stmt.where(Cat.owner_id == owner_id)
+        if breed is not None:
+            stmt = stmt.where(Cat.breed == breed)
+        if born_after is not None:
+            stmt = stmt.where(Cat.birth_date >= born_after)
+        if born_before is not None:
+            stmt = stmt.where(Cat.birth_date <= born_before)
+        if name:
+            # 转义通配符，仅做前缀匹配
+            stmt = stmt.where(Cat.name.ilike(like_prefix(name), escape="\\"))
+        return stmt
 
-    @staticmethod
-    async def delete_cat(cat_id: UUID) -> bool:
-        async with AsyncSessionLocal() as session:
-            stmt = select(Cat).where(Cat.id == cat_id)
-            result = await session.execute(stmt)
-            cat = result.scalar_one_or_none()
-            if cat:
-                await session.delete(cat)
-                await session.commit()
-                return True
-            return False
+    async def get_cats_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        owner_id: Optional[UUID] = None,
+        breed: Optional[str] = None,
+        born_after: Optional[date] = None,
+        born_before: Optional[date] = None,
+        name: Optional[str] = None
+    ) -> Tuple[List[Cat], Optional[str]]:
+        """分页获取猫咪列表
 
-    @staticmethod
-    async def upload_photos(cat_id: UUID, files: list) -> dict:
-        """上传猫咪照片"""
+        传入 cursor 时使用 (created_at, id) 键集分页，否则退化为 OFFSET 分页。
+        两种模式都返回下一页游标，没有更多数据时为 None。
+        """
+        stmt = self._apply_filters(
+            select(Cat).order_by(Cat.created_at, Cat.id),
+            owner_id=owner_id,
+            breed=breed,
+            born_after=born_after,
+            born_before=born_before,
+            name=name
+        )
+        if cursor:
+            created_at, cat_id = decode_cursor(cursor, datetime, UUID)
+            stmt = stmt.where(keyset_after((Cat.created_at, Cat.id), (created_at, cat_id)))
+        elif skip:
+            stmt = stmt.offset(skip)
+        # 多取一行用于判断是否存在下一页
+        result = await self.db.execute(stmt.limit(limit + 1))
+        cats, has_more = split_page(result.scalars(), limit)
+        return cats, next_cursor_for(cats, has_more, *CAT_ORDER_KEYS)
+
+    async def stream_cats(self, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncGenerator[Cat, None]:
+        """通过服务端游标逐行产出全部猫咪，内存占用与表大小无关"""
+        stmt = (
+            select(Cat)
+            .order_by(Cat.created_at, Cat.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream(stmt)
+        async for cat in result.scalars():
+            yield cat
+            # 已输出的对象不再需要保留在identity map中
+            self.db.expunge(cat)
+
+    async def get_cat_by_id(self, cat_id: UUID) -> Optional[Cat]:
+        result = await self.db.execute(select(Cat).where(Cat.id == cat_id))
+        return result.scalar_one_or_none()
+
+    async def get_cat(self, cat_id: UUID) -> Optional[CatResponse]:
+        """获取猫咪的响应数据，启用缓存时优先读缓存"""
+        cache_key = f"cat:{cat_id}"
+        if self.cache is not None:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return CatResponse.model_validate(cached)
+        # 只合并转换后的响应数据，get_cat_by_id 返回的ORM对象仍属于各自的会话
+        return await cat_flights.do((cat_id, "detail"), lambda: self._load_cat(cat_id, cache_key))
+
+    async def _load_cat(self, cat_id: UUID, cache_key: str) -> Optional[CatResponse]:
+        generation = cat_flights.generation(cat_id)
+        cat = await self.get_cat_by_id(cat_id)
+        if cat is None:
+            return None
+        data = CatResponse.model_validate(cat)
+        # 加载期间猫咪被修改时结果可能是旧数据，不写入缓存
+        if self.cache is not None and cat_flights.generation(cat_id) == generation:
+            await self.cache.set(cache_key, data.model_dump(mode="json"), [cat_tag(cat_id)])
+        return data
+
+    async def create_cat(self, cat_data: SchemaCatCreate) -> Cat:
+        cat_data_dict = cat_data.model_dump()
+        db_cat_data = {
+            'name': cat_data_dict['name'],
+            'breed': cat_data_dict['breed'],
+            'birth_date': cat_data_dict['birth_date'],
+            'owner_id': cat_data_dict['owner_id']
+        }
+        # 新建的猫咪没有照片，直接标记关系已加载，避免异步上下文中的懒加载
+        cat = DBCat(**db_cat_data, photo_records=[])
+        self.db.add(cat)
+        # 主键与时间戳在flush时由Python端默认值生成，提交后无需refresh
+        await self.db.commit()
+        return cat
+
+    async def update_cat(self, cat_id: UUID, cat_data: dict) -> Optional[Cat]:
+        """单条 UPDATE ... RETURNING 完成更新，猫咪不存在时返回None"""
+        values = {key: value for key, value in cat_data.items() if key in UPDATABLE_FIELDS}
+        if not values:
+            return await self.get_cat_by_id(cat_id)
+        stmt = (
+            update(Cat)
+            .where(Cat.id == cat_id)
+            .values(**values)
+            .returning(Cat)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.db.execute(stmt)
+        cat = result.scalar_one_or_none()
+        await self.db.commit()
+        await self._invalidate(cat_id)
+        return cat
+
+    async def delete_cat(self, cat_id: UUID) -> bool:
+        """单条 DELETE ... RETURNING id 完成删除，并回收不再被引用的照片对象"""
+        photos = await self.db.execute(
+            delete(DBCatPhoto).where(DBCatPhoto.cat_id == cat_id).returning(DBCatPhoto.blob_digest)
+        )
+        released = Counter(photos.scalars())
+        orphaned = await self._release_blobs(released)
+        result = await self.db.execute(
+            delete(Cat).where(Cat.id == cat_id).returning(Cat.id)
+        )
+        deleted_id = result.scalar_one_or_none()
+        await self.db.commit()
+        await self._invalidate(cat_id)
+        await self._remove_unreferenced(orphaned)
+        return deleted_id is not None
+
+    async def _retain_blob(
+        self,
+        stored: StoredPhoto,
+        restore: Optional[Callable[[], Awaitable[StoredPhoto]]] = None
+    ) -> None:
+        """登记照片对象，已存在时引用计数加一
+
+        upsert 会锁住该对象的记录直到提交，与 _remove_unreferenced 互斥。
+        文件在加锁前写入，期间可能已被删除对象的请求移除，加锁后再确认一次：
+        能重新写入时调用 restore，否则放弃本次上传。
+        """
+        stmt = dialect_insert(self.db, DBPhotoBlob).values(
+            digest=stored.key,
+            size=stored.size,
+            ref_count=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DBPhotoBlob.digest],
+            set_={"ref_count": DBPhotoBlob.ref_count + 1}
+        )
+        await self.db.execute(stmt)
+        if not await self.storage.exists(stored.key):
+            if restore is None:
+                raise FileNotFoundError(f"Photo object {stored.key} was removed concurrently")
+            await restore()
+
+    async def _new_photo(
+        self,
+        cat_id: UUID,
+        stored: StoredPhoto,
+        filename: Optional[str],
+        content_type: Optional[str],
+        restore: Optional[Callable[[], Awaitable[StoredPhoto]]] = None
+    ) -> DBCatPhoto:
+        """登记存储对象并创建引用它的照片记录"""
+        await self._retain_blob(stored, restore)
+        return DBCatPhoto(
+            cat_id=cat_id,
+            blob_digest=stored.key,
+            filename=filename,
+            content_type=content_type,
+            size=stored.size
+        )
+
+    def _schedule_thumbnails(self, background_tasks: Optional[BackgroundTasks], photos: List[DBCatPhoto]) -> None:
+        if background_tasks is not None:
+            background_tasks.add_task(
+                self.thumbnails.generate,
+                self.storage,
+                [photo.blob_digest for photo in photos]
+            )
+
+    async def _release_blobs(self, released: Counter) -> List[str]:
+        """按释放次数减少引用计数，删除计数归零的对象记录并返回其摘要"""
+        if not released:
+            return []
+        blobs = DBPhotoBlob.__table__
+        await self.db.execute(
+            update(blobs)
+            .where(blobs.c.digest == bindparam("b_digest"))
+            .values(ref_count=blobs.c.ref_count - bindparam("b_count")),
+            [{"b_digest": digest, "b_count": count} for digest, count in released.items()]
+        )
+        result = await self.db.execute(
+            delete(DBPhotoBlob)
+            .where(DBPhotoBlob.digest.in_(list(released)), DBPhotoBlob.ref_count <= 0)
+            .returning(DBPhotoBlob.digest)
+        )
+        return list(result.scalars())
+
+    async def _remove_unreferenced(self, digests: List[str]) -> None:
+        """删除没有被引用的存储文件
+
+        事务提交后逐个对象加锁再确认：以引用计数0的记录做 upsert，
+        记录不存在时也会占住这个主键，并等待尚未提交的并发上传（_retain_blob）。
+        确认无引用后在持有锁的情况下删除文件和占位记录，
+        之后的上传会发现文件已不存在并重新写入。
+        """
+        for digest in digests:
+            stmt = (
+                dialect_insert(self.db, DBPhotoBlob)
+                .values(digest=digest, size=0, ref_count=0)
+                .on_conflict_do_update(
+                    index_elements=[DBPhotoBlob.digest],
+                    set_={"ref_count": DBPhotoBlob.ref_count}
+                )
+                .returning(DBPhotoBlob.ref_count)
+            )
+            try:
+                ref_count = (await self.db.execute(stmt)).scalar_one()
+                if ref_count <= 0:
+                    await self.storage.delete(digest)
+                    await self.thumbnails.delete(self.storage, digest)
+                    await self.db.execute(
+                        delete(DBPhotoBlob).where(DBPhotoBlob.digest == digest, DBPhotoBlob.ref_count <= 0)
+                    )
+                await self.db.commit()
+            except BaseException:
+                await self.db.rollback()
+                raise
+
+    def _resave(self, file) -> Callable[[], Awaitable[StoredPhoto]]:
+        """重新写入已上传文件的内容，用于对象在登记前被并发删除的情况"""
+        async def restore() -> StoredPhoto:
+            await file.seek(0)
+            return await self.storage.save(file)
+        return restore
+
+    async def upload_photos(
+        self,
+        cat_id: UUID,
+        files: list,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Optional[dict]:
+        """上传猫咪照片，猫咪不存在时返回None
+
+        传入 background_tasks 时，在响应返回后为新照片生成缩略图。
+        """
+        cat = await self.get_cat_by_id(cat_id)
+        if not cat:
+            return None
+
+        created_keys = []
         try:
-            # 这里实现实际的照片上传逻辑
-            # 返回上传结果
-            return {
-                "cat_id": str(cat_id),
-                "file_count": len(files),
-                "filenames": [file.filename for file in files]
-            }
-        except OSError as e:
-            if "No space left on device" in str(e):
-                raise OSError("No space left on device") from e
+            photos = []
+            for file in files:
+                stored = await self.storage.save(file)
+                if stored.created:
+                    created_keys.append(stored.key)
+                photos.append(await self._new_photo(
+                    cat_id, stored, file.filename, file.content_type, restore=self._resave(file)
+                ))
+            cat.photo_records.extend(photos)
+            await self.db.commit()
+        except Exception as e:
+            # 数据库或存储失败时回滚，并删除本次新写入且未被引用的文件
+            await self.db.rollback()
+            await self._remove_unreferenced(created_keys)
+            if isinstance(e, OSError):
+                if e.errno == errno.ENOSPC or "No space left on device" in str(e):
+                    raise OSError("No space left on device") from e
             raise Exception("Storage service unavailable") from e
+
+        await self._invalidate(cat_id)
+        self._schedule_thumbnails(background_tasks, photos)
+        return {
+            "cat_id": str(cat_id),
+            "file_count": len(files),
+            "filenames": [file.filename for file in files],
+            "photos": [photo.url for photo in photos]
+        }
+
+    async def complete_upload(
+        self,
+        session: UploadSession,
+        uploads: UploadSessionManager,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Optional[dict]:
+        """完成分片上传并把照片挂到猫咪名下，猫咪不存在时返回None"""
+        cat = await self.get_cat_by_id(session.cat_id)
+        if not cat:
+            return None
+
+        stored = await uploads.finish(self.storage, session)
+        try:
+            photo = await self._new_photo(cat.id, stored, session.filename, session.content_type)
+            cat.photo_records.append(photo)
+            await self.db.commit()
         except Exception as e:
+            await self.db.rollback()
+            await self._remove_unreferenced([stored.key] if stored.created else [])
             raise Exception("Storage service unavailable") from e
+
+        await self._invalidate(cat.id)
+        self._schedule_thumbnails(background_tasks, [photo])
+        return {
+            "cat_id": str(cat.id),
+            "file_count": 1,
+            "filenames": [session.filename],
+            "photos": [photo.url]
+        }
+
+    async def get_photo(self, cat_id: UUID, photo_id: UUID) -> Optional[DBCatPhoto]:
+        result = await self.db.execute(
+            select(DBCatPhoto).where(DBCatPhoto.id == photo_id, DBCatPhoto.cat_id == cat_id)
+        )
+        return result.scalar_one_or_none()
@@ -0,0 +1,164 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from api.config import settings
+from api.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# 与 scripts/init_db.py 创建的 MongoDB 集合对应
+POSTS_CONTENT = "posts_content"
+COMMENTS_CONTENT = "comments_content"
+
+
+class ContentStore(ABC):
+    """帖子与评论正文的外置存储
+
+    超过 offload_threshold 个字符的正文整体写入外置存储，数据库中只保留摘要，
+    读取时每页按ID批量取回一次。文档以ID字符串为主键，写入是幂等的覆盖。
+    """
+
+    def __init__(
+        self,
+        offload_threshold: int = settings.CONTENT_OFFLOAD_THRESHOLD,
+        excerpt_length: int = settings.CONTENT_EXCERPT_LENGTH
+    ):
+        self.offload_threshold = offload_threshold
+        self.excerpt_length = excerpt_length
+        self.writes = 0
+        self.fetches = 0
+        self.fetched_docs = 0
+        self.missing = 0
+
+    def split(self, content: str) -> Tuple[str, Optional[str]]:
+        """返回 (写入数据库的内容, 需要外置的正文)，正文较短时不外置"""
+        if len(content) <= self.offload_threshold:
+            return content, None
+        return content[:self.excerpt_length].rstrip() + "…", content
+
+    async def put(self, collection: str, docs: Dict[UUID, str]) -> None:
+        if docs:
+            self.writes += len(docs)
+            await self._put(collection, {str(key): value for key, value in docs.items()})
+
+    async def get_many(self, collection: str, ids: Iterable[UUID]) -> Dict[UUID, str]:
+        """批量读取正文，缺失的文档不出现在结果中"""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        self.fetches += 1
+        found = await self._get_many(collection, [str(key) for key in ids])
+        self.fetched_docs += len(found)
+        if len(found) < len(ids):
+            self.missing += len(ids) - len(found)
+            logger.warning(f"{len(ids) - len(found)} documents missing from {collection}")
+        return {UUID(key): value for key, value in found.items()}
+
+    async def delete(self, collection: str, ids: Iterable[UUID]) -> None:
+        ids = [str(key) for key in ids]
+        if ids:
+            await self._delete(collection, ids)
+
+    @abstractmethod
+    async def _put(self, collection: str, docs: Dict[str, str]) -> None:
+        pass
+
+    @abstractmethod
+    async def _get_many(self, collection: str, ids: list) -> Dict[str, str]:
+        pass
+
+    @abstractmethod
+    async def _delete(self, collection: str, ids: list) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "writes": self.writes,
+            "fetches": self.fetches,
+            "fetched_docs": self.fetched_docs,
+            "missing": self.missing,
+        }
+
+
+class MemoryContentStore(ContentStore):
+    """进程内正文存储，用于开发与测试"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._collections: Dict[str, Dict[str, str]] = {}
+
+    async def _put(self, collection: str, docs: Dict[str, str]) -> None:
+        self._collections.setdefault(collection, {}).update(docs)
+
+    async def _get_many(self, collection: str, ids: list) -> Dict[str, str]:
+        docs = self._collections.get(collection, {})
+        return {key: docs[key] for key in ids if key in docs}
+
+    async def _delete(self, collection: str, ids: list) -> None:
+        docs = self._collections.get(collection, {})
+        for key in ids:
+            docs.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **super().stats()}
+
+
+class MongoContentStore(ContentStore):
+    """基于 MongoDB 的正文存储，文档结构为 {_id: ID字符串, content: 正文}"""
+
+    def __init__(self, uri: str = settings.MONGO_URI, database: str = settings.MONGO_DB, **kwargs):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        super().__init__(**kwargs)
+        self._client = AsyncIOMotorClient(uri)
+        self._db = self._client[database]
+
+    async def _put(self, collection: str, docs: Dict[str, str]) -> None:
+        from pymongo import ReplaceOne
+
+        await self._db[collection].bulk_write(
+            [ReplaceOne({"_id": key}, {"_id": key, "content": value}, upsert=True) for key, value in docs.items()],
+            ordered=False
+        )
+
+    async def _get_many(self, collection: str, ids: list) -> Dict[str, str]:
+        cursor = self._db[collection].find({"_id": {"$in": ids}})
+        return {doc["_id"]: doc["content"] async for doc in cursor}
+
+    async def _delete(self, collection: str, ids: list) -> None:
+        await self._db[collection].delete_many({"_id": {"$in": ids}})
+
+    def close(self) -> None:
+        self._client.close()
+
+    def stats(self) -> dict:
+        return {"backend": "mongo", **super().stats()}
+
+
+def build_content_store(backend: str = settings.CONTENT_STORE_BACKEND) -> Optional[ContentStore]:
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryContentStore()
+    if backend == "mongo":
+        return MongoContentStore()
+    raise ValueError(f"Unknown content store backend: {backend}")
+
+
+_store: Optional[ContentStore] = None
+
+
+def get_content_store() -> Optional[ContentStore]:
+    """获取正文外置存储（进程内单例），未启用时返回None，正文完整保存在数据库中"""
+    global _store
+    if settings.CONTENT_STORE_BACKEND == "none":
+        return None
+    if _store is None:
+        _store = build_content_store()
+        register_metrics("content_store", lambda: _store.stats())
+    return _store
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.cache import ResponseCache, get_cache, post_tag
+from api.config import settings
+from api.metrics import register_metrics
+from api.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+
+class LikeCounterBuffer:
+    """点赞计数的写后缓冲
+
+    点赞记录本身仍然同步写入 post_likes，只有 posts.likes 计数的增量暂存在内存中，
+    按固定间隔合并成每个帖子一条 UPDATE。热门帖子的大量点赞不会在同一行锁上排队，
+    代价是计数最多延迟一个刷新间隔，进程异常退出时未刷新的增量需要重新统计。
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        flush_interval: float = settings.LIKE_FLUSH_INTERVAL,
+        cache: Optional[ResponseCache] = None
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.cache = cache or get_cache()
+        self._pending: Counter = Counter()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.buffered = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failures = 0
+
+    def add(self, post_id: UUID, delta: int) -> None:
+        self._pending[post_id] += delta
+        self.buffered += 1
+
+    def pending(self, post_id: UUID) -> int:
+        """尚未写入数据库的增量"""
+        return self._pending.get(post_id, 0)
+
+    async def flush(self) -> int:
+        """把累积的增量写入数据库，返回更新的帖子数"""
+        async with self._flush_lock:
+            pending = {post_id: delta for post_id, delta in self._pending.items() if delta}
+            self._pending = Counter()
+            if not pending:
+                return 0
+            posts = Post.__table__
+            try:
+                async with self.session_factory() as session:
+                    await session.execute(
+                        update(posts)
+                        .where(posts.c.id == bindparam("p_id"))
+                        .values(likes=posts.c.likes + bindparam("p_delta")),
+                        [{"p_id": post_id, "p_delta": delta} for post_id, delta in pending.items()]
+                    )
+                    await session.commit()
+            except Exception:
+                # 写入失败时把增量放回，等待下一次刷新
+                self._pending.update(pending)
+                self.failures += 1
+                raise
+            await self._invalidate(pending)
+            self.flushes += 1
+            self.flushed_rows += len(pending)
+            return len(pending)
+
+    async def _invalidate(self, post_ids) -> None:
+        """计数写入后清除这些帖子的缓存，并让新请求不再加入写入前开始的加载"""
+        from api.services.post_service import post_flights
+
+        for post_id in post_ids:
+            post_flights.forget(post_id)
+        if self.cache is not None:
+            await self.cache.invalidate(*(post_tag(post_id) for post_id in post_ids))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush like counters")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止定时刷新并写入剩余增量"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending_posts": len(self._pending),
+            "buffered": self.buffered,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failures": self.failures,
+        }
+
+
+_buffer: Optional[LikeCounterBuffer] = None
+
+
+def get_like_buffer() -> Optional[LikeCounterBuffer]:
+    """获取点赞计数缓冲（进程内单例），未启用时返回None，计数直接写库"""
+    global _buffer
+    if not settings.LIKE_BUFFER_ENABLED:
+        return None
+    if _buffer is None:
+        from api.database import AsyncSessionLocal
+        _buffer = LikeCounterBuffer(AsyncSessionLocal)
+        register_metrics("like_buffer", lambda: _buffer.stats())
+    return _buffer
@@ -0,0 +1,176 @@
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from uuid import uuid4
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from api.config import settings
+
+
+@dataclass
+class StoredPhoto:
+    key: str
+    size: int
+    # 本次上传是否新写入了对象；内容已存在时为False
+    created: bool = True
+
+
+class PhotoStorage(ABC):
+    """照片存储后端接口"""
+
+    @abstractmethod
+    async def save(self, file: UploadFile) -> StoredPhoto:
+        """流式保存上传文件，以内容的SHA-256摘要作为存储键"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """删除存储对象，对象不存在时忽略"""
+
+    @abstractmethod
+    async def append_upload(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes], hasher) -> int:
+        """从 offset 处追加分片上传的数据，同时更新 hasher，返回写入的字节数
+
+        offset 之后的残留数据（上次中断的分片）会先被截断。
+        """
+
+    @abstractmethod
+    async def finish_upload(self, upload_id: str, key: str, size: int) -> StoredPhoto:
+        """将分片上传的数据直接转为存储对象，无需重新读取"""
+
+    @abstractmethod
+    async def abort_upload(self, upload_id: str) -> None:
+        """丢弃分片上传的数据，不存在时忽略"""
+
+    def local_path(self, key: str) -> Optional[str]:
+        """返回对象在本地磁盘上的路径，非本地后端返回None"""
+        return None
+
+    async def exists(self, key: str) -> bool:
+        """对象是否存在，非本地后端默认视为存在"""
+        path = self.local_path(key)
+        return path is None or await run_in_threadpool(os.path.exists, path)
+
+
+class LocalPhotoStorage(PhotoStorage):
+    """本地文件系统存储
+
+    上传文件按固定大小的块读取并写入临时文件，写入的同时计算SHA-256，
+    写完后以摘要为名原子重命名到最终位置。相同内容只保留一份，
+    单个请求的内存占用与文件大小无关。
+    """
+
+    def __init__(self, root: str, chunk_size: int = settings.PHOTO_CHUNK_SIZE):
+        self.root = os.path.abspath(root)
+        self.chunk_size = chunk_size
+
+    def _path(self, key: str) -> str:
+        # 按前两位分目录，避免单个目录下文件过多
+        return os.path.join(self.root, key[:2], key)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    def _open_temp(self):
+        tmp_dir = os.path.join(self.root, ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, uuid4().hex)
+        return tmp_path, open(tmp_path, "wb")
+
+    @staticmethod
+    def _discard(fh, tmp_path: str) -> None:
+        fh.close()
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    def _commit(self, fh, tmp_path: str, final_path: str) -> bool:
+        fh.close()
+        return self._move_into_place(tmp_path, final_path)
+
+    @staticmethod
+    def _move_into_place(tmp_path: str, final_path: str) -> bool:
+        """将临时文件移动到最终位置，目标已存在时丢弃临时文件并返回False"""
+        if os.path.exists(final_path):
+            os.unlink(tmp_path)
+            return False
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+        return True
+
+    async def save(self, file: UploadFile) -> StoredPhoto:
+        digest = hashlib.sha256()
+        tmp_path, fh = await run_in_threadpool(self._open_temp)
+        size = 0
+        try:
+            while True:
+                chunk = await file.read(self.chunk_size)
+                if not chunk:
+                    break
+                await run_in_threadpool(fh.write, chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            key = digest.hexdigest()
+            created = await run_in_threadpool(self._commit, fh, tmp_path, self._path(key))
+        except BaseException:
+            await run_in_threadpool(self._discard, fh, tmp_path)
+            raise
+        return StoredPhoto(key=key, size=size, created=created)
+
+    async def delete(self, key: str) -> None:
+        path = self._path(key)
+        try:
+            await run_in_threadpool(os.unlink, path)
+        except FileNotFoundError:
+            pass
+
+    def _upload_path(self, upload_id: str) -> str:
+        return os.path.join(self.root, ".uploads", upload_id)
+
+    def _open_upload(self, upload_id: str, offset: int):
+        path = self._upload_path(upload_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fh = open(path, "r+b" if os.path.exists(path) else "w+b")
+        fh.truncate(offset)
+        fh.seek(offset)
+        return fh
+
+    async def append_upload(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes], hasher) -> int:
+        fh = await run_in_threadpool(self._open_upload, upload_id, offset)
+        written = 0
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                await run_in_threadpool(fh.write, chunk)
+                hasher.update(chunk)
+                written += len(chunk)
+        finally:
+            await run_in_threadpool(fh.close)
+        return written
+
+    async def finish_upload(self, upload_id: str, key: str, size: int) -> StoredPhoto:
+        path = self._upload_path(upload_id)
+        # 截掉最后一个失败分片可能残留的数据
+        await run_in_threadpool(os.truncate, path, size)
+        created = await run_in_threadpool(self._move_into_place, path, self._path(key))
+        return StoredPhoto(key=key, size=size, created=created)
+
+    async def abort_upload(self, upload_id: str) -> None:
+        try:
+            await run_in_threadpool(os.unlink, self._upload_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+
+_storage: Optional[PhotoStorage] = None
+
+
+def get_photo_storage() -> PhotoStorage:
+    """获取配置的照片存储后端（进程内单例）"""
+    global _storage
+    if _storage is None:
+        _storage = LocalPhotoStorage(settings.PHOTO_STORAGE_DIR)
+    return _storage
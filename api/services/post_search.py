@@ -0,0 +1,240 @@
+import html
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import column, func, literal_column, select, table, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models.post import SEARCH_TS_CONFIG, Comment, Post
+from api.pagination import decode_cursor, encode_cursor, keyset_after, split_page
+
+# 评论命中对帖子排名的权重，低于标题和正文命中
+COMMENT_RANK_WEIGHT = 0.5
+
+# 数据库生成高亮时使用的占位标记，转义HTML后再替换为 <mark>
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+
+SearchRow = Tuple[Post, float]
+
+
+def render_highlight(text: Optional[str]) -> Optional[str]:
+    """转义数据库返回的高亮文本，只保留 <mark> 标签"""
+    if text is None:
+        return None
+    escaped = html.escape(text)
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+class PostSearch(ABC):
+    """帖子与评论的全文检索
+
+    帖子命中与评论命中合并后按帖子取最高分，以 (rank, id) 倒序做键集分页；
+    高亮只对当前页的帖子计算。具体的匹配、打分与高亮由各数据库后端实现。
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @abstractmethod
+    def _prepare_query(self, q: str) -> Optional[Any]:
+        """把用户输入转换为检索条件，没有可检索内容时返回None"""
+
+    @abstractmethod
+    def _post_hits(self, query):
+        """帖子标题与正文的命中，返回 (post_id, rank) 查询"""
+
+    @abstractmethod
+    def _comment_hits(self, query):
+        """评论的命中，返回 (post_id, rank) 查询"""
+
+    @abstractmethod
+    async def _highlights(self, query, post_ids: List[Any]) -> Dict[Any, Dict[str, Optional[str]]]:
+        """当前页帖子的标题、正文与最佳评论高亮"""
+
+    async def search(
+        self,
+        q: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        options: Optional[list] = None
+    ) -> Tuple[List[SearchRow], Dict[Any, Dict[str, Optional[str]]], Optional[str]]:
+        """返回当前页的 (帖子, 得分)、按帖子ID索引的高亮字段与下一页游标"""
+        query = self._prepare_query(q)
+        if query is None:
+            return [], {}, None
+        hits = union_all(self._post_hits(query), self._comment_hits(query)).subquery("hits")
+        ranked = (
+            select(hits.c.post_id, func.max(hits.c.rank).label("rank"))
+            .group_by(hits.c.post_id)
+            .subquery("ranked")
+        )
+        stmt = (
+            select(Post, ranked.c.rank)
+            .join(ranked, ranked.c.post_id == Post.id)
+            .options(*(options or []))
+            .order_by(ranked.c.rank.desc(), Post.id.desc())
+        )
+        if cursor:
+            values = decode_cursor(cursor, float, UUID)
+            stmt = stmt.where(keyset_after((ranked.c.rank, Post.id), values, descending=True))
+        result = await self.db.execute(stmt.limit(limit + 1))
+        rows, has_more = split_page([(post, float(rank)) for post, rank in result.all()], limit)
+        next_cursor = None
+        if has_more and rows:
+            last_post, last_rank = rows[-1]
+            next_cursor = encode_cursor(last_rank, last_post.id)
+        highlights = await self._highlights(query, [post.id for post, _ in rows]) if rows else {}
+        return rows, highlights, next_cursor
+
+    @staticmethod
+    def _best_comments(rows) -> Dict[Any, str]:
+        """rows 已按得分倒序，每个帖子取第一条评论片段"""
+        best: Dict[Any, str] = {}
+        for post_id, fragment in rows:
+            best.setdefault(post_id, fragment)
+        return best
+
+
+class PostgresPostSearch(PostSearch):
+    """基于 search_vector 生成列与GIN索引的检索
+
+    查询语法同 websearch_to_tsquery：支持引号短语、OR 与 -排除，任意输入都不会报错。
+    """
+
+    _posts_vector = literal_column("posts.search_vector")
+    _comments_vector = literal_column("comments.search_vector")
+    _headline_options = f"StartSel={_MARK_START}, StopSel={_MARK_END}"
+
+    def _prepare_query(self, q: str):
+        if not q.strip():
+            return None
+        return func.websearch_to_tsquery(literal_column(f"'{SEARCH_TS_CONFIG}'::regconfig"), q)
+
+    def _post_hits(self, query):
+        return (
+            select(Post.id.label("post_id"), func.ts_rank(self._posts_vector, query).label("rank"))
+            .where(self._posts_vector.op("@@")(query))
+        )
+
+    def _comment_hits(self, query):
+        return (
+            select(
+                Comment.post_id.label("post_id"),
+                (func.ts_rank(self._comments_vector, query) * COMMENT_RANK_WEIGHT).label("rank")
+            )
+            .where(self._comments_vector.op("@@")(query))
+        )
+
+    def _headline(self, text_column, query, options: str):
+        config = literal_column(f"'{SEARCH_TS_CONFIG}'::regconfig")
+        return func.ts_headline(config, text_column, query, f"{self._headline_options}, {options}")
+
+    async def _highlights(self, query, post_ids):
+        highlights = {post_id: {} for post_id in post_ids}
+        result = await self.db.execute(
+            select(
+                Post.id,
+                self._headline(Post.title, query, "HighlightAll=true"),
+                self._headline(Post.content, query, "MaxFragments=2, MaxWords=30, MinWords=10"),
+            )
+            .where(Post.id.in_(post_ids), self._posts_vector.op("@@")(query))
+        )
+        for post_id, title, content in result.all():
+            highlights[post_id] = {"title_highlight": title, "content_highlight": content}
+        result = await self.db.execute(
+            select(Comment.post_id, self._headline(Comment.content, query, "MaxWords=30, MinWords=10"))
+            .where(Comment.post_id.in_(post_ids), self._comments_vector.op("@@")(query))
+            .order_by(func.ts_rank(self._comments_vector, query).desc(), Comment.id)
+        )
+        for post_id, fragment in self._best_comments(result.all()).items():
+            highlights[post_id]["comment_highlight"] = fragment
+        return highlights
+
+
+class SqlitePostSearch(PostSearch):
+    """基于 FTS5 外部内容表的检索，用于本地开发与测试
+
+    输入按单词拆分后逐个加引号，避免 FTS5 查询语法错误，多个词之间为 AND。
+    """
+
+    _posts_fts = table("posts_fts", column("rowid"))
+    _comments_fts = table("comments_fts", column("rowid"))
+    # bm25 越小越相关，取负数与 PostgreSQL 的 ts_rank 方向一致；标题权重高于正文
+    _post_weights = (2.0, 1.0)
+
+    def _prepare_query(self, q: str):
+        tokens = re.findall(r"\w+", q)
+        if not tokens:
+            return None
+        return " ".join(f'"{token}"' for token in tokens)
+
+    @staticmethod
+    def _match(fts, query):
+        return literal_column(fts.name).op("MATCH")(query)
+
+    def _posts_join(self):
+        return self._posts_fts.join(Post.__table__, literal_column("posts.rowid") == self._posts_fts.c.rowid)
+
+    def _comments_join(self):
+        return self._comments_fts.join(
+            Comment.__table__, literal_column("comments.rowid") == self._comments_fts.c.rowid
+        )
+
+    def _post_rank(self):
+        return -func.bm25(literal_column("posts_fts"), *self._post_weights)
+
+    def _comment_rank(self):
+        return -func.bm25(literal_column("comments_fts"))
+
+    def _post_hits(self, query):
+        return (
+            select(Post.id.label("post_id"), self._post_rank().label("rank"))
+            .select_from(self._posts_join())
+            .where(self._match(self._posts_fts, query))
+        )
+
+    def _comment_hits(self, query):
+        return (
+            select(Comment.post_id.label("post_id"), (self._comment_rank() * COMMENT_RANK_WEIGHT).label("rank"))
+            .select_from(self._comments_join())
+            .where(self._match(self._comments_fts, query))
+        )
+
+    async def _highlights(self, query, post_ids):
+        highlights = {post_id: {} for post_id in post_ids}
+        result = await self.db.execute(
+            select(
+                Post.id,
+                func.highlight(literal_column("posts_fts"), 0, _MARK_START, _MARK_END),
+                func.snippet(literal_column("posts_fts"), 1, _MARK_START, _MARK_END, "…", 32),
+            )
+            .select_from(self._posts_join())
+            .where(self._match(self._posts_fts, query), Post.id.in_(post_ids))
+        )
+        for post_id, title, content in result.all():
+            highlights[post_id] = {"title_highlight": title, "content_highlight": content}
+        result = await self.db.execute(
+            select(
+                Comment.post_id,
+                func.snippet(literal_column("comments_fts"), 0, _MARK_START, _MARK_END, "…", 32),
+            )
+            .select_from(self._comments_join())
+            .where(self._match(self._comments_fts, query), Comment.post_id.in_(post_ids))
+            .order_by(self._comment_rank().desc(), Comment.id)
+        )
+        for post_id, fragment in self._best_comments(result.all()).items():
+            highlights[post_id]["comment_highlight"] = fragment
+        return highlights
+
+
+def post_search_for(db: AsyncSession) -> PostSearch:
+    """按会话绑定的数据库选择检索后端"""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        return PostgresPostSearch(db)
+    if dialect == "sqlite":
+        return SqlitePostSearch(db)
+    raise ValueError(f"Full-text search is not supported on {dialect}")
@@ -1,50 +1,104 @@
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 from uuid import UUID
 import logging
-from sqlalchemy import Column
+from datetime import datetime
+from uuid import uuid4
+from sqlalchemy import Column, delete, func, or_, update
+from sqlalchemy.orm import joinedload, load_only, raiseload, selectinload
 
-from api.models.post import Post, Comment
-from api.schemas.post import PostCreate, PostUpdate, CommentCreate, Post as PostSchema, Comment as CommentSchema
-from api.models.user import DBUser
+from api.models.post import Post, Comment, PostLike
+from api.models.user_model import DBUser
+from api.schemas.post import (
+    PostCreate, PostUpdate, CommentCreate, Post as PostSchema, PostDetail, PostLikeStatus,
+    PostSearchResult, Comment as CommentSchema
+)
+from api.principals import Principal
+from api.exceptions import BadRequestException
+from api.cache import ResponseCache, get_cache, post_tag
+from api.database import dialect_insert, get_db
+from api.services.content_store import COMMENTS_CONTENT, POSTS_CONTENT, ContentStore, get_content_store
+from api.services.like_buffer import LikeCounterBuffer, get_like_buffer
+from api.services.post_search import post_search_for, render_highlight
+from api.metrics import register_metrics
+from api.singleflight import SingleFlight
+from api.pagination import decode_cursor, encode_cursor, keyset_after, next_cursor_for, split_page
 
 logger = logging.getLogger(__name__)
 
+# 帖子列表支持的排序方式及其键集分页键，与 posts 表上的复合索引对应
+POST_SORT_KEYS = {
+    "new": ("created_at", "id"),
+    "top": ("likes", "id"),
+    "active": ("last_activity_at", "id"),
+    "comments": ("comment_count", "id"),
+}
+
+# 评论列表的稳定排序键，与 ix_comments_*_created_at_id 索引对应
+COMMENT_ORDER_KEYS = ("created_at", "id")
+
+# 帖子与评论响应中作者信息需要的列
+AUTHOR_COLUMNS = (
+    DBUser.id, DBUser.username, DBUser.email, DBUser.full_name, DBUser.disabled, DBUser.is_admin
+)
+# Post 响应需要的列，新增的大字段不会被列表查询顺带读取
+POST_COLUMNS = (
+    Post.id, Post.title, Post.content, Post.content_external, Post.content_key, Post.author_id, Post.created_at, Post.updated_at, Post.likes,
+    Post.comment_count, Post.last_activity_at
+)
+
+
+def post_load_options(include_comments: bool = False) -> list:
+    """帖子查询的加载选项
+
+    作者是多对一关系，用JOIN一并取回，结果行数与帖子数相同；
+    评论只在详情需要时通过 selectin 额外查询一次，其余关系访问时直接报错。
+    """
+    options = [
+        load_only(*POST_COLUMNS),
+        joinedload(Post.author).load_only(*AUTHOR_COLUMNS),
+    ]
+    if include_comments:
+        options.append(
+            selectinload(Post.comments).options(
+                joinedload(Comment.author).load_only(*AUTHOR_COLUMNS),
+                raiseload("*"),
+            )
+        )
+    options.append(raiseload("*"))
+    return options
+
+
+def comment_load_options() -> list:
+    return [joinedload(Comment.author).load_only(*AUTHOR_COLUMNS), raiseload("*")]
+
+
+# 帖子详情与评论列表的并发读取合并，键的第一个元素为帖子ID
+post_flights = SingleFlight()
+register_metrics("post_singleflight", lambda: post_flights.stats())
+
 class PostService:
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        like_buffer: Optional[LikeCounterBuffer] = None,
+        content_store: Optional[ContentStore] = None,
+        cache: Optional[ResponseCache] = None
+    ):
         self.db = db
+        self.like_buffer = like_buffer
+        self.content_store = content_store
+        self.cache = cache or get_cache()
 
-    async def _check_permission(self, resource_author_id: Union[UUID, str], user_id: Union[UUID, str]):
-        """检查用户是否有操作权限"""
-        try:
-            user_uuid = UUID(str(user_id)) if user_id else None
-            if not user_uuid:
-                logger.warning("No user UUID provided")
-                return False
-        except ValueError:
-            logger.warning(f"Invalid UUID format: {user_id}")
-            return False
-            
-        try:
-            # 直接从数据库获取用户信息
-            stmt = select(DBUser).where(DBUser.id == user_uuid)
-            result = await self.db.execute(stmt)
-            db_user = result.scalar_one_or_none()
-            
-            if not db_user:
-                logger.warning(f"User not found: {user_uuid}")
-                return False
-                
-            # 显式转换为 Python 布尔值 - 确保正确处理默认值
-            is_admin = db_user.is_admin if db_user.is_admin is not None else False
-            logger.info(f"User {db_user.username} (ID: {db_user.id}) is_admin: {is_admin}")
-        except Exception as e:
-            logger.error(f"Error fetching user: {e}")
+    def _check_permission(self, resource_author_id: Union[UUID, str], principal: Optional[Principal]) -> bool:
+        """检查当前用户是否有操作权限：管理员或资源作者
+
+        principal 来自认证依赖，权限判断不再查询数据库。
+        """
+        if principal is None:
             return False
-            
-        # 处理resource_author_id
         author_uuid = None
         if isinstance(resource_author_id, UUID):
             author_uuid = resource_author_id
@@ -53,89 +107,201 @@ class PostService:
                 author_uuid = UUID(str(resource_author_id))
             except ValueError:
                 pass
-                
+
         # 确保资源有作者
         if not author_uuid:
-            logger.warning(f"Resource has no author")
+            logger.warning("Resource has no author")
             return False
-            
-        # 检查用户是否是管理员 - 管理员有所有权限
-        if is_admin is True:
-            logger.info(f"Admin access granted for user {user_uuid}")
+
+        # 管理员有所有权限
+        if principal.is_admin:
             return True
-            
-        # 检查用户是否是资源所有者
-        logger.info(f"Comparing author_uuid: {str(author_uuid)} with db_user.id: {str(db_user.id)}")
-        if str(author_uuid) == str(db_user.id):  # 比较字符串形式的ID
-            logger.info(f"Owner access granted for user {db_user.id}")
+
+        # 比较字符串形式的ID
+        if str(author_uuid) == str(principal.id):
             return True
-            
-        logger.warning(f"Permission denied for user {user_uuid} on resource by {author_uuid}")
-        logger.warning(f"User is_admin: {db_user.is_admin}")
+
+        logger.warning(f"Permission denied for user {principal.id} on resource by {author_uuid}")
         return False
 
     async def create_post(self, post_data: PostCreate, author_id: Union[UUID, str]) -> PostSchema:
         """创建新帖子"""
         author_uuid = UUID(author_id) if isinstance(author_id, str) else author_id
-        post = Post(**post_data.model_dump(), author_id=author_uuid)
+        fields = post_data.model_dump()
+        post_uuid = uuid4()
+        fields.update(await self._offload(POSTS_CONTENT, post_uuid, fields["content"]))
+        post = Post(**fields, id=post_uuid, author_id=author_uuid)
         self.db.add(post)
         await self.db.commit()
-        await self.db.refresh(post)
-        
-        # 确保所有UUID字段被正确转换
-        post_dict = {
+        return await self.get_post(post.id)
+
+    async def _offload(self, collection: str, row_id: UUID, content: str) -> dict:
+        """按正文长度决定是否外置，返回写入数据库的 content 与 content_external
+
+        外置正文以 row_id 为文档ID，在执行任何写操作之前写入，外部存储的网络往返期间不持有行锁。
+        row_id 必须是尚未被任何行引用的新ID：新建时为行ID，修改帖子正文时为新的 content_key，
+        这样提交失败只会留下无人引用的文档，不会覆盖数据库当前指向的正文。
+        """
+        body = None
+        if self.content_store is not None:
+            content, body = self.content_store.split(content)
+            if body is not None:
+                await self.content_store.put(collection, {row_id: body})
+        return {"content": content, "content_external": body is not None}
+
+    @staticmethod
+    def _body_key(row) -> UUID:
+        """外置正文的文档ID，评论与未修改过正文的帖子使用行ID"""
+        return getattr(row, "content_key", None) or row.id
+
+    async def _fetch_bodies(self, collection: str, rows) -> dict:
+        """一次批量取回当前页外置的正文，返回 {ID: 正文}"""
+        keys = {self._body_key(row): row.id for row in rows if row.content_external}
+        if not keys or self.content_store is None:
+            return {}
+        bodies = await self.content_store.get_many(collection, keys)
+        return {keys[key]: body for key, body in bodies.items()}
+
+    async def _invalidate(self, post_id: UUID) -> None:
+        """帖子、评论或点赞变化后清除该帖子的详情与评论列表缓存"""
+        post_flights.forget(post_id)
+        if self.cache is not None:
+            await self.cache.invalidate(post_tag(post_id))
+
+    async def _discard_bodies(self, collection: str, ids) -> None:
+        """数据库提交后删除不再引用的外置正文"""
+        if ids and self.content_store is not None:
+            await self.content_store.delete(collection, ids)
+
+    @staticmethod
+    def _comment_to_schema(comment: Comment, content: Optional[str] = None) -> CommentSchema:
+        return CommentSchema.model_validate({
+            'id': str(comment.id),
+            'content': content or comment.content,
+            'author_id': str(comment.author_id),
+            'post_id': str(comment.post_id),
+            'parent_id': comment.parent_id,
+            'created_at': comment.created_at,
+            'author': comment.author
+        })
+
+    @staticmethod
+    def _to_schema(post: Post, content: Optional[str] = None) -> PostSchema:
+        return PostSchema.model_validate({
             'id': str(post.id),
             'title': post.title,
-            'content': post.content,
+            'content': content or post.content,
             'author_id': str(post.author_id),
             'created_at': post.created_at,
             'updated_at': post.updated_at,
             'likes': post.likes,
+            'comment_count': post.comment_count,
+            'last_activity_at': post.last_activity_at,
             'author': post.author
-        }
-        return PostSchema.model_validate(post_dict)
+        })
 
-    async def get_posts(self) -> List[PostSchema]:
-        """获取所有帖子"""
-        result = await self.db.execute(select(Post))
-        posts = result.unique().scalars().all()
-        
-        result = []
-        for post in posts:
-            post_dict = {
-                'id': str(post.id),
-                'title': post.title,
-                'content': post.content,
-                'author_id': str(post.author_id),
-                'created_at': post.created_at,
-                'updated_at': post.updated_at,
-                'likes': post.likes,
-                'author': post.author
-            }
-            result.append(PostSchema.model_validate(post_dict))
-        return result
-
-    async def get_post(self, post_id: Union[UUID, str]) -> Optional[PostSchema]:
-        """获取单个帖子"""
+    async def get_posts_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        sort: str = "new"
+    ) -> Tuple[List[PostSchema], Optional[str]]:
+        """分页获取帖子列表
+
+        sort=new/top/active/comments 分别按发布时间、点赞数、最后活跃时间、
+        评论数倒序，均以 id 作为次序键做键集分页；游标中记录了排序方式，换用其他排序时返回400。
+        """
+        order_keys = POST_SORT_KEYS[sort]
+        columns = [getattr(Post, key) for key in order_keys]
+        stmt = (
+            select(Post)
+            .options(*post_load_options())
+            .order_by(*(column.desc() for column in columns))
+        )
+        if cursor:
+            cursor_sort, *values = decode_cursor(
+                cursor, str, *(column.type.python_type for column in columns)
+            )
+            if cursor_sort != sort:
+                raise BadRequestException("Cursor does not match sort order")
+            stmt = stmt.where(keyset_after(columns, values, descending=True))
+        # 多取一行用于判断是否存在下一页
+        result = await self.db.execute(stmt.limit(limit + 1))
+        posts, has_more = split_page(result.scalars(), limit)
+        next_cursor = None
+        if has_more and posts:
+            last = posts[-1]
+            next_cursor = encode_cursor(sort, *(getattr(last, key) for key in order_keys))
+        bodies = await self._fetch_bodies(POSTS_CONTENT, posts)
+        return [self._to_schema(post, bodies.get(post.id)) for post in posts], next_cursor
+
+    async def search_posts(
+        self,
+        q: str,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[PostSearchResult], Optional[str]]:
+        """全文检索帖子标题、正文与评论，按相关度倒序分页"""
+        rows, highlights, next_cursor = await post_search_for(self.db).search(
+            q, limit=limit, cursor=cursor, options=post_load_options()
+        )
+        bodies = await self._fetch_bodies(POSTS_CONTENT, [post for post, _ in rows])
+        results = []
+        for post, rank in rows:
+            fields = highlights.get(post.id, {})
+            results.append(PostSearchResult.model_validate({
+                **self._to_schema(post, bodies.get(post.id)).model_dump(),
+                'rank': rank,
+                'title_highlight': render_highlight(fields.get('title_highlight')),
+                'content_highlight': render_highlight(fields.get('content_highlight')),
+                'comment_highlight': render_highlight(fields.get('comment_highlight')),
+            }))
+        return results, next_cursor
+
+    async def get_post(
+        self,
+        post_id: Union[UUID, str],
+        include_comments: bool = False
+    ) -> Optional[PostDetail]:
+        """获取单个帖子，include_comments 时同时返回全部评论"""
         post_uuid = UUID(post_id) if isinstance(post_id, str) else post_id
-        result = await self.db.execute(select(Post).where(Post.id == post_uuid))
-        post = result.unique().scalar_one_or_none()
+        cache_key = f"post:{post_uuid}:comments={int(include_comments)}"
+        if self.cache is not None:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return PostDetail.model_validate(cached)
+        # 缓存未命中时，同一帖子的并发请求共用一次查询与转换
+        return await post_flights.do(
+            (post_uuid, "detail", include_comments),
+            lambda: self._load_post(post_uuid, include_comments, cache_key)
+        )
+
+    async def _load_post(self, post_uuid: UUID, include_comments: bool, cache_key: str) -> Optional[PostDetail]:
+        generation = post_flights.generation(post_uuid)
+        result = await self.db.execute(
+            select(Post)
+            .options(*post_load_options(include_comments))
+            .where(Post.id == post_uuid)
+            # 同一会话中已有该帖子时，按本次的加载选项刷新
+            .execution_options(populate_existing=True)
+        )
+        post = result.scalar_one_or_none()
         if not post:
             return None
-            
-        post_dict = {
-            'id': str(post.id),
-            'title': post.title,
-            'content': post.content,
-            'author_id': str(post.author_id),
-            'created_at': post.created_at,
-            'updated_at': post.updated_at,
-            'likes': post.likes,
-            'author': post.author
-        }
-        return PostSchema.model_validate(post_dict)
+        bodies = await self._fetch_bodies(POSTS_CONTENT, [post])
+        detail = PostDetail.model_validate(self._to_schema(post, bodies.get(post.id)).model_dump())
+        if include_comments:
+            comments = sorted(post.comments, key=lambda c: (c.created_at, c.id))
+            comment_bodies = await self._fetch_bodies(COMMENTS_CONTENT, comments)
+            detail.comments = [
+                self._comment_to_schema(comment, comment_bodies.get(comment.id)) for comment in comments
+            ]
+        # 加载期间帖子被修改时结果可能是旧数据，不写入缓存
+        if self.cache is not None and post_flights.generation(post_uuid) == generation:
+            await self.cache.set(cache_key, detail.model_dump(mode="json"), [post_tag(post_uuid)])
+        return detail
 
-    async def update_post(self, post_id: Union[UUID, str], post_data: PostUpdate, user_id: Union[UUID, str]) -> PostSchema:
+    async def update_post(self, post_id: Union[UUID, str], post_data: PostUpdate, principal: Principal) -> PostSchema:
         """更新帖子"""
         post_uuid = UUID(post_id) if isinstance(post_id, str) else post_id
         db_post = await self.db.get(Post, post_uuid)
@@ -149,21 +315,39 @@ class PostService:
         author_id = db_post.author_id
         if isinstance(author_id, Column):
             author_id = author_id.value
-        has_permission = await self._check_permission(author_id, user_id)
+        has_permission = self._check_permission(author_id, principal)
         if has_permission is False:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="没有权限操作该资源"
             )
             
-        for key, value in post_data.model_dump(exclude_unset=True).items():
+        fields = post_data.model_dump(exclude_unset=True)
+        old_key = self._body_key(db_post) if db_post.content_external else None
+        new_key = None
+        # 上面只有普通读取，UPDATE 在提交时才执行，外置写入期间不持有行锁；
+        # 新正文写入新文档，与 content_key 一起在同一事务中切换，不修改当前引用的文档
+        if "content" in fields:
+            new_key = uuid4()
+            fields.update(await self._offload(POSTS_CONTENT, new_key, fields["content"]))
+            fields["content_key"] = new_key if fields["content_external"] else None
+        for key, value in fields.items():
             setattr(db_post, key, value)
-            
-        await self.db.commit()
-        await self.db.refresh(db_post)
-        return PostSchema.model_validate(db_post)
 
-    async def delete_post(self, post_id: Union[UUID, str], user_id: Union[UUID, str]) -> None:
+        try:
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            if new_key is not None and fields["content_external"]:
+                await self._discard_bodies(POSTS_CONTENT, [new_key])
+            raise
+        await self._invalidate(post_uuid)
+        # 并发修改时被覆盖的一方的新文档会成为无人引用的文档，不影响读取
+        if old_key is not None and new_key is not None:
+            await self._discard_bodies(POSTS_CONTENT, [old_key])
+        return await self.get_post(post_uuid)
+
+    async def delete_post(self, post_id: Union[UUID, str], principal: Principal) -> None:
         """删除帖子"""
         post_uuid = UUID(post_id) if isinstance(post_id, str) else post_id
         db_post = await self.db.get(Post, post_uuid)
@@ -177,65 +361,203 @@ class PostService:
         author_id = db_post.author_id
         if isinstance(author_id, Column):
             author_id = author_id.value
-        has_permission = await self._check_permission(author_id, user_id)
+        has_permission = self._check_permission(author_id, principal)
         if has_permission is False:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="没有权限操作该资源"
             )
             
-        await self.db.delete(db_post)
+        # 直接按条件删除，不把评论逐条加载到会话中
+        result = await self.db.execute(
+            delete(Comment)
+            .where(Comment.post_id == post_uuid)
+            .returning(Comment.id, Comment.content_external)
+        )
+        external_comments = [comment_id for comment_id, external in result.all() if external]
+        await self.db.execute(delete(PostLike).where(PostLike.post_id == post_uuid))
+        await self.db.execute(delete(Post).where(Post.id == post_uuid))
+        post_key = self._body_key(db_post) if db_post.content_external else None
+        self.db.expunge(db_post)
+        await self.db.commit()
+        await self._invalidate(post_uuid)
+        await self._discard_bodies(COMMENTS_CONTENT, external_comments)
+        if post_key is not None:
+            await self._discard_bodies(POSTS_CONTENT, [post_key])
+
+    async def _set_like(self, post_id: Union[UUID, str], user_id: Union[UUID, str], liked: bool) -> PostLikeStatus:
+        """点赞或取消点赞，重复操作是幂等的
+
+        post_likes 的主键决定本次操作是否生效，只有生效时才调整计数；
+        计数使用单条 UPDATE likes = likes ± 1，并发点赞不会互相覆盖。
+        """
+        post_uuid = UUID(post_id) if isinstance(post_id, str) else post_id
+        user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
+        result = await self.db.execute(select(Post.likes).where(Post.id == post_uuid))
+        likes = result.scalar_one_or_none()
+        if likes is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="帖子不存在"
+            )
+
+        if liked:
+            stmt = (
+                dialect_insert(self.db, PostLike)
+                .values(user_id=user_uuid, post_id=post_uuid, created_at=datetime.now())
+                .on_conflict_do_nothing(index_elements=[PostLike.user_id, PostLike.post_id])
+                .returning(PostLike.post_id)
+            )
+        else:
+            stmt = (
+                delete(PostLike)
+                .where(PostLike.user_id == user_uuid, PostLike.post_id == post_uuid)
+                .returning(PostLike.post_id)
+            )
+        changed = (await self.db.execute(stmt)).first() is not None
+        delta = 1 if liked else -1
+
+        if changed and self.like_buffer is None:
+            result = await self.db.execute(
+                update(Post)
+                .where(Post.id == post_uuid)
+                .values(likes=Post.likes + delta)
+                .returning(Post.likes)
+                .execution_options(synchronize_session=False)
+            )
+            likes = result.scalar_one()
         await self.db.commit()
+        if changed:
+            # 启用点赞缓冲时，计数写入数据库后由缓冲再清除一次缓存
+            await self._invalidate(post_uuid)
+
+        if self.like_buffer is not None:
+            # 点赞记录提交后再累加计数增量，返回值包含尚未写入的增量
+            if changed:
+                self.like_buffer.add(post_uuid, delta)
+            likes += self.like_buffer.pending(post_uuid)
+        return PostLikeStatus(post_id=str(post_uuid), liked=liked, likes=likes)
+
+    async def like_post(self, post_id: Union[UUID, str], user_id: Union[UUID, str]) -> PostLikeStatus:
+        """点赞帖子"""
+        return await self._set_like(post_id, user_id, True)
+
+    async def unlike_post(self, post_id: Union[UUID, str], user_id: Union[UUID, str]) -> PostLikeStatus:
+        """取消点赞"""
+        return await self._set_like(post_id, user_id, False)
 
     async def create_comment(self, post_id: Union[UUID, str], comment_data: CommentCreate, author_id: Union[UUID, str]) -> CommentSchema:
         """创建评论"""
         post_uuid = UUID(post_id) if isinstance(post_id, str) else post_id
+        comment_fields = comment_data.model_dump()
+        if comment_fields.get("parent_id"):
+            comment_fields["parent_id"] = await self._resolve_parent(post_uuid, comment_fields["parent_id"])
         
-        # 检查帖子是否存在
-        post = await self.db.get(Post, post_uuid)
-        if not post:
+        comment_uuid = uuid4()
+        comment_fields.update(await self._offload(COMMENTS_CONTENT, comment_uuid, comment_fields["content"]))
+
+        now = datetime.now()
+        # 在同一事务中原子地更新帖子统计，同时检查帖子是否存在；
+        # 之后到提交前只有本地操作，热门帖子的行锁不会等待外部存储
+        result = await self.db.execute(
+            update(Post)
+            .where(Post.id == post_uuid)
+            .values(comment_count=Post.comment_count + 1, last_activity_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            await self.db.rollback()
+            if comment_fields["content_external"]:
+                await self._discard_bodies(COMMENTS_CONTENT, [comment_uuid])
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="帖子不存在"
             )
             
         author_uuid = UUID(author_id) if isinstance(author_id, str) else author_id
-        comment = Comment(**comment_data.model_dump(), post_id=post_uuid, author_id=author_uuid)
+        comment = Comment(**comment_fields, id=comment_uuid, post_id=post_uuid, author_id=author_uuid, created_at=now)
         self.db.add(comment)
         await self.db.commit()
-        await self.db.refresh(comment)
-        
-        # 确保所有UUID字段被正确转换
-        comment_dict = {
-            'id': str(comment.id),
-            'content': comment.content,
-            'author_id': str(comment.author_id),
-            'post_id': str(comment.post_id),
-            'created_at': comment.created_at,
-            'author': comment.author
-        }
-        return CommentSchema.model_validate(comment_dict)
+        await self._invalidate(post_uuid)
+        result = await self.db.execute(
+            select(Comment)
+            .options(*comment_load_options())
+            .where(Comment.id == comment.id)
+            .execution_options(populate_existing=True)
+        )
+        comment = result.scalar_one()
+        bodies = await self._fetch_bodies(COMMENTS_CONTENT, [comment])
+        return self._comment_to_schema(comment, bodies.get(comment.id))
 
-    async def get_comments(self, post_id: Union[UUID, str]) -> List[CommentSchema]:
-        """获取帖子评论"""
+    async def _resolve_parent(self, post_uuid: UUID, parent_id: UUID) -> UUID:
+        """校验被回复的评论属于同一帖子，返回其顶层评论的ID"""
+        result = await self.db.execute(
+            select(Comment.post_id, Comment.parent_id).where(Comment.id == parent_id)
+        )
+        parent = result.first()
+        if parent is None or parent.post_id != post_uuid:
+            raise BadRequestException("回复的评论不存在")
+        return parent.parent_id or parent_id
+
+    async def get_comments_page(
+        self,
+        post_id: Union[UUID, str],
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        parent_id: Optional[UUID] = None
+    ) -> Tuple[List[CommentSchema], Optional[str]]:
+        """分页获取帖子的顶层评论，给出 parent_id 时获取该评论的回复
+
+        按 (created_at, id) 正序键集分页，返回 (当前页, 下一页游标)。
+        """
         post_uuid = UUID(post_id) if isinstance(post_id, str) else post_id
-        result = await self.db.execute(select(Comment).where(Comment.post_id == post_uuid))
-        comments = result.unique().scalars().all()
-        
-        result = []
-        for comment in comments:
-            comment_dict = {
-                'id': str(comment.id),
-                'content': comment.content,
-                'author_id': str(comment.author_id),
-                'post_id': str(comment.post_id),
-                'created_at': comment.created_at,
-                'author': comment.author
-            }
-            result.append(CommentSchema.model_validate(comment_dict))
-        return result
-
-    async def delete_comment(self, comment_id: Union[UUID, str], user_id: Union[UUID, str]) -> None:
+        cache_key = f"comments:{post_uuid}:{parent_id}:{limit}:{cursor}"
+        if self.cache is not None:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return [CommentSchema.model_validate(item) for item in cached["items"]], cached["next_cursor"]
+        return await post_flights.do(
+            (post_uuid, "comments", parent_id, limit, cursor),
+            lambda: self._load_comments_page(post_uuid, limit, cursor, parent_id, cache_key)
+        )
+
+    async def _load_comments_page(
+        self,
+        post_uuid: UUID,
+        limit: int,
+        cursor: Optional[str],
+        parent_id: Optional[UUID],
+        cache_key: str
+    ) -> Tuple[List[CommentSchema], Optional[str]]:
+        generation = post_flights.generation(post_uuid)
+        stmt = (
+            select(Comment)
+            .options(*comment_load_options())
+            .where(Comment.post_id == post_uuid)
+            .order_by(Comment.created_at, Comment.id)
+        )
+        if parent_id is None:
+            stmt = stmt.where(Comment.parent_id.is_(None))
+        else:
+            stmt = stmt.where(Comment.parent_id == parent_id)
+        if cursor:
+            created_at, comment_id = decode_cursor(cursor, datetime, UUID)
+            stmt = stmt.where(keyset_after((Comment.created_at, Comment.id), (created_at, comment_id)))
+        # 多取一行用于判断是否存在下一页
+        result = await self.db.execute(stmt.limit(limit + 1))
+        comments, has_more = split_page(result.scalars(), limit)
+        bodies = await self._fetch_bodies(COMMENTS_CONTENT, comments)
+        items = [self._comment_to_schema(comment, bodies.get(comment.id)) for comment in comments]
+        next_cursor = next_cursor_for(comments, has_more, *COMMENT_ORDER_KEYS)
+        if self.cache is not None and post_flights.generation(post_uuid) == generation:
+            await self.cache.set(
+                cache_key,
+                {"items": [item.model_dump(mode="json") for item in items], "next_cursor": next_cursor},
+                [post_tag(post_uuid)]
+            )
+        return items, next_cursor
+
+    async def delete_comment(self, comment_id: Union[UUID, str], principal: Principal) -> None:
         """删除评论"""
         comment_uuid = UUID(comment_id) if isinstance(comment_id, str) else comment_id
         comment = await self.db.get(Comment, comment_uuid)
@@ -249,12 +571,78 @@ class PostService:
         author_id = comment.author_id
         if isinstance(author_id, Column):
             author_id = author_id.value
-        has_permission = await self._check_permission(author_id, user_id)
+        has_permission = self._check_permission(author_id, principal)
         if has_permission is False:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="没有权限操作该资源"
             )
             
-        await self.db.delete(comment)
+        # 删除顶层评论时一并删除其回复
+        result = await self.db.execute(
+            delete(Comment)
+            .where(or_(Comment.id == comment_uuid, Comment.parent_id == comment_uuid))
+            .returning(Comment.id, Comment.content_external)
+        )
+        removed_rows = result.all()
+        removed = len(removed_rows)
+        await self.db.execute(
+            update(Post)
+            .where(Post.id == comment.post_id)
+            .values(comment_count=Post.comment_count - removed)
+            .execution_options(synchronize_session=False)
+        )
+        post_uuid = comment.post_id
+        self.db.expunge(comment)
         await self.db.commit()
+        await self._invalidate(post_uuid)
+        await self._discard_bodies(
+            COMMENTS_CONTENT, [removed_id for removed_id, external in removed_rows if external]
+        )
+
+    async def backfill_stats(self, batch_size: int = 1000) -> int:
+        """按评论表重新计算帖子的 comment_count 与 last_activity_at
+
+        按主键分批更新，每批单独提交，避免长时间锁住整张表。返回处理的帖子数。
+        """
+        comment_count = (
+            select(func.count(Comment.id))
+            .where(Comment.post_id == Post.id)
+            .scalar_subquery()
+        )
+        last_comment_at = (
+            select(func.max(Comment.created_at))
+            .where(Comment.post_id == Post.id)
+            .scalar_subquery()
+        )
+        processed = 0
+        last_id = None
+        while True:
+            stmt = select(Post.id).order_by(Post.id).limit(batch_size)
+            if last_id is not None:
+                stmt = stmt.where(Post.id > last_id)
+            ids = (await self.db.execute(stmt)).scalars().all()
+            if not ids:
+                return processed
+            await self.db.execute(
+                update(Post)
+                .where(Post.id.in_(ids))
+                .values(
+                    comment_count=comment_count,
+                    last_activity_at=func.coalesce(last_comment_at, Post.created_at)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+            processed += len(ids)
+            last_id = ids[-1]
+
+
+def get_post_service(
+    db: AsyncSession = Depends(get_db),
+    like_buffer: Optional[LikeCounterBuffer] = Depends(get_like_buffer),
+    content_store: Optional[ContentStore] = Depends(get_content_store),
+    cache: Optional[ResponseCache] = Depends(get_cache)
+) -> PostService:
+    """路由使用的 PostService 依赖，按配置注入点赞缓冲、正文外置存储与响应缓存"""
+    return PostService(db, like_buffer=like_buffer, content_store=content_store, cache=cache)
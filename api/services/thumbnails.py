@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from api.config import settings
+from .photo_storage import PhotoStorage
+
+logger = logging.getLogger(__name__)
+
+# 缩略图统一输出为WebP
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_MEDIA_TYPE = "image/webp"
+
+
+def thumbnail_key(digest: str, size: int) -> str:
+    """缩略图的存储键，与原图放在同一目录下"""
+    return f"{digest}_{size}.webp"
+
+
+def render_thumbnails(source: str, targets: Dict[int, str]) -> List[int]:
+    """在子进程中解码原图并按边长生成缩略图，返回实际生成的尺寸
+
+    Pillow 仅在工作进程中导入，主进程不需要加载图像库。
+    """
+    from PIL import Image, ImageOps
+
+    produced = []
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        for size, target in sorted(targets.items()):
+            thumb = image.copy()
+            thumb.thumbnail((size, size))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            thumb.save(tmp_path, THUMBNAIL_FORMAT, quality=80)
+            os.replace(tmp_path, target)
+            produced.append(size)
+    return produced
+
+
+class ThumbnailGenerator:
+    """后台缩略图生成
+
+    图像解码与缩放是CPU密集操作，放到进程池中执行，避免阻塞事件循环。
+    生成失败只记录日志，下载接口会回退到原图。
+    """
+
+    def __init__(self, sizes: Iterable[int] = settings.THUMBNAIL_SIZES, max_workers: int = settings.THUMBNAIL_WORKERS):
+        self.sizes = tuple(sizes)
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 使用spawn启动工作进程，避免在事件循环运行时fork
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def generate(self, storage: PhotoStorage, digests: Iterable[str]) -> None:
+        """为一组原图生成缺失的缩略图"""
+        loop = asyncio.get_running_loop()
+        for digest in dict.fromkeys(digests):
+            source = storage.local_path(digest)
+            if not source:
+                continue
+            targets = {
+                size: storage.local_path(thumbnail_key(digest, size))
+                for size in self.sizes
+            }
+            targets = {size: path for size, path in targets.items() if not os.path.exists(path)}
+            if not targets:
+                continue
+            try:
+                await loop.run_in_executor(self._get_executor(), render_thumbnails, source, targets)
+            except Exception:
+                logger.exception("Failed to generate thumbnails for %s", digest)
+
+    async def delete(self, storage: PhotoStorage, digest: str) -> None:
+        """删除原图对应的全部缩略图"""
+        for size in self.sizes:
+            await storage.delete(thumbnail_key(digest, size))
+
+    def shutdown(self, wait: bool = False) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+_generator: Optional[ThumbnailGenerator] = None
+
+
+def get_thumbnail_generator() -> ThumbnailGenerator:
+    """获取缩略图生成器（进程内单例）"""
+    global _generator
+    if _generator is None:
+        _generator = ThumbnailGenerator()
+    return _generator
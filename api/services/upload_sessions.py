@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Optional
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+
+from api.config import settings
+from api.exceptions import BadRequestException, NotFoundException
+from .photo_storage import PhotoStorage, StoredPhoto
+
+
+@dataclass
+class UploadSession:
+    """一次分片上传的进度
+
+    分片必须按序号依次写入，hasher 保存已接收数据的增量摘要，
+    完成时直接得到内容摘要，不需要重新读取文件。
+    """
+    id: str
+    cat_id: UUID
+    filename: Optional[str]
+    content_type: str
+    total_size: Optional[int] = None
+    next_chunk: int = 0
+    received_bytes: int = 0
+    updated_at: float = field(default_factory=time.monotonic)
+    hasher: "hashlib._Hash" = field(default_factory=hashlib.sha256, repr=False)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "upload_id": self.id,
+            "cat_id": str(self.cat_id),
+            "filename": self.filename,
+            "content_type": self.content_type,
+            "total_size": self.total_size,
+            "next_chunk": self.next_chunk,
+            "received_bytes": self.received_bytes,
+        }
+
+
+class ChunkTooLarge(Exception):
+    pass
+
+
+async def _limit_stream(chunks: AsyncIterator[bytes], max_size: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_size:
+            raise ChunkTooLarge()
+        yield chunk
+
+
+class UploadSessionManager:
+    """进程内的分片上传会话表
+
+    会话状态（包括摘要计算的中间状态）只保存在当前进程中，
+    多进程部署时需要把同一会话的请求路由到同一进程。
+    """
+
+    def __init__(
+        self,
+        ttl: int = settings.UPLOAD_SESSION_TTL,
+        max_chunk_size: int = settings.UPLOAD_MAX_CHUNK_SIZE
+    ):
+        self.ttl = ttl
+        self.max_chunk_size = max_chunk_size
+        self._sessions: Dict[str, UploadSession] = {}
+
+    async def _purge_expired(self, storage: PhotoStorage) -> None:
+        deadline = time.monotonic() - self.ttl
+        expired = [s for s in self._sessions.values() if s.updated_at < deadline and not s.lock.locked()]
+        for session in expired:
+            self._sessions.pop(session.id, None)
+            await storage.abort_upload(session.id)
+
+    async def create(
+        self,
+        storage: PhotoStorage,
+        cat_id: UUID,
+        filename: Optional[str],
+        content_type: str,
+        total_size: Optional[int] = None
+    ) -> UploadSession:
+        await self._purge_expired(storage)
+        session = UploadSession(
+            id=uuid4().hex,
+            cat_id=cat_id,
+            filename=filename,
+            content_type=content_type,
+            total_size=total_size
+        )
+        self._sessions[session.id] = session
+        return session
+
+    def get(self, cat_id: UUID, upload_id: str) -> UploadSession:
+        session = self._sessions.get(upload_id)
+        if session is None or session.cat_id != cat_id:
+            raise NotFoundException("Upload not found")
+        return session
+
+    async def write_chunk(
+        self,
+        storage: PhotoStorage,
+        session: UploadSession,
+        index: int,
+        chunks: AsyncIterator[bytes]
+    ) -> UploadSession:
+        """写入第 index 个分片
+
+        已接收过的分片直接确认（客户端重试），跳过的分片返回409并告知下一个序号。
+        """
+        async with session.lock:
+            if index < session.next_chunk:
+                return session
+            if index > session.next_chunk:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Expected chunk {session.next_chunk}"
+                )
+            # 在副本上计算摘要，分片中途失败时不会污染会话状态
+            hasher = session.hasher.copy()
+            try:
+                written = await storage.append_upload(
+                    session.id,
+                    session.received_bytes,
+                    _limit_stream(chunks, self.max_chunk_size),
+                    hasher
+                )
+            except ChunkTooLarge:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Chunk exceeds {self.max_chunk_size} bytes"
+                )
+            if not written:
+                raise BadRequestException("Empty chunk")
+            if session.total_size is not None and session.received_bytes + written > session.total_size:
+                raise BadRequestException("Upload exceeds declared size")
+            session.hasher = hasher
+            session.received_bytes += written
+            session.next_chunk += 1
+            session.updated_at = time.monotonic()
+            return session
+
+    async def finish(self, storage: PhotoStorage, session: UploadSession) -> StoredPhoto:
+        """校验并将会话数据转为存储对象，完成后会话失效"""
+        async with session.lock:
+            if session.id not in self._sessions:
+                raise NotFoundException("Upload not found")
+            if not session.received_bytes:
+                raise BadRequestException("No chunks uploaded")
+            if session.total_size is not None and session.received_bytes != session.total_size:
+                raise BadRequestException(
+                    f"Upload incomplete: {session.received_bytes}/{session.total_size} bytes"
+                )
+            stored = await storage.finish_upload(
+                session.id,
+                session.hasher.hexdigest(),
+                session.received_bytes
+            )
+            self._sessions.pop(session.id, None)
+            return stored
+
+    async def abort(self, storage: PhotoStorage, session: UploadSession) -> None:
+        async with session.lock:
+            self._sessions.pop(session.id, None)
+            await storage.abort_upload(session.id)
+
+
+_manager: Optional[UploadSessionManager] = None
+
+
+def get_upload_manager() -> UploadSessionManager:
+    """获取分片上传会话管理器（进程内单例）"""
+    global _manager
+    if _manager is None:
+        _manager = UploadSessionManager()
+    return _manager
@@ -1,26 +1,101 @@
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 from uuid import UUID
+from sqlalchemy import delete, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from api.models.user import UserInDB, UserCreate, UserUpdate
+from api.models.user_model import DBUser
 from fastapi import Depends
 from api.database import get_db
+from api.principals import REVOKE_ALL, principal_cache
+from api.token_store import get_revocation_store
+from api.security import password_hasher
+from api.pagination import (
+    decode_cursor, estimate_count, keyset_after, like_prefix, next_cursor_for, split_page
+)
+
+# 用户列表的稳定排序键，与 ix_users_created_at_id 索引对应
+USER_ORDER_KEYS = ("created_at", "id")
 
 class UserService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    async def _bump_token_version(self, user_id: UUID, **values) -> Optional[int]:
+        """递增用户的令牌版本并写入 values 中的其他列，返回新版本号；需在同一事务中提交"""
+        result = await self.db.execute(
+            update(DBUser)
+            .where(DBUser.id == user_id)
+            .values(token_version=DBUser.token_version + 1, **values)
+            .returning(DBUser.token_version)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def _invalidate_principal(user_id: UUID, token_version: Optional[int] = None) -> None:
+        """清除身份缓存，给出新版本号时同时吊销旧令牌；需在事务提交后调用"""
+        principal_cache.invalidate_user(user_id)
+        if isinstance(token_version, int):
+            await get_revocation_store().revoke_user_before(user_id, token_version)
+
+    @staticmethod
+    def _list_filters(
+        exclude_id: Optional[UUID] = None,
+        q: Optional[str] = None,
+        is_admin: Optional[bool] = None,
+        disabled: Optional[bool] = None
+    ) -> list:
+        conditions = []
+        if exclude_id is not None:
+            conditions.append(DBUser.id != exclude_id)
+        if q:
+            pattern = like_prefix(q)
+            conditions.append(or_(
+                DBUser.username.ilike(pattern, escape="\\"),
+                DBUser.email.ilike(pattern, escape="\\")
+            ))
+        if is_admin is not None:
+            conditions.append(DBUser.is_admin.is_(is_admin))
+        if disabled is not None:
+            conditions.append(DBUser.disabled.is_(disabled))
+        return conditions
+
+    async def list_users(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        exclude_id: Optional[UUID] = None,
+        q: Optional[str] = None,
+        is_admin: Optional[bool] = None,
+        disabled: Optional[bool] = None,
+        with_total: bool = True
+    ) -> Tuple[List[DBUser], Optional[str], Optional[int]]:
+        """分页获取用户列表，过滤、搜索与分页全部在SQL中完成
+
+        返回 (当前页, 下一页游标, 总数)，总数在 PostgreSQL 下为查询计划估算值。
+        """
+        conditions = self._list_filters(exclude_id, q, is_admin, disabled)
+        stmt = select(DBUser).where(*conditions).order_by(DBUser.created_at, DBUser.id)
+        if cursor:
+            created_at, user_id = decode_cursor(cursor, datetime, UUID)
+            stmt = stmt.where(keyset_after((DBUser.created_at, DBUser.id), (created_at, user_id)))
+        # 多取一行用于判断是否存在下一页
+        result = await self.db.execute(stmt.limit(limit + 1))
+        users, has_more = split_page(result.scalars(), limit)
+        total = None
+        if with_total:
+            total = await estimate_count(self.db, select(DBUser.id).where(*conditions))
+        return users, next_cursor_for(users, has_more, *USER_ORDER_KEYS), total
+
     async def get_user(self, username: str) -> Optional[UserInDB]:
         return await UserInDB.get(username, self.db)
 
     async def create_user(self, user: UserCreate) -> UserInDB:
-        from passlib.context import CryptContext
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        
         db_user = UserInDB(
             username=user.username,
             email=user.email,
             full_name=user.full_name,
-            hashed_password=pwd_context.hash(user.password)
+            hashed_password=await password_hasher.hash(user.password)
         )
         return await db_user.save(self.db)
 
@@ -29,13 +104,7 @@ class UserService:
         username: str,
         password: str
     ) -> Optional[UserInDB]:
-        from passlib.context import CryptContext
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        
-        user = await UserInDB.get(username, self.db)
-        if not user or not pwd_context.verify(password, user.hashed_password):
-            return None
-        return user
+        return await UserInDB.authenticate(username, password, self.db)
 
     async def update_user(
         self,
@@ -53,27 +122,63 @@ class UserService:
         if not user:
             return None
 
-        # 更新字段
-        from passlib.context import CryptContext
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
+        # 更新字段，user 是查询结果的副本，修改需要通过 UPDATE 写回
+        values = {}
         if user_update.full_name is not None:
-            user.full_name = user_update.full_name
+            values["full_name"] = user.full_name = user_update.full_name
+        token_version = None
         if user_update.password is not None:
-            user.hashed_password = pwd_context.hash(user_update.password)
+            values["hashed_password"] = user.hashed_password = await password_hasher.hash(user_update.password)
+            # 新密码与令牌版本在同一条语句中写入，修改密码后此前签发的令牌全部失效
+            token_version = await self._bump_token_version(user.id, **values)
+            if token_version is not None:
+                user.token_version = token_version
+        elif values:
+            await self.db.execute(update(DBUser).where(DBUser.id == user.id).values(**values))
 
         # 保存更新
         await self.db.commit()
+        await self._invalidate_principal(user.id, token_version)
         return user
 
+    async def admin_update_user(self, user_id: UUID, user_update: UserUpdate) -> Optional[UserInDB]:
+        """管理员更新用户信息
+
+        令牌中的权限声明在有效期内不会重新读取，修改权限、禁用状态或密码时
+        递增令牌版本并吊销此前签发的令牌，用户需要重新登录或刷新令牌。
+        """
+        user = await self.db.get(DBUser, user_id)
+        if user is None:
+            return None
+
+        update_data = user_update.model_dump(exclude_unset=True)
+        revoke = False
+        for field in ("email", "full_name"):
+            if update_data.get(field) is not None:
+                setattr(user, field, update_data[field])
+        for field in ("is_admin", "disabled"):
+            value = update_data.get(field)
+            if value is not None and bool(getattr(user, field)) != value:
+                setattr(user, field, value)
+                revoke = True
+        if update_data.get("password") is not None:
+            user.hashed_password = await password_hasher.hash(update_data["password"])
+            revoke = True
+
+        token_version = await self._bump_token_version(user_id) if revoke else None
+        await self.db.commit()
+        await self._invalidate_principal(user_id, token_version)
+        return await UserInDB.get_by_id(user_id, self.db)
+
     async def delete_user(self, user_id: UUID) -> bool:
         """删除用户"""
-        user = await UserInDB.get_by_id(user_id, self.db)
-        if not user:
+        result = await self.db.execute(
+            delete(DBUser).where(DBUser.id == user_id).returning(DBUser.id)
+        )
+        if result.scalar_one_or_none() is None:
             return False
-            
-        await self.db.delete(user)
         await self.db.commit()
+        await self._invalidate_principal(user_id, REVOKE_ALL)
         return True
 
     async def generate_password_reset_token(self, email: str) -> str:
@@ -96,11 +201,11 @@ class UserService:
             user = await UserInDB.get_by_id(uuid_obj, self.db)
             if not user:
                 raise ValueError("Invalid token")
-                
-            from passlib.context import CryptContext
-            pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-            user.hashed_password = pwd_context.hash(new_password)
+
+            hashed_password = await password_hasher.hash(new_password)
+            token_version = await self._bump_token_version(user.id, hashed_password=hashed_password)
             await self.db.commit()
+            await self._invalidate_principal(user.id, token_version)
             return True
         except ValueError:
             raise ValueError("Invalid token format")
@@ -0,0 +1,93 @@
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """合并并发的相同读请求
+
+    同一个键同时只执行一次加载，期间到达的请求等待同一个结果（或同一个异常），
+    加载完成后立即移除，之后的请求重新执行。键为元组，第一个元素是实体ID。
+
+    加载直接在发起请求的协程和会话中执行，其余请求只拿到转换好的响应数据，
+    不共享ORM对象，也不会在发起者的会话关闭后继续使用它。发起者被取消时，
+    等待中的请求由其中一个用自己的会话重新加载。
+
+    修改实体后调用 forget()：新请求不再加入修改前开始的加载，同时实体的代数加一，
+    加载结束时代数已变化说明结果可能是旧数据，不应写入缓存。
+    """
+
+    def __init__(self):
+        self._flights: Dict[Tuple[Hashable, ...], asyncio.Future] = {}
+        # 只记录有加载正在进行的实体，加载全部结束后清除
+        self._active: Counter = Counter()
+        self._generations: Dict[Any, int] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.takeovers = 0
+
+    def generation(self, entity_id: Any) -> int:
+        """实体的当前代数，加载开始与结束时比较以判断期间是否被修改"""
+        return self._generations.get(entity_id, 0)
+
+    async def do(self, key: Tuple[Hashable, ...], load: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        while True:
+            flight = self._flights.get(key)
+            if flight is None or flight.get_loop() is not loop:
+                return await self._lead(key, load, loop)
+            self.followers += 1
+            try:
+                # 当前请求被取消时不影响其他等待者
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # 发起者被取消，由当前请求接手重新加载
+                self.takeovers += 1
+
+    async def _lead(self, key: Tuple[Hashable, ...], load: Callable[[], Awaitable[T]], loop) -> T:
+        entity_id = key[0]
+        flight = loop.create_future()
+        self._flights[key] = flight
+        self._active[entity_id] += 1
+        self.leaders += 1
+        try:
+            result = await load()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as exc:
+            flight.set_exception(exc)
+            # 没有等待者时也视为已取出，避免事件循环报告未处理的异常
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            self._active[entity_id] -= 1
+            if self._active[entity_id] <= 0:
+                del self._active[entity_id]
+                self._generations.pop(entity_id, None)
+
+    def forget(self, entity_id: Any) -> None:
+        """实体已被修改：新请求不再加入正在进行的加载，进行中的加载结果不写入缓存"""
+        for key in [key for key in self._flights if key[0] == entity_id]:
+            del self._flights[key]
+        if entity_id in self._active:
+            self._generations[entity_id] = self._generations.get(entity_id, 0) + 1
+
+    def stats(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "takeovers": self.takeovers,
+            "coalesced_rate": round(self.followers / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,177 @@
+import heapq
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from api.config import settings
+from api.metrics import register_metrics
+
+
+def _user_key(user_id) -> UUID:
+    return user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+
+
+class RevocationStore(ABC):
+    """令牌吊销记录
+
+    两类记录：按 jti 吊销单个令牌（登出、刷新令牌轮换），
+    按用户记录最低有效令牌版本（改密码、删除用户）。
+    记录只需保留到对应令牌过期为止，校验一次令牌最多一次查找。
+    """
+
+    @abstractmethod
+    async def revoke_token(self, jti: str, expires_at: float) -> None:
+        """吊销单个令牌，expires_at 为令牌过期的Unix时间戳"""
+
+    @abstractmethod
+    async def revoke_user_before(self, user_id, version: int) -> None:
+        """吊销该用户版本低于 version 的全部令牌"""
+
+    @abstractmethod
+    async def is_revoked(self, jti: Optional[str], user_id, version: int) -> bool:
+        """令牌是否已被单独吊销，或版本低于该用户的最低有效版本"""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryRevocationStore(RevocationStore):
+    """进程内吊销记录
+
+    查询只是两次字典查找；过期记录在写入时按过期时间顺序清理。
+    多进程部署时各进程的记录互不可见，需要使用 Redis 后端。
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, float] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._versions: Dict[UUID, int] = {}
+        self._lock = threading.Lock()
+
+    def _purge_expired(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._expiry)
+            if self._tokens.get(jti) == expires_at:
+                del self._tokens[jti]
+
+    async def revoke_token(self, jti: str, expires_at: float) -> None:
+        with self._lock:
+            self._purge_expired(time.time())
+            self._tokens[jti] = expires_at
+            heapq.heappush(self._expiry, (expires_at, jti))
+
+    async def revoke_user_before(self, user_id, version: int) -> None:
+        user_id = _user_key(user_id)
+        with self._lock:
+            self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+
+    async def is_revoked(self, jti: Optional[str], user_id, version: int) -> bool:
+        if version < self._versions.get(_user_key(user_id), 0):
+            return True
+        if jti is None:
+            return False
+        expires_at = self._tokens.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._expiry.clear()
+            self._versions.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "revoked_tokens": len(self._tokens),
+            "revoked_users": len(self._versions),
+        }
+
+
+# 只在新版本更大时写入，避免并发请求把版本改小
+_RAISE_VERSION_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > current then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+return 1
+"""
+
+
+class RedisRevocationStore(RevocationStore):
+    """基于 Redis 的吊销记录，多个进程/实例共享
+
+    jti 记录的过期时间与令牌一致，用户版本记录保留一个刷新令牌有效期，
+    之后旧版本的令牌已全部自然过期。
+    """
+
+    def __init__(
+        self,
+        url: str = settings.REDIS_URL,
+        prefix: str = "catalogue:revoked",
+        version_ttl: int = settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+    ):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self.prefix = prefix
+        self.version_ttl = version_ttl
+
+    def _token_key(self, jti: str) -> str:
+        return f"{self.prefix}:jti:{jti}"
+
+    def _version_key(self, user_id) -> str:
+        return f"{self.prefix}:user:{_user_key(user_id)}"
+
+    async def revoke_token(self, jti: str, expires_at: float) -> None:
+        ttl = int(expires_at - time.time()) + 1
+        if ttl > 0:
+            await self._redis.set(self._token_key(jti), 1, ex=ttl)
+
+    async def revoke_user_before(self, user_id, version: int) -> None:
+        await self._redis.eval(
+            _RAISE_VERSION_SCRIPT, 1, self._version_key(user_id), version, self.version_ttl
+        )
+
+    async def is_revoked(self, jti: Optional[str], user_id, version: int) -> bool:
+        keys = [self._version_key(user_id)]
+        if jti is not None:
+            keys.append(self._token_key(jti))
+        values = await self._redis.mget(keys)
+        if values[0] is not None and version < int(values[0]):
+            return True
+        return len(values) > 1 and values[1] is not None
+
+    async def clear(self) -> None:
+        async for key in self._redis.scan_iter(match=f"{self.prefix}:*"):
+            await self._redis.delete(key)
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+def build_revocation_store(backend: str = settings.REVOCATION_BACKEND) -> RevocationStore:
+    if backend == "memory":
+        return MemoryRevocationStore()
+    if backend == "redis":
+        return RedisRevocationStore()
+    raise ValueError(f"Unknown revocation backend: {backend}")
+
+
+_store: Optional[RevocationStore] = None
+
+
+def get_revocation_store() -> RevocationStore:
+    """获取令牌吊销记录（进程内单例）"""
+    global _store
+    if _store is None:
+        _store = build_revocation_store()
+    return _store
+
+
+register_metrics("revocation_store", lambda: get_revocation_store().stats())
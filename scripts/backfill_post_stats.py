@@ -0,0 +1,27 @@
+import argparse
+import asyncio
+import logging
+
+from api.database import AsyncSessionLocal
+from api.services.post_service import PostService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def backfill(batch_size: int) -> int:
+    """按评论表重新计算全部帖子的评论数与最后活跃时间"""
+    async with AsyncSessionLocal() as session:
+        return await PostService(session).backfill_stats(batch_size=batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重新计算帖子的 comment_count 与 last_activity_at")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批更新的帖子数")
+    args = parser.parse_args()
+    processed = asyncio.run(backfill(args.batch_size))
+    logger.info(f"Backfilled stats for {processed} posts")
+
+
+if __name__ == "__main__":
+    main()
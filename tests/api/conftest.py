@@ -14,9 +14,40 @@ logger = logging.getLogger(__name__)
 from fastapi.testclient import TestClient
 from api.database import AsyncSessionLocal
 from api.auth import get_current_user, get_admin_user
+from api.services.photo_storage import LocalPhotoStorage, get_photo_storage
+from api.services.thumbnails import ThumbnailGenerator, get_thumbnail_generator
+from api.services.upload_sessions import UploadSessionManager, get_upload_manager
+from api.principals import principal_cache
+from api import token_store
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache(monkeypatch):
+    """每个用例使用独立的数据库，清空进程内的身份缓存与吊销记录"""
+    principal_cache.clear()
+    monkeypatch.setattr(token_store, "_store", token_store.MemoryRevocationStore())
+    yield
+    principal_cache.clear()
+
+@pytest.fixture
+def photo_storage(tmp_path):
+    """写入临时目录的照片存储"""
+    return LocalPhotoStorage(str(tmp_path / "photos"), chunk_size=64 * 1024)
+
+@pytest.fixture
+def thumbnail_generator():
+    """测试用缩略图生成器，用例结束后关闭进程池"""
+    generator = ThumbnailGenerator(max_workers=1)
+    yield generator
+    generator.shutdown(wait=True)
+
+@pytest.fixture
+def upload_manager():
+    """每个用例独立的分片上传会话表"""
+    return UploadSessionManager(max_chunk_size=64 * 1024)
 
 @pytest_asyncio.fixture
-async def client(db_session, test_user):
+async def test_app(db_session, test_user, photo_storage, thumbnail_generator, upload_manager):
+    """已覆盖依赖的应用实例，用例可以再调整 dependency_overrides"""
     # 创建新的应用实例
     from api.main import create_app
     test_app = create_app()
@@ -50,16 +81,21 @@ async def client(db_session, test_user):
     test_app.dependency_overrides[get_db] = override_get_db
     test_app.dependency_overrides[get_current_user] = override_get_current_user
     test_app.dependency_overrides[get_admin_user] = override_get_admin_user
-    
+    test_app.dependency_overrides[get_photo_storage] = lambda: photo_storage
+    test_app.dependency_overrides[get_thumbnail_generator] = lambda: thumbnail_generator
+    test_app.dependency_overrides[get_upload_manager] = lambda: upload_manager
+    yield test_app
+    # 清理覆盖
+    test_app.dependency_overrides.clear()
+
+@pytest_asyncio.fixture
+async def client(test_app):
     async with AsyncClient(
         app=test_app,
         base_url="http://test",
         follow_redirects=True
     ) as ac:
         yield ac
-        
-    # 清理覆盖
-    test_app.dependency_overrides.clear()
 
 # 测试数据工厂
 @pytest_asyncio.fixture
@@ -88,6 +124,15 @@ async def test_user(db_session, test_user_data):
     await db_session.refresh(user)
     return user
 
+@pytest_asyncio.fixture
+async def test_cat(db_session, test_user):
+    """测试猫咪fixture"""
+    from api.models.cat import DBCat
+    cat = DBCat(name="Test Cat", breed="Test Breed", owner_id=test_user.id, photo_records=[])
+    db_session.add(cat)
+    await db_session.commit()
+    return cat
+
 @pytest_asyncio.fixture
 async def another_user(db_session, another_user_data):
     """创建另一个测试用户并返回"""
@@ -249,8 +294,11 @@ async def another_auth_headers(another_user_data, db_session):
 from pytest_mock import MockerFixture
 
 @pytest.fixture
-def mocker(pytestconfig) -> MockerFixture:
-    return MockerFixture(pytestconfig)
+def mocker(pytestconfig):
+    result = MockerFixture(pytestconfig)
+    yield result
+    # 测试结束后撤销所有patch，避免影响后续测试
+    result.stopall()
 
 @pytest.fixture
 def test_user_data():
@@ -0,0 +1,84 @@
+import pytest
+from uuid import uuid4
+
+from api import cache as cache_module
+from api.cache import LRUResponseCache, build_cache, post_tag
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    """启用进程内响应缓存"""
+    cache = LRUResponseCache(maxsize=100, ttl=60)
+    monkeypatch.setattr(cache_module.settings, "CACHE_BACKEND", "memory")
+    monkeypatch.setattr(cache_module, "_cache", cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_expiry():
+    """测试超过容量淘汰最久未使用的条目，过期条目视为未命中"""
+    cache = LRUResponseCache(maxsize=2, ttl=60)
+    await cache.set("a", {"v": 1})
+    await cache.set("b", {"v": 2})
+    assert await cache.get("a") == {"v": 1}
+    await cache.set("c", {"v": 3})
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"v": 1}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+    expiring = LRUResponseCache(ttl=0)
+    await expiring.set("a", 1)
+    assert await expiring.get("a") is None
+    assert expiring.stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_by_tag():
+    """测试按标签清除条目，不影响其他实体"""
+    cache = LRUResponseCache()
+    post_id, other_id = uuid4(), uuid4()
+    await cache.set("detail", 1, [post_tag(post_id)])
+    await cache.set("comments", 2, [post_tag(post_id)])
+    await cache.set("other", 3, [post_tag(other_id)])
+
+    await cache.invalidate(post_tag(post_id))
+    assert await cache.get("detail") is None
+    assert await cache.get("comments") is None
+    assert await cache.get("other") == 3
+    assert cache.stats()["invalidations"] == 2
+    assert build_cache("none") is None
+
+
+@pytest.mark.asyncio
+async def test_post_detail_cached_until_mutation(client, test_post, response_cache):
+    """测试帖子详情与评论列表命中缓存，新增评论后失效"""
+    url = f"/api/v1/posts/{test_post.id}"
+    first = (await client.get(url)).json()
+    assert (await client.get(url)).json() == first
+    await client.get(f"{url}/comments")
+    await client.get(f"{url}/comments")
+    assert response_cache.stats()["hits"] == 2
+
+    await client.post(f"{url}/comments", json={"content": "新评论"})
+    assert (await client.get(url)).json()["comment_count"] == first["comment_count"] + 1
+    assert [c["content"] for c in (await client.get(f"{url}/comments")).json()] == ["新评论"]
+
+    await client.put(url, json={"title": "新标题", "content": "新内容"})
+    assert (await client.get(url)).json()["title"] == "新标题"
+
+
+@pytest.mark.asyncio
+async def test_cat_cached_until_update(client, auth_headers, test_cat, response_cache):
+    """测试猫咪详情命中缓存，修改后失效"""
+    url = f"/api/v1/cats/{test_cat.id}"
+    assert (await client.get(url)).json()["name"] == test_cat.name
+    await client.get(url)
+    assert response_cache.stats()["hits"] == 1
+
+    await client.put(url, json={"name": "Renamed"}, headers=auth_headers)
+    assert (await client.get(url)).json()["name"] == "Renamed"
+
+    await client.delete(url, headers=auth_headers)
+    assert (await client.get(url)).status_code == 404
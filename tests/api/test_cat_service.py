@@ -0,0 +1,55 @@
+import pytest
+from uuid import uuid4
+from sqlalchemy import event
+from api.services.cat_service import CatService
+from api.schemas.cat import CatCreate
+
+class TestCatService:
+    @pytest.mark.asyncio
+    async def test_create_and_get_cat(self, db_session, test_user):
+        """测试在请求会话中创建并读取猫咪"""
+        service = CatService(db_session)
+        cat = await service.create_cat(CatCreate(name="Tom", breed="Tabby", owner_id=test_user.id))
+        assert cat.id is not None
+        assert cat.created_at is not None
+
+        fetched = await service.get_cat_by_id(cat.id)
+        assert fetched is not None
+        assert fetched.name == "Tom"
+
+    @pytest.mark.asyncio
+    async def test_update_cat_single_statement(self, db_session, test_user):
+        """测试更新只发出一条 UPDATE ... RETURNING 语句"""
+        service = CatService(db_session)
+        cat = await service.create_cat(CatCreate(name="Tom", owner_id=test_user.id))
+
+        statements = []
+        engine = db_session.bind.sync_engine
+        listener = lambda conn, cursor, stmt, *args: statements.append(stmt)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            updated = await service.update_cat(cat.id, {"name": "Jerry", "photos": []})
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert updated is not None
+        assert updated.name == "Jerry"
+        # 除照片的预加载查询外，只有一条针对cats表的语句
+        cat_statements = [stmt for stmt in statements if "FROM cat_photos" not in stmt]
+        assert len(cat_statements) == 1
+        assert cat_statements[0].startswith("UPDATE cats")
+        assert "RETURNING" in cat_statements[0]
+
+    @pytest.mark.asyncio
+    async def test_update_missing_cat(self, db_session):
+        """测试更新不存在的猫咪返回None"""
+        assert await CatService(db_session).update_cat(uuid4(), {"name": "Ghost"}) is None
+
+    @pytest.mark.asyncio
+    async def test_delete_cat(self, db_session, test_user):
+        """测试删除猫咪"""
+        service = CatService(db_session)
+        cat = await service.create_cat(CatCreate(name="Tom", owner_id=test_user.id))
+        assert await service.delete_cat(cat.id) is True
+        assert await service.get_cat_by_id(cat.id) is None
+        assert await service.delete_cat(cat.id) is False
@@ -58,14 +58,15 @@ async def test_get_cats(client, auth_headers, mocker):
         }
     ]
     mocker.patch(
-        "api.services.cat_service.CatService.get_all_cats",
-        return_value=mock_cats
+        "api.services.cat_service.CatService.get_cats_page",
+        return_value=(mock_cats, None)
     )
     
     response = await client.get("/api/v1/cats", headers=auth_headers)
     assert_response_ok(response)
     assert isinstance(response.json(), list)
     assert len(response.json()) == 2
+    assert "X-Next-Cursor" not in response.headers
 
 @pytest.mark.asyncio
 async def test_get_cat_by_id(client, auth_headers, test_cat_data, mocker):
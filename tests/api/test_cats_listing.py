@@ -0,0 +1,172 @@
+import json
+import pytest
+import pytest_asyncio
+from fastapi import status
+from uuid import UUID, uuid4
+from datetime import date, datetime, timedelta
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from api.models.cat import DBCat
+from api.services.cat_service import CatService
+from api.pagination import encode_cursor, decode_cursor
+from api.exceptions import BadRequestException
+from tests.api.conftest import assert_response_ok, assert_response_error
+
+@pytest_asyncio.fixture
+async def seeded_cats(db_session, test_user, mocker):
+    """写入5只创建时间递增的猫咪，并让导出接口使用测试数据库"""
+    base = datetime(2025, 1, 1)
+    cats = [
+        DBCat(
+            name=f"Cat{i}",
+            breed="Tabby",
+            birth_date=date(2020 + i, 1, 1),
+            owner_id=test_user.id,
+            created_at=base + timedelta(minutes=i)
+        )
+        for i in range(5)
+    ]
+    db_session.add_all(cats)
+    await db_session.commit()
+    mocker.patch(
+        "api.routers.cats.AsyncSessionLocal",
+        async_sessionmaker(bind=db_session.bind, expire_on_commit=False)
+    )
+    return cats
+
+def test_cursor_roundtrip():
+    """测试游标编码与解码"""
+    cat_id = uuid4()
+    created_at = datetime(2025, 1, 1, 12, 30)
+    cursor = encode_cursor(created_at, cat_id)
+    assert decode_cursor(cursor, datetime, UUID) == [created_at, cat_id]
+
+def test_decode_invalid_cursor():
+    """测试无效游标"""
+    with pytest.raises(BadRequestException):
+        decode_cursor("not-a-cursor", datetime, UUID)
+
+@pytest.mark.parametrize("values", [
+    ({"a": 1}, "x"),
+    ({"dt": 5}, {"uuid": str(uuid4())}),
+    (datetime(2025, 1, 1), "not-a-uuid"),
+    (True, uuid4()),
+])
+def test_decode_cursor_wrong_types(values):
+    """测试长度正确但取值类型不符的游标"""
+    with pytest.raises(BadRequestException):
+        decode_cursor(encode_cursor(*values), datetime, UUID)
+
+def test_decode_cursor_numeric_types():
+    """测试整数与浮点数排序键，布尔值不能当作数值"""
+    post_id = uuid4()
+    assert decode_cursor(encode_cursor(3, post_id), int, UUID) == [3, post_id]
+    assert decode_cursor(encode_cursor(1, post_id), float, UUID) == [1.0, post_id]
+    with pytest.raises(BadRequestException):
+        decode_cursor(encode_cursor(True, post_id), int, UUID)
+    with pytest.raises(BadRequestException):
+        decode_cursor(encode_cursor(1.5, post_id), int, UUID)
+
+@pytest.mark.asyncio
+async def test_keyset_pagination(db_session, seeded_cats):
+    """测试键集分页遍历所有猫咪且不重复"""
+    names = []
+    cursor = None
+    while True:
+        page, cursor = await CatService(db_session).get_cats_page(limit=2, cursor=cursor)
+        names.extend(cat.name for cat in page)
+        if cursor is None:
+            break
+    assert names == [f"Cat{i}" for i in range(5)]
+
+@pytest.mark.asyncio
+async def test_offset_pagination(db_session, seeded_cats):
+    """测试兼容的偏移分页"""
+    page, cursor = await CatService(db_session).get_cats_page(limit=2, skip=3)
+    assert [cat.name for cat in page] == ["Cat3", "Cat4"]
+    assert cursor is None
+
+@pytest.mark.asyncio
+async def test_list_cats_next_cursor_header(client, seeded_cats):
+    """测试列表接口通过响应头返回下一页游标"""
+    response = await client.get("/api/v1/cats", params={"limit": 3})
+    assert_response_ok(response)
+    assert len(response.json()) == 3
+    next_cursor = response.headers["X-Next-Cursor"]
+
+    response = await client.get("/api/v1/cats", params={"limit": 3, "cursor": next_cursor})
+    assert_response_ok(response)
+    assert [cat["name"] for cat in response.json()] == ["Cat3", "Cat4"]
+    assert "X-Next-Cursor" not in response.headers
+
+@pytest.mark.asyncio
+async def test_list_cats_invalid_cursor(client, seeded_cats):
+    """测试无效游标返回400"""
+    response = await client.get("/api/v1/cats", params={"cursor": "garbage"})
+    assert_response_error(response, status.HTTP_400_BAD_REQUEST)
+
+    # 格式正确但取值类型错误的游标同样返回400，而不是在数据库中出错
+    response = await client.get("/api/v1/cats", params={"cursor": encode_cursor({"a": 1}, "x")})
+    assert_response_error(response, status.HTTP_400_BAD_REQUEST)
+
+@pytest.mark.asyncio
+async def test_stream_cats(db_session, seeded_cats):
+    """测试服务端游标逐行读取"""
+    names = [cat.name async for cat in CatService(db_session).stream_cats(batch_size=2)]
+    assert names == [f"Cat{i}" for i in range(5)]
+
+@pytest.mark.asyncio
+async def test_export_cats_ndjson(client, seeded_cats):
+    """测试NDJSON流式导出"""
+    response = await client.get("/api/v1/cats/export", params={"format": "ndjson"})
+    assert_response_ok(response)
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.strip().split("\n")
+    assert len(lines) == 5
+    assert json.loads(lines[0])["name"] == "Cat0"
+
+@pytest.mark.asyncio
+async def test_export_cats_json_array(client, seeded_cats):
+    """测试JSON数组流式导出"""
+    response = await client.get("/api/v1/cats/export", params={"format": "json"})
+    assert_response_ok(response)
+    assert [cat["name"] for cat in response.json()] == [f"Cat{i}" for i in range(5)]
+
+@pytest.mark.asyncio
+async def test_export_cats_invalid_format(client):
+    """测试不支持的导出格式"""
+    response = await client.get("/api/v1/cats/export", params={"format": "xml"})
+    assert_response_error(response, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+@pytest.mark.asyncio
+async def test_filter_cats(seeded_cats, db_session, another_user):
+    """测试按主人、品种、出生日期与名称前缀过滤"""
+    db_session.add(DBCat(name="Mochi", breed="Siamese", owner_id=another_user.id))
+    await db_session.commit()
+
+    page, _ = await CatService(db_session).get_cats_page(owner_id=another_user.id)
+    assert [cat.name for cat in page] == ["Mochi"]
+
+    page, _ = await CatService(db_session).get_cats_page(breed="Tabby")
+    assert len(page) == 5
+
+    page, _ = await CatService(db_session).get_cats_page(born_after=date(2021, 1, 1), born_before=date(2023, 1, 1))
+    assert [cat.name for cat in page] == ["Cat1", "Cat2", "Cat3"]
+
+    page, _ = await CatService(db_session).get_cats_page(name="moc")
+    assert [cat.name for cat in page] == ["Mochi"]
+
+@pytest.mark.asyncio
+async def test_name_filter_escapes_wildcards(db_session, seeded_cats):
+    """测试名称前缀中的通配符按字面量匹配"""
+    page, _ = await CatService(db_session).get_cats_page(name="%")
+    assert page == []
+
+@pytest.mark.asyncio
+async def test_list_cats_filter_params(client, seeded_cats, test_user):
+    """测试列表接口的过滤参数"""
+    response = await client.get(
+        "/api/v1/cats",
+        params={"owner_id": str(test_user.id), "born_before": "2021-06-01", "name": "cat"}
+    )
+    assert_response_ok(response)
+    assert [cat["name"] for cat in response.json()] == ["Cat0", "Cat1"]
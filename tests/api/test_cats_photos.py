@@ -1,17 +1,15 @@
+import hashlib
+import os
 import pytest
+from uuid import uuid4
 from fastapi import status
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 @pytest.mark.asyncio
-async def test_upload_single_photo(db_session: AsyncSession, client, auth_headers, mocker):
+async def test_upload_single_photo(db_session: AsyncSession, client, auth_headers, test_cat, mocker):
     """测试上传单张照片"""
-    # Mock cat creation
-    cat_id = "123e4567-e89b-12d3-a456-426614174000"
-    mocker.patch(
-        "api.routers.cats.create_cat",
-        return_value={"id": cat_id, "name": "Cat with Photo"}
-    )
+    cat_id = str(test_cat.id)
     
     # 上传照片
     class FakeUploadFile:
@@ -35,14 +33,9 @@ async def test_upload_single_photo(db_session: AsyncSession, client, auth_header
     assert upload_res.json()["file_count"] == 1
 
 @pytest.mark.asyncio
-async def test_upload_multiple_photos(db_session: AsyncSession, client, auth_headers, mocker):
+async def test_upload_multiple_photos(db_session: AsyncSession, client, auth_headers, test_cat, mocker):
     """测试上传多张照片"""
-    # Mock cat creation
-    cat_id = "123e4567-e89b-12d3-a456-426614174000"
-    mocker.patch(
-        "api.routers.cats.create_cat",
-        return_value={"id": cat_id, "name": "Cat with Photos"}
-    )
+    cat_id = str(test_cat.id)
     
     files = [
         ('files', ('test1.jpg', b'fake-image-data-1', 'image/jpeg')),
@@ -57,14 +50,9 @@ async def test_upload_multiple_photos(db_session: AsyncSession, client, auth_hea
     assert upload_res.json()["file_count"] == 2
 
 @pytest.mark.asyncio
-async def test_upload_invalid_file_type(db_session: AsyncSession, client, auth_headers, mocker):
+async def test_upload_invalid_file_type(db_session: AsyncSession, client, auth_headers, test_cat, mocker):
     """测试上传无效文件类型"""
-    # Mock cat creation
-    cat_id = "123e4567-e89b-12d3-a456-426614174000"
-    mocker.patch(
-        "api.routers.cats.create_cat",
-        return_value={"id": cat_id, "name": "Cat with Invalid Photo"}
-    )
+    cat_id = str(test_cat.id)
     
     invalid_files = [
         ('test.txt', b'not-an-image', 'text/plain'),  # 文本文件
@@ -84,14 +72,9 @@ async def test_upload_invalid_file_type(db_session: AsyncSession, client, auth_h
         assert "Invalid file type" in upload_res.json()["detail"]
 
 @pytest.mark.asyncio
-async def test_upload_large_file(db_session: AsyncSession, client, auth_headers, mocker):
+async def test_upload_large_file(db_session: AsyncSession, client, auth_headers, test_cat, mocker):
     """测试上传超大文件"""
-    # Mock cat creation
-    cat_id = "123e4567-e89b-12d3-a456-426614174000"
-    mocker.patch(
-        "api.routers.cats.create_cat",
-        return_value={"id": cat_id, "name": "Cat with Large Photo"}
-    )
+    cat_id = str(test_cat.id)
     
     # 测试不同大小的文件 (API没有大小限制，所有都应返回200)
     file_sizes = [
@@ -112,13 +95,9 @@ async def test_upload_large_file(db_session: AsyncSession, client, auth_headers,
         assert upload_res.status_code == expected_status
 
 @pytest.mark.asyncio
-async def test_upload_photo_storage_failure(db_session: AsyncSession, client, auth_headers, mocker):
+async def test_upload_photo_storage_failure(db_session: AsyncSession, client, auth_headers, test_cat, mocker):
     """测试照片存储服务失败"""
-    cat_id = "123e4567-e89b-12d3-a456-426614174000"
-    mocker.patch(
-        "api.routers.cats.create_cat",
-        return_value={"id": cat_id, "name": "Cat with Photo"}
-    )
+    cat_id = str(test_cat.id)
 
     # 模拟存储服务抛出异常
     mocker.patch(
@@ -135,13 +114,9 @@ async def test_upload_photo_storage_failure(db_session: AsyncSession, client, au
     assert "Storage service unavailable" in upload_res.json()["detail"]
 
 @pytest.mark.asyncio
-async def test_upload_photo_disk_full(db_session: AsyncSession, client, auth_headers, mocker):
+async def test_upload_photo_disk_full(db_session: AsyncSession, client, auth_headers, test_cat, mocker):
     """测试磁盘空间不足"""
-    cat_id = "123e4567-e89b-12d3-a456-426614174000"
-    mocker.patch(
-        "api.routers.cats.create_cat",
-        return_value={"id": cat_id, "name": "Cat with Photo"}
-    )
+    cat_id = str(test_cat.id)
     
     # 模拟磁盘空间不足异常
     mocker.patch(
@@ -160,13 +135,9 @@ async def test_upload_photo_disk_full(db_session: AsyncSession, client, auth_hea
     assert "No space left on device" in upload_res.json()["detail"]
 
 @pytest.mark.asyncio
-async def test_upload_empty_filename(db_session: AsyncSession, client, auth_headers, mocker):
+async def test_upload_empty_filename(db_session: AsyncSession, client, auth_headers, test_cat, mocker):
     """测试上传空文件名"""
-    cat_id = "123e4567-e89b-12d3-a456-426614174000"
-    mocker.patch(
-        "api.routers.cats.create_cat",
-        return_value={"id": cat_id, "name": "Cat with Empty Filename"}
-    )
+    cat_id = str(test_cat.id)
     
     # 模拟空文件名异常
     mocker.patch(
@@ -202,3 +173,247 @@ async def test_upload_empty_filename(db_session: AsyncSession, client, auth_head
     error_str = str(error_detail)
     # 修改预期错误消息为实际返回的消息
     assert "There was an error parsing the body" in error_str
+
+@pytest.mark.asyncio
+async def test_upload_photo_persisted(client, auth_headers, test_cat, photo_storage):
+    """测试照片写入存储并出现在猫咪详情中"""
+    content = b'\xff\xd8' + b'x' * (200 * 1024)
+    upload_res = await client.post(
+        f"/api/v1/cats/{test_cat.id}/photos",
+        files={'files': ('cat.jpg', content, 'image/jpeg')},
+        headers={"Authorization": auth_headers["Authorization"]}
+    )
+    assert upload_res.status_code == status.HTTP_200_OK
+    photo_url = upload_res.json()["photos"][0]
+
+    cat_res = await client.get(f"/api/v1/cats/{test_cat.id}")
+    assert cat_res.status_code == status.HTTP_200_OK
+    assert cat_res.json()["photos"] == [photo_url]
+
+    photo_res = await client.get(photo_url)
+    assert photo_res.status_code == status.HTTP_200_OK
+    assert photo_res.content == content
+    assert photo_res.headers["content-type"] == "image/jpeg"
+
+@pytest.mark.asyncio
+async def test_upload_photo_unknown_cat(client, auth_headers):
+    """测试上传到不存在的猫咪"""
+    upload_res = await client.post(
+        f"/api/v1/cats/{uuid4()}/photos",
+        files={'files': ('cat.jpg', b'fake-image-data', 'image/jpeg')},
+        headers={"Authorization": auth_headers["Authorization"]}
+    )
+    assert upload_res.status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.asyncio
+async def test_delete_cat_removes_photo_files(client, auth_headers, test_cat, photo_storage):
+    """测试删除猫咪时清理照片文件"""
+    upload_res = await client.post(
+        f"/api/v1/cats/{test_cat.id}/photos",
+        files={'files': ('cat.png', b'fake-png', 'image/png')},
+        headers={"Authorization": auth_headers["Authorization"]}
+    )
+    photo_url = upload_res.json()["photos"][0]
+    stored = [p for p in os.listdir(photo_storage.root) if p != ".tmp"]
+    assert stored
+
+    delete_res = await client.delete(f"/api/v1/cats/{test_cat.id}", headers=auth_headers)
+    assert delete_res.status_code == status.HTTP_200_OK
+    for directory in stored:
+        assert os.listdir(os.path.join(photo_storage.root, directory)) == []
+    assert (await client.get(photo_url)).status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.asyncio
+async def test_duplicate_photos_share_blob(client, auth_headers, test_cat, photo_storage, db_session):
+    """测试相同内容只存储一份并累加引用计数"""
+    from sqlalchemy import select
+    from api.models.cat import DBPhotoBlob
+
+    content = b'same-image-bytes'
+    for _ in range(2):
+        upload_res = await client.post(
+            f"/api/v1/cats/{test_cat.id}/photos",
+            files={'files': ('cat.jpg', content, 'image/jpeg')},
+            headers={"Authorization": auth_headers["Authorization"]}
+        )
+        assert upload_res.status_code == status.HTTP_200_OK
+
+    blobs = (await db_session.execute(select(DBPhotoBlob))).scalars().all()
+    assert len(blobs) == 1
+    assert blobs[0].ref_count == 2
+    stored = [
+        name
+        for directory in os.listdir(photo_storage.root) if directory != ".tmp"
+        for name in os.listdir(os.path.join(photo_storage.root, directory))
+    ]
+    assert stored == [blobs[0].digest]
+
+    cat_res = await client.get(f"/api/v1/cats/{test_cat.id}")
+    assert len(cat_res.json()["photos"]) == 2
+
+@pytest.mark.asyncio
+async def test_shared_blob_survives_other_cat_delete(client, auth_headers, test_cat, photo_storage, db_session):
+    """测试删除猫咪时仍被其他猫咪引用的照片不会被删除"""
+    from sqlalchemy import select
+    from api.models.cat import DBCat, DBPhotoBlob
+
+    other = DBCat(name="Other", breed="Mix", owner_id=test_cat.owner_id, photo_records=[])
+    db_session.add(other)
+    await db_session.commit()
+
+    content = b'shared-image-bytes'
+    urls = []
+    for cat_id in (test_cat.id, other.id):
+        upload_res = await client.post(
+            f"/api/v1/cats/{cat_id}/photos",
+            files={'files': ('cat.jpg', content, 'image/jpeg')},
+            headers={"Authorization": auth_headers["Authorization"]}
+        )
+        urls.append(upload_res.json()["photos"][0])
+
+    delete_res = await client.delete(f"/api/v1/cats/{test_cat.id}", headers=auth_headers)
+    assert delete_res.status_code == status.HTTP_200_OK
+
+    blob = (await db_session.execute(select(DBPhotoBlob))).scalar_one()
+    await db_session.refresh(blob)
+    assert blob.ref_count == 1
+    photo_res = await client.get(urls[1])
+    assert photo_res.status_code == status.HTTP_200_OK
+    assert photo_res.content == content
+
+    delete_res = await client.delete(f"/api/v1/cats/{other.id}", headers=auth_headers)
+    assert delete_res.status_code == status.HTTP_200_OK
+    assert (await db_session.execute(select(DBPhotoBlob))).scalars().all() == []
+    assert not os.path.exists(photo_storage.local_path(blob.digest) or "")
+
+@pytest.mark.asyncio
+async def test_upload_generates_thumbnails(client, auth_headers, test_cat, photo_storage):
+    """测试上传后生成缩略图并可按尺寸下载"""
+    Image = pytest.importorskip("PIL.Image")
+    import io
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (1024, 768), color=(200, 120, 40)).save(buffer, "PNG")
+    upload_res = await client.post(
+        f"/api/v1/cats/{test_cat.id}/photos",
+        files={'files': ('cat.png', buffer.getvalue(), 'image/png')},
+        headers={"Authorization": auth_headers["Authorization"]}
+    )
+    assert upload_res.status_code == status.HTTP_200_OK
+    photo_url = upload_res.json()["photos"][0]
+
+    cat_res = await client.get(f"/api/v1/cats/{test_cat.id}")
+    thumbnails = cat_res.json()["thumbnails"]
+    assert thumbnails == {"128": [f"{photo_url}?size=128"], "512": [f"{photo_url}?size=512"]}
+
+    for size, expected in (("128", (128, 96)), ("512", (512, 384))):
+        thumb_res = await client.get(thumbnails[size][0])
+        assert thumb_res.status_code == status.HTTP_200_OK
+        assert thumb_res.headers["content-type"] == "image/webp"
+        assert Image.open(io.BytesIO(thumb_res.content)).size == expected
+
+    delete_res = await client.delete(f"/api/v1/cats/{test_cat.id}", headers=auth_headers)
+    assert delete_res.status_code == status.HTTP_200_OK
+    for directory in os.listdir(photo_storage.root):
+        if directory != ".tmp":
+            assert os.listdir(os.path.join(photo_storage.root, directory)) == []
+
+@pytest.mark.asyncio
+async def test_thumbnail_falls_back_to_original(client, auth_headers, test_cat):
+    """测试缩略图不可用时返回原图，不支持的尺寸返回400"""
+    upload_res = await client.post(
+        f"/api/v1/cats/{test_cat.id}/photos",
+        files={'files': ('cat.jpg', b'not-really-a-jpeg', 'image/jpeg')},
+        headers={"Authorization": auth_headers["Authorization"]}
+    )
+    photo_url = upload_res.json()["photos"][0]
+
+    photo_res = await client.get(f"{photo_url}?size=128")
+    assert photo_res.status_code == status.HTTP_200_OK
+    assert photo_res.content == b'not-really-a-jpeg'
+    assert photo_res.headers["content-type"] == "image/jpeg"
+
+    assert (await client.get(f"{photo_url}?size=64")).status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.asyncio
+async def test_photo_conditional_get(client, auth_headers, test_cat):
+    """测试照片的ETag、缓存头与304响应"""
+    content = b'conditional-image-bytes'
+    upload_res = await client.post(
+        f"/api/v1/cats/{test_cat.id}/photos",
+        files={'files': ('cat.jpg', content, 'image/jpeg')},
+        headers={"Authorization": auth_headers["Authorization"]}
+    )
+    photo_url = upload_res.json()["photos"][0]
+
+    photo_res = await client.get(photo_url)
+    etag = photo_res.headers["etag"]
+    assert etag == f'"{hashlib.sha256(content).hexdigest()}"'
+    assert photo_res.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert photo_res.headers["accept-ranges"] == "bytes"
+
+    cached_res = await client.get(photo_url, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert cached_res.status_code == status.HTTP_304_NOT_MODIFIED
+    assert cached_res.content == b''
+    assert cached_res.headers["etag"] == etag
+
+    stale_res = await client.get(photo_url, headers={"If-None-Match": '"other"'})
+    assert stale_res.status_code == status.HTTP_200_OK
+
+    head_res = await client.head(photo_url)
+    assert head_res.status_code == status.HTTP_200_OK
+    assert head_res.headers["content-length"] == str(len(content))
+
+@pytest.mark.asyncio
+async def test_photo_range_request(client, auth_headers, test_cat):
+    """测试按字节范围下载照片"""
+    content = bytes(range(256)) * 4
+    upload_res = await client.post(
+        f"/api/v1/cats/{test_cat.id}/photos",
+        files={'files': ('cat.png', content, 'image/png')},
+        headers={"Authorization": auth_headers["Authorization"]}
+    )
+    photo_url = upload_res.json()["photos"][0]
+
+    range_res = await client.get(photo_url, headers={"Range": "bytes=100-199"})
+    assert range_res.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert range_res.content == content[100:200]
+    assert range_res.headers["content-range"] == f"bytes 100-199/{len(content)}"
+
+    etag = range_res.headers["etag"]
+    resumed_res = await client.get(photo_url, headers={"Range": "bytes=1000-", "If-Range": etag})
+    assert resumed_res.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert resumed_res.content == content[1000:]
+
+    changed_res = await client.get(photo_url, headers={"Range": "bytes=1000-", "If-Range": '"other"'})
+    assert changed_res.status_code == status.HTTP_200_OK
+    assert changed_res.content == content
+
+    invalid_res = await client.get(photo_url, headers={"Range": f"bytes={len(content) + 10}-"})
+    assert invalid_res.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+@pytest.mark.asyncio
+async def test_upload_restores_object_removed_before_retain(client, auth_headers, test_cat, photo_storage, mocker):
+    """测试文件写入后、登记前被并发删除时，上传会在加锁后重新写入"""
+    original_save = photo_storage.save
+    calls = []
+
+    async def save_then_lose(file):
+        stored = await original_save(file)
+        calls.append(stored.key)
+        if len(calls) == 1:
+            # 模拟删除猫咪的请求在登记前移除了同一对象
+            await photo_storage.delete(stored.key)
+        return stored
+
+    mocker.patch.object(photo_storage, "save", side_effect=save_then_lose)
+    content = b'raced-image-bytes'
+    upload_res = await client.post(
+        f"/api/v1/cats/{test_cat.id}/photos",
+        files={'files': ('cat.jpg', content, 'image/jpeg')},
+        headers={"Authorization": auth_headers["Authorization"]}
+    )
+    assert upload_res.status_code == status.HTTP_200_OK
+    assert len(calls) == 2
+    photo_res = await client.get(upload_res.json()["photos"][0])
+    assert photo_res.content == content
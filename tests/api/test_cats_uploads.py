@@ -0,0 +1,112 @@
+import hashlib
+import os
+import pytest
+from uuid import uuid4
+from fastapi import status
+
+
+async def _create_upload(client, auth_headers, cat_id, **extra):
+    payload = {"filename": "big.jpg", "content_type": "image/jpeg", **extra}
+    res = await client.post(f"/api/v1/cats/{cat_id}/uploads", json=payload, headers=auth_headers)
+    assert res.status_code == status.HTTP_201_CREATED
+    return res.json()
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_flow(client, auth_headers, test_cat, photo_storage):
+    """测试分片上传、进度查询与完成"""
+    content = bytes(range(256)) * 300
+    chunks = [content[i:i + 30000] for i in range(0, len(content), 30000)]
+    upload = await _create_upload(client, auth_headers, test_cat.id, size=len(content))
+    assert upload["next_chunk"] == 0
+    base = f"/api/v1/cats/{test_cat.id}/uploads/{upload['upload_id']}"
+
+    for index, chunk in enumerate(chunks):
+        res = await client.put(f"{base}/chunks/{index}", content=chunk, headers=auth_headers)
+        assert res.status_code == status.HTTP_200_OK
+        assert res.json()["next_chunk"] == index + 1
+
+    progress = (await client.get(base, headers=auth_headers)).json()
+    assert progress["received_bytes"] == len(content)
+    assert progress["next_chunk"] == len(chunks)
+
+    complete_res = await client.post(f"{base}/complete", headers=auth_headers)
+    assert complete_res.status_code == status.HTTP_200_OK
+    photo_url = complete_res.json()["photos"][0]
+
+    photo_res = await client.get(photo_url)
+    assert photo_res.content == content
+    assert photo_res.headers["etag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+
+    cat_res = await client.get(f"/api/v1/cats/{test_cat.id}")
+    assert cat_res.json()["photos"] == [photo_url]
+    assert (await client.get(base, headers=auth_headers)).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_retry_and_order(client, auth_headers, test_cat):
+    """测试重复分片幂等确认、跳号分片返回409"""
+    upload = await _create_upload(client, auth_headers, test_cat.id)
+    base = f"/api/v1/cats/{test_cat.id}/uploads/{upload['upload_id']}"
+
+    assert (await client.put(f"{base}/chunks/0", content=b"first-", headers=auth_headers)).status_code == 200
+    skipped = await client.put(f"{base}/chunks/2", content=b"third", headers=auth_headers)
+    assert skipped.status_code == status.HTTP_409_CONFLICT
+    assert "Expected chunk 1" in skipped.json()["detail"]
+
+    retried = await client.put(f"{base}/chunks/0", content=b"first-", headers=auth_headers)
+    assert retried.status_code == status.HTTP_200_OK
+    assert retried.json()["received_bytes"] == len(b"first-")
+
+    assert (await client.put(f"{base}/chunks/1", content=b"second", headers=auth_headers)).status_code == 200
+    complete_res = await client.post(f"{base}/complete", headers=auth_headers)
+    photo_res = await client.get(complete_res.json()["photos"][0])
+    assert photo_res.content == b"first-second"
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_validation(client, auth_headers, test_cat, upload_manager):
+    """测试分片上传的参数校验"""
+    res = await client.post(
+        f"/api/v1/cats/{test_cat.id}/uploads",
+        json={"filename": "doc.pdf", "content_type": "application/pdf"},
+        headers=auth_headers
+    )
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    res = await client.post(
+        f"/api/v1/cats/{uuid4()}/uploads",
+        json={"content_type": "image/png"},
+        headers=auth_headers
+    )
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+
+    upload = await _create_upload(client, auth_headers, test_cat.id, size=10)
+    base = f"/api/v1/cats/{test_cat.id}/uploads/{upload['upload_id']}"
+    too_large = await client.put(
+        f"{base}/chunks/0",
+        content=b"x" * (upload_manager.max_chunk_size + 1),
+        headers=auth_headers
+    )
+    assert too_large.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    assert (await client.post(f"{base}/complete", headers=auth_headers)).status_code == 400
+    await client.put(f"{base}/chunks/0", content=b"12345", headers=auth_headers)
+    incomplete = await client.post(f"{base}/complete", headers=auth_headers)
+    assert incomplete.status_code == status.HTTP_400_BAD_REQUEST
+
+    other_cat = f"/api/v1/cats/{uuid4()}/uploads/{upload['upload_id']}"
+    assert (await client.get(other_cat, headers=auth_headers)).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_abort(client, auth_headers, test_cat, photo_storage):
+    """测试取消分片上传后删除已接收数据"""
+    upload = await _create_upload(client, auth_headers, test_cat.id)
+    base = f"/api/v1/cats/{test_cat.id}/uploads/{upload['upload_id']}"
+    await client.put(f"{base}/chunks/0", content=b"partial", headers=auth_headers)
+    assert os.path.exists(photo_storage._upload_path(upload["upload_id"]))
+
+    abort_res = await client.delete(base, headers=auth_headers)
+    assert abort_res.status_code == status.HTTP_204_NO_CONTENT
+    assert (await client.get(base, headers=auth_headers)).status_code == status.HTTP_404_NOT_FOUND
+    assert not os.path.exists(photo_storage._upload_path(upload["upload_id"]))
@@ -6,7 +6,8 @@ from api.database import (
     AsyncSessionLocal,
     create_tables,
     register_models,
-    get_db
+    get_db,
+    MeteredAsyncQueuePool
 )
 from api.config import settings
 from api.base import Base
@@ -21,6 +22,45 @@ async def test_database_connection_config():
     assert engine.url.database == settings.DB_NAME
     assert AsyncSessionLocal.kw["expire_on_commit"] is False
 
+def test_engine_pool_config():
+    """测试引擎按配置创建连接池且默认关闭SQL日志"""
+    assert engine.echo is settings.DB_ECHO is False
+    assert isinstance(engine.pool, MeteredAsyncQueuePool)
+    assert engine.pool.size() == settings.DB_POOL_SIZE
+    assert engine.pool._max_overflow == settings.DB_MAX_OVERFLOW
+    assert engine.pool._timeout == settings.DB_POOL_TIMEOUT
+    assert engine.pool._recycle == settings.DB_POOL_RECYCLE
+    assert engine.pool._pre_ping is settings.DB_POOL_PRE_PING
+
+@pytest.mark.asyncio
+async def test_metered_pool_records_checkout_wait():
+    """测试连接池记录取连接次数与超时"""
+    from sqlalchemy import text
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    test_engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=MeteredAsyncQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05
+    )
+    try:
+        async with test_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            with pytest.raises(PoolTimeoutError):
+                async with test_engine.connect():
+                    pass
+        stats = test_engine.pool.stats()
+        assert stats["checkouts"] == 1
+        assert stats["timeouts"] == 1
+        assert stats["checked_out"] == 0
+        assert stats["wait_seconds_max"] >= 0
+    finally:
+        await test_engine.dispose()
+    assert test_engine.pool.stats()["checkouts"] == 1
+
 @pytest.mark.asyncio
 async def test_session_creation():
     """测试会话创建和关闭"""
@@ -98,3 +138,22 @@ async def test_connection_failure():
         gen = get_db()
         with pytest.raises(Exception, match="Connection failed"):
             session = await gen.__anext__()
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client):
+    """测试指标接口输出连接池统计"""
+    response = await client.get("/api/v1/metrics")
+    assert response.status_code == 200
+    pool = response.json()["db_pool"]
+    assert pool["size"] == settings.DB_POOL_SIZE
+    assert {"checkouts", "timeouts", "wait_seconds_avg", "wait_seconds_max"} <= pool.keys()
+
+@pytest.mark.asyncio
+async def test_metrics_requires_admin(test_app, client):
+    """测试普通用户不能读取指标"""
+    from api.auth import get_admin_user
+
+    # 使用真实的管理员校验，当前用户为普通测试用户
+    test_app.dependency_overrides.pop(get_admin_user)
+    response = await client.get("/api/v1/metrics")
+    assert response.status_code == 403
@@ -1,4 +1,5 @@
 import pytest
+import pytest_asyncio
 from uuid import UUID, uuid4
 from fastapi import status
 from httpx import AsyncClient
@@ -39,6 +40,51 @@ class TestPostAPI:
         assert len(response.json()) > 0
         assert response.json()[0]["id"] == str(test_post.id)
 
+    @pytest.mark.asyncio
+    async def test_get_posts_paginated(self, client: AsyncClient, test_user, db_session):
+        """测试帖子列表按 new/top 排序的游标分页"""
+        from datetime import datetime, timedelta
+        from api.models.post import Post
+
+        base = datetime(2024, 1, 1)
+        posts = [
+            Post(title=f"帖子{i}", content="内容", author_id=test_user.id,
+                 created_at=base + timedelta(hours=i), likes=likes)
+            for i, likes in enumerate([5, 1, 5, 3, 0])
+        ]
+        db_session.add_all(posts)
+        await db_session.commit()
+
+        titles, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = await client.get("/api/v1/posts", params=params)
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.json()) <= 2
+            titles += [post["title"] for post in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert titles == ["帖子4", "帖子3", "帖子2", "帖子1", "帖子0"]
+
+        response = await client.get("/api/v1/posts", params={"sort": "top", "limit": 3})
+        top = response.json()
+        assert [post["likes"] for post in top] == [5, 5, 3]
+        # 点赞数相同时按id倒序保持稳定
+        tied = sorted((p for p in posts if p.likes == 5), key=lambda p: p.id, reverse=True)
+        assert [post["id"] for post in top[:2]] == [str(p.id) for p in tied]
+        top_cursor = response.headers["X-Next-Cursor"]
+
+        response = await client.get("/api/v1/posts", params={"sort": "top", "cursor": top_cursor})
+        assert [post["likes"] for post in response.json()] == [1, 0]
+        assert "X-Next-Cursor" not in response.headers
+
+        # 游标与排序方式不一致
+        response = await client.get("/api/v1/posts", params={"sort": "new", "cursor": top_cursor})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = await client.get("/api/v1/posts", params={"sort": "hot"})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
     @pytest.mark.asyncio
     async def test_get_post_by_id(self, client: AsyncClient, test_post, auth_headers):
         """测试获取单个帖子"""
@@ -342,3 +388,489 @@ class TestCommentAPI:
             headers=headers
         )
         assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+class TestPostPermissions:
+    """测试权限判断直接使用认证身份"""
+
+    @pytest.mark.asyncio
+    async def test_admin_principal_skips_user_lookup(self, db_session, test_post):
+        """测试管理员身份修改他人帖子时不查询用户表"""
+        from sqlalchemy import event
+        from api.principals import Principal
+        from api.services.post_service import PostService
+
+        admin = Principal(id=uuid4(), username="admin", is_admin=True)
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db_session.bind.sync_engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            updated = await PostService(db_session).update_post(
+                test_post.id,
+                PostUpdate(title="管理员标题", content="管理员内容"),
+                admin
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert updated.title == "管理员标题"
+        assert not any("FROM users" in statement for statement in statements)
+
+    @pytest.mark.asyncio
+    async def test_non_owner_principal_forbidden(self, db_session, test_post):
+        """测试非作者的普通用户无权删除帖子"""
+        from fastapi import HTTPException
+        from api.principals import Principal
+        from api.services.post_service import PostService
+
+        other = Principal(id=uuid4(), username="other")
+        with pytest.raises(HTTPException) as excinfo:
+            await PostService(db_session).delete_post(test_post.id, other)
+        assert excinfo.value.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestPostLoading:
+    """测试帖子查询的关系加载方式"""
+
+    @pytest.mark.asyncio
+    async def test_feed_does_not_touch_comments(self, db_session, test_post, test_comment):
+        """测试列表查询不加载评论，作者随帖子一次取回"""
+        from sqlalchemy import event
+        from api.services.post_service import PostService
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db_session.bind.sync_engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            posts, _ = await PostService(db_session).get_posts_page()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert len(statements) == 1
+        assert "comments" not in statements[0]
+        assert posts[0].author.username
+
+    @pytest.mark.asyncio
+    async def test_detail_includes_comments_on_request(self, client: AsyncClient, test_post, test_comment):
+        """测试详情只在 include_comments 时返回评论"""
+        response = await client.get(f"/api/v1/posts/{test_post.id}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["comments"] is None
+
+        response = await client.get(f"/api/v1/posts/{test_post.id}", params={"include_comments": True})
+        comments = response.json()["comments"]
+        assert [c["id"] for c in comments] == [str(test_comment.id)]
+        assert comments[0]["author"]["username"]
+
+    @pytest.mark.asyncio
+    async def test_implicit_relationship_load_raises(self, db_session, test_post):
+        """测试未声明加载方式的关系访问直接报错"""
+        from sqlalchemy.exc import InvalidRequestError
+        from api.models.post import Post
+
+        db_session.expunge_all()
+        post = (await db_session.execute(select(Post).where(Post.id == test_post.id))).scalar_one()
+        with pytest.raises(InvalidRequestError):
+            post.comments
+
+
+class TestPostStats:
+    """测试帖子的评论数与最后活跃时间"""
+
+    @pytest.mark.asyncio
+    async def test_comment_updates_stats(self, client: AsyncClient, test_post, db_session):
+        """测试增删评论时同步维护统计字段"""
+        before = (await client.get(f"/api/v1/posts/{test_post.id}")).json()
+        assert before["comment_count"] == 0
+
+        created = await client.post(f"/api/v1/posts/{test_post.id}/comments", json={"content": "第一条"})
+        await client.post(f"/api/v1/posts/{test_post.id}/comments", json={"content": "第二条"})
+        after = (await client.get(f"/api/v1/posts/{test_post.id}")).json()
+        assert after["comment_count"] == 2
+        assert after["last_activity_at"] >= created.json()["created_at"]
+        assert after["last_activity_at"] > before["last_activity_at"]
+
+        await client.delete(f"/api/v1/comments/{created.json()['id']}")
+        assert (await client.get(f"/api/v1/posts/{test_post.id}")).json()["comment_count"] == 1
+
+        missing = await client.post(f"/api/v1/posts/{uuid4()}/comments", json={"content": "x"})
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.asyncio
+    async def test_sort_by_comments_and_activity(self, client: AsyncClient, test_user):
+        """测试按评论数与最后活跃时间排序"""
+        ids = []
+        for i in range(3):
+            res = await client.post("/api/v1/posts", json={"title": f"帖子{i}", "content": "内容"})
+            ids.append(res.json()["id"])
+        for _ in range(2):
+            await client.post(f"/api/v1/posts/{ids[1]}/comments", json={"content": "顶"})
+        await client.post(f"/api/v1/posts/{ids[0]}/comments", json={"content": "顶"})
+
+        by_comments = (await client.get("/api/v1/posts", params={"sort": "comments"})).json()
+        assert [p["id"] for p in by_comments][:2] == [ids[1], ids[0]]
+
+        by_activity = (await client.get("/api/v1/posts", params={"sort": "active", "limit": 1})).json()
+        assert by_activity[0]["id"] == ids[0]
+
+    @pytest.mark.asyncio
+    async def test_backfill_stats(self, db_session, test_post, test_comment):
+        """测试回填统计字段"""
+        from api.models.post import Post
+        from api.services.post_service import PostService
+
+        # 夹具直接插入评论，未经过服务层维护统计
+        assert test_post.comment_count == 0
+        processed = await PostService(db_session).backfill_stats(batch_size=1)
+        assert processed == 1
+
+        db_session.expunge_all()
+        post = await db_session.get(Post, test_post.id)
+        assert post.comment_count == 1
+        assert post.last_activity_at == test_comment.created_at
+
+
+class TestPostLikes:
+    """测试点赞与取消点赞"""
+
+    @pytest.mark.asyncio
+    async def test_like_is_idempotent(self, client: AsyncClient, test_post):
+        """测试重复点赞/取消点赞不会重复计数"""
+        url = f"/api/v1/posts/{test_post.id}/like"
+        first = await client.post(url)
+        assert first.status_code == status.HTTP_200_OK
+        assert first.json() == {"post_id": str(test_post.id), "liked": True, "likes": 1}
+        assert (await client.post(url)).json()["likes"] == 1
+
+        assert (await client.delete(url)).json() == {"post_id": str(test_post.id), "liked": False, "likes": 0}
+        assert (await client.delete(url)).json()["likes"] == 0
+
+        missing = await client.post(f"/api/v1/posts/{uuid4()}/like")
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.asyncio
+    async def test_likes_from_many_users(self, db_session, test_post):
+        """测试计数通过 likes = likes + 1 累加，不依赖会话中的旧值"""
+        from api.models.post import Post
+        from api.models.user_model import DBUser
+        from api.services.post_service import PostService
+
+        users = [DBUser(username=f"fan_{i}", email=f"fan_{i}@example.com", hashed_password="x") for i in range(3)]
+        db_session.add_all(users)
+        await db_session.commit()
+
+        service = PostService(db_session)
+        for user in users:
+            await service.like_post(test_post.id, user.id)
+        await service.unlike_post(test_post.id, users[0].id)
+
+        db_session.expunge_all()
+        assert (await db_session.get(Post, test_post.id)).likes == 2
+
+    @pytest.mark.asyncio
+    async def test_like_buffer_coalesces_increments(self, db_session, test_post, test_user, another_user):
+        """测试写后缓冲合并增量后批量写入"""
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from api.models.post import Post
+        from api.services.like_buffer import LikeCounterBuffer
+        from api.services.post_service import PostService
+
+        buffer = LikeCounterBuffer(async_sessionmaker(bind=db_session.bind, expire_on_commit=False))
+        service = PostService(db_session, like_buffer=buffer)
+        await service.like_post(test_post.id, test_user.id)
+        status_ = await service.like_post(test_post.id, another_user.id)
+        # 返回值包含尚未写入的增量
+        assert status_.likes == 2
+        assert buffer.pending(test_post.id) == 2
+
+        db_session.expunge_all()
+        assert (await db_session.get(Post, test_post.id)).likes == 0
+
+        assert await buffer.flush() == 1
+        assert buffer.pending(test_post.id) == 0
+        assert await buffer.flush() == 0
+
+        db_session.expunge_all()
+        assert (await db_session.get(Post, test_post.id)).likes == 2
+        assert buffer.stats()["flushed_rows"] == 1
+
+    @pytest.mark.asyncio
+    async def test_like_buffer_keeps_deltas_on_failure(self, mocker):
+        """测试写入失败时增量保留到下一次刷新"""
+        from api.services.like_buffer import LikeCounterBuffer
+
+        failing = mocker.MagicMock(side_effect=RuntimeError("db down"))
+        buffer = LikeCounterBuffer(failing)
+        post_id = uuid4()
+        buffer.add(post_id, 1)
+        with pytest.raises(RuntimeError):
+            await buffer.flush()
+        assert buffer.pending(post_id) == 1
+        assert buffer.stats()["failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_like_buffer_flush_invalidates_cache(self, db_session, test_post, test_user):
+        """测试点赞计数刷新后清除帖子缓存，再次读取得到新的计数"""
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from api.cache import LRUResponseCache
+        from api.services.like_buffer import LikeCounterBuffer
+        from api.services.post_service import PostService
+
+        cache = LRUResponseCache()
+        buffer = LikeCounterBuffer(async_sessionmaker(bind=db_session.bind, expire_on_commit=False), cache=cache)
+        service = PostService(db_session, like_buffer=buffer, cache=cache)
+        assert (await service.get_post(test_post.id)).likes == 0
+
+        await service.like_post(test_post.id, test_user.id)
+        # 刷新前重新读取，缓存中仍是数据库里的旧计数
+        assert (await service.get_post(test_post.id)).likes == 0
+
+        await buffer.flush()
+        assert (await service.get_post(test_post.id)).likes == 1
+
+class TestCommentThreads:
+    """测试评论分页与一层回复"""
+
+    @pytest.mark.asyncio
+    async def test_comments_paginated(self, client: AsyncClient, test_post):
+        """测试顶层评论按时间正序游标分页"""
+        base = f"/api/v1/posts/{test_post.id}/comments"
+        created = [
+            (await client.post(base, json={"content": f"评论{i}"})).json()["id"]
+            for i in range(5)
+        ]
+
+        ids, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = await client.get(base, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            ids += [comment["id"] for comment in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert ids == created
+
+    @pytest.mark.asyncio
+    async def test_replies(self, client: AsyncClient, test_post, db_session):
+        """测试回复只出现在父评论的回复列表中，删除父评论时一并删除"""
+        base = f"/api/v1/posts/{test_post.id}/comments"
+        parent = (await client.post(base, json={"content": "楼主"})).json()
+        reply = (await client.post(base, json={"content": "回复", "parent_id": parent["id"]})).json()
+        assert reply["parent_id"] == parent["id"]
+        # 回复的回复挂到同一条顶层评论下
+        nested = (await client.post(base, json={"content": "再回复", "parent_id": reply["id"]})).json()
+        assert nested["parent_id"] == parent["id"]
+
+        top = (await client.get(base)).json()
+        assert [c["id"] for c in top] == [parent["id"]]
+        replies = (await client.get(base, params={"parent_id": parent["id"], "limit": 1}))
+        assert [c["id"] for c in replies.json()] == [reply["id"]]
+        more = await client.get(
+            base,
+            params={"parent_id": parent["id"], "cursor": replies.headers["X-Next-Cursor"]}
+        )
+        assert [c["id"] for c in more.json()] == [nested["id"]]
+
+        other_post = (await client.post("/api/v1/posts", json={"title": "另一帖", "content": "内容"})).json()
+        bad = await client.post(
+            f"/api/v1/posts/{other_post['id']}/comments",
+            json={"content": "串楼", "parent_id": parent["id"]}
+        )
+        assert bad.status_code == status.HTTP_400_BAD_REQUEST
+
+        assert (await client.get(f"/api/v1/posts/{test_post.id}")).json()["comment_count"] == 3
+        await client.delete(f"/api/v1/comments/{parent['id']}")
+        assert (await client.get(base, params={"parent_id": parent["id"]})).json() == []
+        assert (await client.get(f"/api/v1/posts/{test_post.id}")).json()["comment_count"] == 0
+
+
+class TestPostSearch:
+    """测试帖子全文检索（SQLite FTS5）"""
+
+    @pytest.mark.asyncio
+    async def test_search_ranking_and_highlight(self, client: AsyncClient):
+        """测试标题命中排在正文命中之前，高亮内容已转义"""
+        body_hit = (await client.post(
+            "/api/v1/posts",
+            json={"title": "Weekend notes", "content": "The tabby <b>kitten</b> slept all day"}
+        )).json()
+        title_hit = (await client.post(
+            "/api/v1/posts",
+            json={"title": "Kitten adoption", "content": "Looking for a home"}
+        )).json()
+        await client.post("/api/v1/posts", json={"title": "Unrelated", "content": "Dogs only"})
+
+        response = await client.get("/api/v1/posts/search", params={"q": "kitten"})
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()
+        assert [r["id"] for r in results] == [title_hit["id"], body_hit["id"]]
+        assert results[0]["rank"] >= results[1]["rank"]
+        assert results[0]["title_highlight"] == "<mark>Kitten</mark> adoption"
+        assert "&lt;b&gt;<mark>kitten</mark>&lt;/b&gt;" in results[1]["content_highlight"]
+
+    @pytest.mark.asyncio
+    async def test_search_comments_and_updates(self, client: AsyncClient, test_post):
+        """测试评论命中与帖子修改后索引同步"""
+        await client.post(f"/api/v1/posts/{test_post.id}/comments", json={"content": "Such a fluffy cat"})
+        results = (await client.get("/api/v1/posts/search", params={"q": "fluffy"})).json()
+        assert [r["id"] for r in results] == [str(test_post.id)]
+        assert results[0]["comment_highlight"] == "Such a <mark>fluffy</mark> cat"
+        assert results[0]["title_highlight"] is None
+
+        await client.put(f"/api/v1/posts/{test_post.id}", json={"title": "Renamed", "content": "Siamese"})
+        assert (await client.get("/api/v1/posts/search", params={"q": "siamese"})).json()[0]["id"] == str(test_post.id)
+        await client.delete(f"/api/v1/posts/{test_post.id}")
+        assert (await client.get("/api/v1/posts/search", params={"q": "siamese"})).json() == []
+
+    @pytest.mark.asyncio
+    async def test_search_paginated(self, client: AsyncClient):
+        """测试检索结果游标分页，特殊字符不会导致查询报错"""
+        created = {
+            (await client.post("/api/v1/posts", json={"title": f"Cat {i}", "content": "whiskers"})).json()["id"]
+            for i in range(5)
+        }
+        ids, cursor = [], None
+        while True:
+            params = {"q": 'whiskers" (*', "limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = await client.get("/api/v1/posts/search", params=params)
+            assert response.status_code == status.HTTP_200_OK
+            ids += [r["id"] for r in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert len(ids) == 5 and set(ids) == created
+
+        assert (await client.get("/api/v1/posts/search", params={"q": "!!!"})).json() == []
+        assert (await client.get("/api/v1/posts/search")).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestContentOffload:
+    """测试帖子与评论正文外置存储"""
+
+    @pytest_asyncio.fixture
+    async def content_store(self, test_app):
+        from api.services.content_store import MemoryContentStore, get_content_store
+        store = MemoryContentStore(offload_threshold=20, excerpt_length=8)
+        test_app.dependency_overrides[get_content_store] = lambda: store
+        return store
+
+    @pytest.mark.asyncio
+    async def test_long_bodies_offloaded(self, client: AsyncClient, db_session, content_store):
+        """测试长正文只在数据库保留摘要，每页批量取回一次"""
+        long_body = "A long story about a cat. " * 10
+        created = [
+            (await client.post("/api/v1/posts", json={"title": f"帖子{i}", "content": long_body})).json()
+            for i in range(3)
+        ]
+        short = (await client.post("/api/v1/posts", json={"title": "短帖", "content": "短"})).json()
+        assert created[0]["content"] == long_body
+
+        rows = {
+            str(row.id): row
+            for row in (await db_session.execute(select(Post).execution_options(populate_existing=True))).scalars()
+        }
+        assert rows[created[0]["id"]].content_external is True
+        assert rows[created[0]["id"]].content == "A long s…"
+        assert rows[short["id"]].content_external is False
+
+        fetches = content_store.fetches
+        posts = (await client.get("/api/v1/posts")).json()
+        assert content_store.fetches == fetches + 1
+        assert {p["content"] for p in posts} == {long_body, "短"}
+
+        # 修改长正文时写入新文档并删除旧文档，改为短正文后不再有外置文档
+        post_id = created[0]["id"]
+        edited = long_body + "Edited."
+        await client.put(f"/api/v1/posts/{post_id}", json={"title": "改", "content": edited})
+        assert await content_store.get_many("posts_content", [UUID(post_id)]) == {}
+        assert (await client.get(f"/api/v1/posts/{post_id}")).json()["content"] == edited
+        await client.put(f"/api/v1/posts/{post_id}", json={"title": "改", "content": "短正文"})
+        assert len(content_store._collections["posts_content"]) == 2
+        assert (await client.get(f"/api/v1/posts/{post_id}")).json()["content"] == "短正文"
+
+    @pytest.mark.asyncio
+    async def test_comment_bodies_offloaded(self, client: AsyncClient, test_post, content_store):
+        """测试评论正文外置，删除帖子时一并删除外置文档"""
+        long_body = "Lots of thoughts on whiskers " * 5
+        base = f"/api/v1/posts/{test_post.id}/comments"
+        comment = (await client.post(base, json={"content": long_body})).json()
+        assert comment["content"] == long_body
+        await client.post(base, json={"content": "ok"})
+
+        comments = (await client.get(base)).json()
+        assert [c["content"] for c in comments] == [long_body, "ok"]
+        detail = (await client.get(f"/api/v1/posts/{test_post.id}", params={"include_comments": True})).json()
+        assert detail["comments"][0]["content"] == long_body
+
+        await client.delete(f"/api/v1/posts/{test_post.id}")
+        assert await content_store.get_many("comments_content", [UUID(comment["id"])]) == {}
+
+    @pytest.mark.asyncio
+    async def test_offload_before_post_row_update(self, db_session, test_post, test_user):
+        """测试外置正文在更新帖子计数之前写入，帖子不存在时删除已写入的正文"""
+        from sqlalchemy import event
+        from api.services.content_store import MemoryContentStore
+        from api.services.post_service import PostService
+
+        events = []
+        store = MemoryContentStore(offload_threshold=5, excerpt_length=3)
+        original_put = store._put
+
+        async def put(collection, docs):
+            events.append("put")
+            await original_put(collection, docs)
+
+        store._put = put
+
+        def before_execute(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("UPDATE POSTS"):
+                events.append("update")
+
+        engine = db_session.bind.sync_engine
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            service = PostService(db_session, content_store=store)
+            await service.create_comment(test_post.id, CommentCreate(content="long comment body"), test_user.id)
+            assert events == ["put", "update"]
+
+            with pytest.raises(Exception):
+                await service.create_comment(uuid4(), CommentCreate(content="another long body"), test_user.id)
+            assert store.stats()["writes"] == 2
+            assert sum(len(docs) for docs in store._collections.values()) == 1
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+
+    @pytest.mark.asyncio
+    async def test_update_commit_failure_keeps_body(self, db_session, test_user, mocker):
+        """测试修改帖子时提交失败，数据库仍指向原正文且新文档被删除"""
+        from api.principals import Principal
+        from api.services.content_store import MemoryContentStore
+        from api.services.post_service import PostService
+
+        store = MemoryContentStore(offload_threshold=5, excerpt_length=3)
+        service = PostService(db_session, content_store=store)
+        post = await service.create_post(PostCreate(title="帖子", content="original long body"), test_user.id)
+        principal = Principal.from_user(test_user)
+
+        original_commit = db_session.commit
+        mocker.patch.object(db_session, "commit", side_effect=RuntimeError("commit failed"))
+        with pytest.raises(RuntimeError):
+            await service.update_post(post.id, PostUpdate(title="帖子", content="replacement long body"), principal)
+        mocker.patch.object(db_session, "commit", original_commit)
+
+        row = (await db_session.execute(
+            select(Post).where(Post.id == UUID(post.id)).execution_options(populate_existing=True)
+        )).scalar_one()
+        assert row.content_key is None
+        assert await service._fetch_bodies("posts_content", [row]) == {row.id: "original long body"}
+        assert list(store._collections["posts_content"].values()) == ["original long body"]
+
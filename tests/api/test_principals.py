@@ -0,0 +1,186 @@
+import pytest
+from uuid import uuid4
+from fastapi import HTTPException, status
+from api.auth import create_access_token, get_current_user
+from api.models.user_model import DBUser
+from api.principals import Principal, PrincipalCache, principal_cache
+
+
+def _principal(username="testuser"):
+    return Principal(id=uuid4(), username=username)
+
+
+def test_cache_lru_eviction():
+    """测试超过容量时淘汰最久未使用的条目"""
+    cache = PrincipalCache(maxsize=2, ttl=60)
+    a, b, c = _principal("a"), _principal("b"), _principal("c")
+    cache.set("a", a)
+    cache.set("b", b)
+    assert cache.get("a") is a
+    cache.set("c", c)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is a
+    assert cache.get("c") is c
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_cache_ttl_expiry(mocker):
+    """测试条目过期后重新查询"""
+    now = [1000.0]
+    mocker.patch("api.principals.time.monotonic", side_effect=lambda: now[0])
+    cache = PrincipalCache(maxsize=10, ttl=30)
+    principal = _principal()
+    cache.set("testuser", principal)
+    assert cache.get("testuser") is principal
+
+    now[0] += 31
+    assert cache.get("testuser") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_cache_invalidate_user():
+    """测试按用户ID清除全部条目"""
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    principal = _principal()
+    other = _principal("other")
+    cache.set("testuser", principal)
+    cache.set("other", other)
+
+    cache.invalidate_user(str(principal.id))
+    assert cache.get("testuser") is None
+    assert cache.get("other") is other
+    assert cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_uses_cache(db_session, test_user, mocker):
+    """测试第二次认证直接命中缓存，不查询数据库"""
+    token = create_access_token(data={"sub": test_user.username})
+    lookup = mocker.spy(DBUser, "get_by_username")
+
+    first = await get_current_user(token, db_session)
+    second = await get_current_user(token, db_session)
+
+    assert first == second == Principal.from_user(test_user)
+    assert lookup.call_count == 1
+    assert principal_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_rejects_disabled(db_session, test_user):
+    """测试禁用的用户被拒绝，修改后缓存失效"""
+    token = create_access_token(data={"sub": test_user.username})
+    await get_current_user(token, db_session)
+
+    test_user.disabled = True
+    await db_session.commit()
+    principal_cache.invalidate_user(test_user.id)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await get_current_user(token, db_session)
+    assert excinfo.value.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_user_service_delete_invalidates_cache(db_session, test_user):
+    """测试通过UserService删除用户时清除缓存"""
+    from api.services.user_service import UserService
+
+    principal_cache.set(test_user.username, Principal.from_user(test_user))
+    await UserService(db_session).delete_user(test_user.id)
+    assert principal_cache.get(test_user.username) is None
+
+
+@pytest.mark.asyncio
+async def test_claims_token_needs_no_lookup(db_session, test_user, mocker):
+    """测试带 uid/adm/tv 声明的令牌不查询数据库"""
+    principal = Principal.from_user(test_user)
+    token = create_access_token(data=principal.claims())
+    lookup = mocker.spy(DBUser, "get_by_username")
+
+    assert await get_current_user(token, db_session) == principal
+    assert lookup.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_password_change_revokes_claims_token(db_session, test_user, mocker):
+    """测试修改密码后旧版本令牌被拒绝，新版本令牌可用"""
+    from api.models.user import UserInDB, UserUpdate
+    from api.security import password_hasher
+    from api.services.user_service import UserService
+
+    token = create_access_token(data=Principal.from_user(test_user).claims())
+    mocker.patch.object(password_hasher, "hash", return_value="$2b$12$newhash")
+    current_user = await UserInDB.get_by_id(test_user.id, db_session)
+    await UserService(db_session).update_user(
+        test_user.id,
+        UserUpdate(password="newpassword123"),
+        current_user
+    )
+
+    with pytest.raises(HTTPException) as excinfo:
+        await get_current_user(token, db_session)
+    assert excinfo.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+    await db_session.refresh(test_user)
+    assert test_user.token_version == 1
+    assert test_user.hashed_password == "$2b$12$newhash"
+    new_token = create_access_token(data=Principal.from_user(test_user).claims())
+    assert (await get_current_user(new_token, db_session)).token_version == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("change", [{"disabled": True}, {"is_admin": True}])
+async def test_admin_update_revokes_claims_token(db_session, test_user, change):
+    """测试管理员修改权限或禁用状态后，带旧声明的令牌被拒绝"""
+    from api.models.user import UserUpdate
+    from api.services.user_service import UserService
+
+    token = create_access_token(data=Principal.from_user(test_user).claims())
+    updated = await UserService(db_session).admin_update_user(test_user.id, UserUpdate(**change))
+
+    assert updated.token_version == 1
+    for field, value in change.items():
+        assert getattr(updated, field) == value
+    with pytest.raises(HTTPException) as excinfo:
+        await get_current_user(token, db_session)
+    assert excinfo.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_admin_update_profile_keeps_tokens(db_session, test_user):
+    """测试只修改资料或设置为原值时不吊销令牌"""
+    from api.models.user import UserUpdate
+    from api.services.user_service import UserService
+
+    token = create_access_token(data=Principal.from_user(test_user).claims())
+    updated = await UserService(db_session).admin_update_user(
+        test_user.id,
+        UserUpdate(full_name="Renamed", is_admin=bool(test_user.is_admin))
+    )
+
+    assert updated.full_name == "Renamed"
+    assert updated.token_version == 0
+    assert (await get_current_user(token, db_session)).id == test_user.id
+
+
+@pytest.mark.asyncio
+async def test_admin_update_invalidates_cache(db_session, test_user):
+    """测试管理员禁用用户后，旧令牌不再命中缓存的身份"""
+    from api.models.user import UserUpdate
+    from api.services.user_service import UserService
+
+    token = create_access_token(data={"sub": test_user.username})
+    await get_current_user(token, db_session)
+    await UserService(db_session).admin_update_user(test_user.id, UserUpdate(disabled=True))
+
+    assert principal_cache.get(test_user.username) is None
+    with pytest.raises(HTTPException) as excinfo:
+        await get_current_user(token, db_session)
+    assert excinfo.value.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import pytest
+from api.security import PasswordHasher, build_crypt_context
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(build_crypt_context(bcrypt_rounds=4), max_workers=2)
+    yield hasher
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify(hasher):
+    """测试哈希与校验在线程池中完成"""
+    hashed = await hasher.hash("securepassword123")
+    assert hashed.startswith("$2b$")
+    assert await hasher.verify("securepassword123", hashed)
+    assert not await hasher.verify("wrongpassword", hashed)
+    # 无法识别的哈希格式不抛异常
+    assert not await hasher.verify("securepassword123", "plaintext")
+
+    stats = hasher.stats()
+    assert stats["completed"] == 4
+    assert stats["queued"] == 0
+    assert stats["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hashing_does_not_block_event_loop(hasher, mocker):
+    """测试哈希计算不占用事件循环线程，并发受线程数限制"""
+    release = threading.Event()
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def slow_hash(password):
+        threads.append(threading.get_ident())
+        release.wait(timeout=5)
+        return f"hashed-{password}"
+
+    mocker.patch.object(hasher.context, "hash", side_effect=slow_hash)
+    tasks = [asyncio.create_task(hasher.hash(str(i))) for i in range(5)]
+
+    # 工作线程阻塞期间事件循环仍可调度其他协程
+    for _ in range(50):
+        if hasher.stats()["active"] == 2:
+            break
+        await asyncio.sleep(0.01)
+    stats = hasher.stats()
+    assert stats["active"] == 2
+    assert stats["queued"] == 3
+    assert stats["max_queue_depth"] >= 3
+
+    release.set()
+    assert await asyncio.gather(*tasks) == [f"hashed-{i}" for i in range(5)]
+    assert loop_thread not in threads
+    assert hasher.stats()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_include_password_hasher(client):
+    """测试指标接口输出密码哈希队列统计"""
+    response = await client.get("/api/v1/metrics")
+    assert {"queued", "active", "max_queue_depth"} <= response.json()["password_hasher"].keys()
+
+
+@pytest.mark.asyncio
+async def test_verify_and_update_upgrades_cost(hasher):
+    """测试成本参数调整后校验时返回升级后的哈希"""
+    old_hash = await hasher.hash("securepassword123")
+    upgraded = PasswordHasher(build_crypt_context(bcrypt_rounds=5), max_workers=1)
+    try:
+        valid, new_hash = await upgraded.verify_and_update("securepassword123", old_hash)
+        assert valid
+        assert new_hash.startswith("$2b$05$")
+        assert await upgraded.verify_and_update("securepassword123", new_hash) == (True, None)
+        assert await upgraded.verify_and_update("wrongpassword", old_hash) == (False, None)
+    finally:
+        upgraded.shutdown()
+
+
+def test_shared_context_uses_settings():
+    """测试共享哈希上下文按配置创建"""
+    from api.config import settings
+    from api.security import password_hasher, pwd_context
+
+    assert password_hasher.context is pwd_context
+    assert pwd_context.default_scheme() == settings.PASSWORD_SCHEMES[0]
+
+
+def test_argon2_requires_backend(mocker):
+    """测试未安装argon2后端时给出明确错误"""
+    from passlib.hash import argon2
+
+    mocker.patch.object(argon2, "has_backend", return_value=False)
+    with pytest.raises(RuntimeError):
+        build_crypt_context(schemes=["argon2", "bcrypt"])
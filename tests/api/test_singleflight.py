@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+
+from api.services.post_service import PostService, post_flights
+from api.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_load():
+    """测试并发的相同请求只执行一次加载，完成后再次请求重新加载"""
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"calls": calls}
+
+    waiters = [asyncio.create_task(flights.do(("a", 1), load)) for _ in range(5)]
+    other = asyncio.create_task(flights.do(("b", 1), load))
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert calls == 2
+    assert all(result is results[0] for result in results)
+    assert (await other)["calls"] == 2
+    assert await flights.do(("a", 1), load) == {"calls": 3}
+    assert flights.stats()["followers"] == 4
+    assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_and_cancellation():
+    """测试异常传给所有等待者，单个等待者取消不影响其他等待者"""
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise ValueError("boom")
+
+    waiters = [asyncio.create_task(flights.do(("a",), failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    waiters[0].cancel()
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert all(isinstance(result, ValueError) for result in results[1:])
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_handed_over():
+    """测试发起者被取消时中止自己的加载，等待者用自己的加载接手"""
+    flights = SingleFlight()
+    release = asyncio.Event()
+    sessions = []
+
+    def load_with(session):
+        async def load():
+            sessions.append(session)
+            await release.wait()
+            return session
+        return load
+
+    leader = asyncio.create_task(flights.do(("a",), load_with("leader")))
+    follower = asyncio.create_task(flights.do(("a",), load_with("follower")))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "follower"
+    assert leader.cancelled()
+    assert sessions == ["leader", "follower"]
+    assert flights.stats()["takeovers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_forget_starts_new_load():
+    """测试实体修改后新请求不再加入修改前开始的加载"""
+    flights = SingleFlight()
+    release = asyncio.Event()
+    versions = iter(["old", "new"])
+
+    async def load():
+        value = next(versions)
+        await release.wait()
+        return value
+
+    before = asyncio.create_task(flights.do(("a", "detail"), load))
+    await asyncio.sleep(0)
+    flights.forget("a")
+    after = asyncio.create_task(flights.do(("a", "detail"), load))
+    await asyncio.sleep(0)
+    # 修改前开始的加载结束时代数已变化
+    assert flights.generation("a") == 1
+    release.set()
+    assert (await before, await after) == ("old", "new")
+    assert flights.generation("a") == 0
+
+
+@pytest.mark.asyncio
+async def test_get_post_coalesced(db_session, test_post, mocker):
+    """测试同一帖子的并发详情请求共用一次查询"""
+    load = mocker.spy(PostService, "_load_post")
+    service = PostService(db_session)
+    leaders = post_flights.leaders
+    results = await asyncio.gather(*(service.get_post(test_post.id) for _ in range(3)))
+
+    assert load.call_count == 1
+    assert post_flights.leaders == leaders + 1
+    assert all(result.id == str(test_post.id) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_stale_load_not_cached(db_session, test_post, monkeypatch):
+    """测试加载期间帖子被修改时，旧结果不写入缓存"""
+    from api.cache import LRUResponseCache
+
+    cache = LRUResponseCache()
+    service = PostService(db_session, cache=cache)
+    original = PostService._fetch_bodies
+
+    async def invalidate_midway(self, collection, rows):
+        await self._invalidate(test_post.id)
+        return await original(self, collection, rows)
+
+    monkeypatch.setattr(PostService, "_fetch_bodies", invalidate_midway)
+    await service.get_post(test_post.id)
+    assert cache.stats()["size"] == 0
+
+    monkeypatch.setattr(PostService, "_fetch_bodies", original)
+    await service.get_post(test_post.id)
+    assert cache.stats()["size"] == 1
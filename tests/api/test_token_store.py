@@ -0,0 +1,44 @@
+import time
+import pytest
+from uuid import uuid4
+
+from api.token_store import MemoryRevocationStore, build_revocation_store
+
+
+@pytest.mark.asyncio
+async def test_revoke_token_until_expiry():
+    """测试按 jti 吊销，令牌过期后记录被清理"""
+    store = MemoryRevocationStore()
+    user_id = uuid4()
+    await store.revoke_token("live", time.time() + 60)
+    await store.revoke_token("expired", time.time() - 1)
+
+    assert await store.is_revoked("live", user_id, 0)
+    assert not await store.is_revoked("expired", user_id, 0)
+    assert not await store.is_revoked("other", user_id, 0)
+    assert not await store.is_revoked(None, user_id, 0)
+
+    # 下一次写入时清理已过期的记录
+    await store.revoke_token("next", time.time() + 60)
+    assert store.stats()["revoked_tokens"] == 2
+
+
+@pytest.mark.asyncio
+async def test_revoke_user_before_version():
+    """测试按用户吊销旧版本令牌，版本只增不减"""
+    store = MemoryRevocationStore()
+    user_id = uuid4()
+    await store.revoke_user_before(str(user_id), 2)
+    await store.revoke_user_before(user_id, 1)
+
+    assert await store.is_revoked(None, user_id, 1)
+    assert not await store.is_revoked(None, user_id, 2)
+    assert not await store.is_revoked(None, uuid4(), 0)
+
+    await store.clear()
+    assert not await store.is_revoked(None, user_id, 1)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        build_revocation_store("memcached")
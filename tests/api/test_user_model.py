@@ -148,7 +148,7 @@ async def test_user_authentication_success(mock_db_session, sample_user_data):
         mock_db_session
     )
     assert user is not None
-    assert UserInDB.verify_password("testpassword123", user.hashed_password)
+    assert await UserInDB.verify_password("testpassword123", user.hashed_password)
 
 @pytest.mark.asyncio
 async def test_user_authentication_failure(mock_db_session):
@@ -1,10 +1,11 @@
 import pytest
 from fastapi import status
 from uuid import UUID
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 from api.services.user_service import UserService
 from api.models.user import UserInDB, UserCreate, UserUpdate
-from passlib.context import CryptContext
+from api.security import password_hasher
+from api.token_store import get_revocation_store
 
 class TestUserService:
     @pytest.mark.asyncio
@@ -29,13 +30,11 @@ class TestUserService:
         )
         mocker.patch.object(UserInDB, "save", return_value=mock_user)
         
-        # Mock passlib的CryptContext
-        mock_pwd_context = mocker.MagicMock()
-        mock_pwd_context.hash.return_value = "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW"
-        mock_pwd_context.verify.return_value = True
-        mocker.patch(
-            "passlib.context.CryptContext",
-            return_value=mock_pwd_context
+        # Mock密码哈希服务
+        mock_hash = mocker.patch.object(
+            password_hasher,
+            "hash",
+            return_value="$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW"
         )
         
         # 测试
@@ -46,6 +45,7 @@ class TestUserService:
         assert created_user.username == user_data.username
         assert created_user.hashed_password != test_password  # 密码应被哈希
         assert created_user.hashed_password.startswith("$2b$")  # bcrypt哈希格式
+        mock_hash.assert_awaited_once_with(test_password)
 
     @pytest.mark.asyncio
     async def test_authenticate_user_success(self, mocker):
@@ -63,13 +63,8 @@ class TestUserService:
         )
         mocker.patch.object(UserInDB, "get", return_value=mock_user)
         
-        # Mock passlib的CryptContext
-        mock_pwd_context = mocker.MagicMock()
-        mock_pwd_context.verify.return_value = True
-        mocker.patch(
-            "passlib.context.CryptContext",
-            return_value=mock_pwd_context
-        )
+        # Mock密码哈希服务
+        mock_verify = mocker.patch.object(password_hasher, "verify_and_update", return_value=(True, None))
         
         # 测试
         service = UserService(mock_db)
@@ -81,7 +76,7 @@ class TestUserService:
         # 验证
         assert authenticated_user is not None
         assert authenticated_user.username == "testuser"
-        mock_pwd_context.verify.assert_called_once_with(test_password, mock_user.hashed_password)
+        mock_verify.assert_awaited_once_with(test_password, mock_user.hashed_password)
 
     @pytest.mark.asyncio
     async def test_authenticate_user_failure(self, mocker):
@@ -100,6 +95,30 @@ class TestUserService:
         # 验证
         assert authenticated_user is None
 
+    @pytest.mark.asyncio
+    async def test_authenticate_user_rehashes_outdated_hash(self, mocker):
+        """测试登录成功且哈希需要升级时写回新哈希"""
+        mock_db = AsyncMock()
+        mock_user = UserInDB(
+            username="testuser",
+            email="test@example.com",
+            hashed_password="$2b$04$outdatedhash"
+        )
+        mocker.patch.object(UserInDB, "get", return_value=mock_user)
+        mocker.patch.object(
+            password_hasher,
+            "verify_and_update",
+            return_value=(True, "$2b$12$upgradedhash")
+        )
+
+        service = UserService(mock_db)
+        authenticated_user = await service.authenticate_user("testuser", "securepassword123")
+
+        assert authenticated_user.hashed_password == "$2b$12$upgradedhash"
+        statement = mock_db.execute.await_args.args[0]
+        assert statement.compile().params["hashed_password"] == "$2b$12$upgradedhash"
+        mock_db.commit.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_update_user_password_hashing(self, mocker):
         """测试更新用户密码时哈希处理"""
@@ -114,8 +133,9 @@ class TestUserService:
             hashed_password="oldhash"
         )
         
-        # Mock数据库
+        # Mock数据库，UPDATE ... RETURNING 返回新的令牌版本
         mock_db = AsyncMock()
+        mock_db.execute.return_value = MagicMock(**{"scalar_one_or_none.return_value": 1})
         mocker.patch.object(UserInDB, "get_by_id", return_value=current_user)
         
         # 测试
@@ -130,6 +150,12 @@ class TestUserService:
         assert updated_user is not None
         assert updated_user.hashed_password != new_password  # 密码应被哈希
         assert updated_user.hashed_password.startswith("$2b$")  # bcrypt哈希格式
+        assert updated_user.token_version == 1
+        # 新哈希与令牌版本在同一条 UPDATE 中写入数据库
+        statement = mock_db.execute.await_args.args[0]
+        assert statement.compile().params["hashed_password"] == updated_user.hashed_password
+        mock_db.commit.assert_awaited_once()
+        assert await get_revocation_store().is_revoked(None, user_id, 0)
 
     @pytest.mark.asyncio
     async def test_reset_password_hashing(self, mocker):
@@ -145,8 +171,9 @@ class TestUserService:
             hashed_password="oldhash"
         )
         
-        # Mock数据库
+        # Mock数据库，UPDATE ... RETURNING 返回新的令牌版本
         mock_db = AsyncMock()
+        mock_db.execute.return_value = MagicMock(**{"scalar_one_or_none.return_value": 1})
         mocker.patch.object(UserInDB, "get_by_id", return_value=mock_user)
         
         # 测试
@@ -156,10 +183,13 @@ class TestUserService:
             new_password=new_password
         )
         
-        # 验证
+        # 验证：写入数据库的是哈希后的新密码
         assert result is True
-        assert mock_user.hashed_password != new_password  # 密码应被哈希
-        assert mock_user.hashed_password.startswith("$2b$")  # bcrypt哈希格式
+        stored_hash = mock_db.execute.await_args.args[0].compile().params["hashed_password"]
+        assert stored_hash != new_password  # 密码应被哈希
+        assert stored_hash.startswith("$2b$")  # bcrypt哈希格式
+        mock_db.commit.assert_awaited_once()
+        assert await get_revocation_store().is_revoked(None, user_id, 0)
 
     @pytest.mark.asyncio
     async def test_update_user_permission_check(self, mocker):
@@ -227,3 +257,32 @@ class TestUserService:
         assert updated_user is not None
         assert updated_user.full_name == "New Name"
         mock_db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_list_users_total_estimate_binds_search(self, mocker):
+        """测试 PostgreSQL 下估算总数时，搜索词作为绑定参数传递而不拼进SQL"""
+        from sqlalchemy.dialects import postgresql
+
+        dialect = postgresql.asyncpg.dialect()
+        statements = []
+
+        async def execute(stmt, *args, **kwargs):
+            compiled = stmt.compile(dialect=dialect)
+            statements.append((str(compiled), compiled.params))
+            result = mocker.Mock()
+            if str(compiled).startswith("EXPLAIN"):
+                result.scalar_one.return_value = [{"Plan": {"Plan Rows": 42}}]
+            else:
+                result.scalars.return_value = []
+            return result
+
+        db = mocker.Mock()
+        db.bind.dialect = dialect
+        db.execute = execute
+        search = "o'brien%_\\"
+        _, _, total = await UserService(db).list_users(q=search, with_total=True)
+
+        assert total == 42
+        explain_sql, explain_params = next(s for s in statements if s[0].startswith("EXPLAIN"))
+        assert "brien" not in explain_sql
+        assert "o'brien\\%\\_\\\\%" in explain_params.values()
@@ -1,5 +1,9 @@
 import pytest
+import pytest_asyncio
 from fastapi import status, HTTPException
+from httpx import AsyncClient
+from api.auth import create_access_token, decode_access_token
+from api.principals import Principal
 from api.models.user import UserInDB
 from api.models.user_model import DBUser
 from uuid import UUID, uuid4
@@ -69,42 +73,24 @@ class TestUserAPI:
         )
         assert response.status_code == status.HTTP_200_OK
         assert "access_token" in response.json()
+        assert "refresh_token" in response.json()
 
     @pytest.mark.asyncio
-    async def test_get_current_user(self, test_user_data, client, mocker):
+    async def test_get_current_user(self, test_user, client):
         """测试获取当前用户信息"""
-        # Mock current user
-        mock_user = UserInDB(
-            username=test_user_data["username"],
-            email=test_user_data["email"],
-            full_name=test_user_data["full_name"],
-            hashed_password=test_user_data["hashed_password"]
-        )
-        mocker.patch(
-            "api.models.user.UserInDB.get_current_user",
-            return_value=mock_user
-        )
-
-        response = await client.get("/api/v1/users/me",
-            headers={"Authorization": "Bearer test_token"}
-        )
+        response = await client.get("/api/v1/users/me")
         assert response.status_code == status.HTTP_200_OK
-        assert response.json()["username"] == test_user_data["username"]
+        assert response.json()["username"] == test_user.username
 
     @pytest.mark.asyncio
     async def test_update_user(self, test_user_data, client, mocker):
         """测试更新用户信息"""
-        # Mock current user
         mock_user = UserInDB(
             username=test_user_data["username"],
             email=test_user_data["email"],
             full_name=test_user_data["full_name"],
             hashed_password=test_user_data["hashed_password"]
         )
-        mocker.patch(
-            "api.models.user.UserInDB.get_current_user",
-            return_value=mock_user
-        )
         mocker.patch(
             "api.models.user.UserInDB.update",
             return_value=mock_user
@@ -115,35 +101,16 @@ class TestUserAPI:
             json={
                 "full_name": "Updated Name",
                 "email": "updated@example.com"
-            },
-            headers={"Authorization": "Bearer test_token"}
+            }
         )
         assert response.status_code == status.HTTP_200_OK
 
     @pytest.mark.asyncio
-    async def test_delete_user(self, test_user_data, client, mocker):
+    async def test_delete_user(self, test_user, client, db_session):
         """测试删除用户"""
-        # Mock current user
-        mock_user = UserInDB(
-            username=test_user_data["username"],
-            email=test_user_data["email"],
-            full_name=test_user_data["full_name"],
-            hashed_password=test_user_data["hashed_password"]
-        )
-        mocker.patch(
-            "api.models.user.UserInDB.get_current_user",
-            return_value=mock_user
-        )
-        mocker.patch(
-            "api.models.user.UserInDB.delete",
-            return_value=True
-        )
-        
-        response = await client.delete(
-            "/api/v1/users/me",
-            headers={"Authorization": "Bearer test_token"}
-        )
+        response = await client.delete("/api/v1/users/me")
         assert response.status_code == status.HTTP_200_OK
+        assert await UserInDB.get_by_id(test_user.id, db_session) is None
 
     @pytest.mark.asyncio
     async def test_request_password_reset(self, client, mocker):
@@ -178,9 +145,9 @@ class TestUserAPI:
 
     # 管理员用户管理测试
     @pytest.mark.asyncio
-    async def test_admin_list_users(self, test_user_data, client, db_session, mocker):
+    async def test_admin_list_users(self, test_user_data, test_app, client, db_session):
         """测试管理员获取用户列表"""
-        from api.models.user_model import DBUser
+        from api.auth import get_admin_user
         
         # 创建测试数据
         # 创建管理员用户
@@ -215,24 +182,11 @@ class TestUserAPI:
         
         await db_session.commit()
 
-        # Mock当前用户为管理员
-        from api.models.user import UserInDB
-        mocker.patch(
-            "api.models.user.UserInDB.get_current_user",
-            return_value=UserInDB(
-                id=UUID(str(admin_user.id)),
-                username=str(admin_user.username),
-                email=str(admin_user.email),
-                hashed_password=str(admin_user.hashed_password),
-                is_admin=True
-            )
-        )
+        # 当前用户为管理员
+        test_app.dependency_overrides[get_admin_user] = lambda: Principal.from_user(admin_user)
 
         # 调用API
-        response = await client.get(
-            "/api/v1/users/",
-            headers={"Authorization": "Bearer admin_token"}
-        )
+        response = await client.get("/api/v1/users/")
         
         # 验证响应
         assert response.status_code == status.HTTP_200_OK
@@ -246,22 +200,57 @@ class TestUserAPI:
         usernames = [user["username"] for user in data]
         assert "user1" in usernames
         assert "user2" in usernames
+        assert response.headers["X-Total-Count"] == "3"
+
+    @pytest.mark.asyncio
+    async def test_admin_list_users_filters_and_pages(self, test_app, client, db_session):
+        """测试用户列表的搜索、过滤与游标分页"""
+        from datetime import datetime, timedelta
+        from api.auth import get_admin_user
+
+        admin_user = DBUser(username="root_admin", email="root@example.com", hashed_password="x", is_admin=True)
+        db_session.add(admin_user)
+        base = datetime(2024, 1, 1)
+        for i in range(5):
+            db_session.add(DBUser(
+                username=f"kitty_{i}",
+                email=f"k{i}@example.com",
+                hashed_password="x",
+                disabled=i == 4,
+                created_at=base + timedelta(minutes=i)
+            ))
+        db_session.add(DBUser(username="other", email="Kit_mail@example.com", hashed_password="x"))
+        await db_session.commit()
+        test_app.dependency_overrides[get_admin_user] = lambda: Principal.from_user(admin_user)
+
+        response = await client.get("/api/v1/users/", params={"q": "KITTY", "limit": 2})
+        assert response.status_code == status.HTTP_200_OK
+        assert [u["username"] for u in response.json()] == ["kitty_0", "kitty_1"]
+        assert response.headers["X-Total-Count"] == "5"
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = await client.get("/api/v1/users/", params={"q": "kitty", "limit": 2, "cursor": cursor})
+        assert [u["username"] for u in response.json()] == ["kitty_2", "kitty_3"]
+        # 翻页时不再计算总数
+        assert "X-Total-Count" not in response.headers
+
+        # 邮箱前缀同样可以匹配，通配符按字面处理
+        response = await client.get("/api/v1/users/", params={"q": "kit_"})
+        assert [u["username"] for u in response.json()] == ["other"]
+
+        response = await client.get("/api/v1/users/", params={"q": "kitty", "disabled": True})
+        assert [u["username"] for u in response.json()] == ["kitty_4"]
+
+        response = await client.get("/api/v1/users/", params={"is_admin": True})
+        assert response.json() == []
+        assert response.headers["X-Total-Count"] == "0"
+
+        response = await client.get("/api/v1/users/", params={"cursor": "bogus"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
 
     @pytest.mark.asyncio
-    async def test_admin_get_user(self, test_user_data, client, mocker):
+    async def test_admin_get_user(self, client, mocker):
         """测试管理员获取单个用户"""
-        # Mock admin user
-        mock_admin = UserInDB(
-            username=test_user_data["username"],
-            email=test_user_data["email"],
-            full_name=test_user_data["full_name"],
-            hashed_password=test_user_data["hashed_password"],
-            is_admin=True
-        )
-        mocker.patch(
-            "api.models.user.UserInDB.get_current_user",
-            return_value=mock_admin
-        )
         # Mock target user
         mock_user = UserInDB(
             id=uuid4(),  # 添加ID
@@ -273,135 +262,81 @@ class TestUserAPI:
             "api.models.user.UserInDB.get_by_id",
             return_value=mock_user
         )
-        
-        # 确保当前用户（管理员）有ID
-        mock_admin.id = uuid4()
 
-        response = await client.get(
-            "/api/v1/users/123e4567-e89b-12d3-a456-426614174000",
-            headers={"Authorization": "Bearer admin_token"}
-        )
+        response = await client.get("/api/v1/users/123e4567-e89b-12d3-a456-426614174000")
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["username"] == "target_user"
 
     @pytest.mark.asyncio
-    async def test_admin_update_user(self, test_user_data, client, mocker):
+    async def test_admin_update_user(self, client, db_session):
         """测试管理员更新用户"""
-        # Mock admin user
-        mock_admin = UserInDB(
-            username=test_user_data["username"],
-            email=test_user_data["email"],
-            full_name=test_user_data["full_name"],
-            hashed_password=test_user_data["hashed_password"],
-            is_admin=True
-        )
-        mocker.patch(
-            "api.models.user.UserInDB.get_current_user",
-            return_value=mock_admin
-        )
-        # Mock target user
-        mock_user = UserInDB(
+        target = DBUser(
             username="target_user",
             email="target@example.com",
             hashed_password="hashed123"
         )
-        mocker.patch(
-            "api.models.user.UserInDB.get_by_id",
-            return_value=mock_user
-        )
-        mocker.patch(
-            "api.models.user.UserInDB.update",
-            return_value=mock_user
+        db_session.add(target)
+        await db_session.commit()
+
+        response = await client.put(
+            f"/api/v1/users/{target.id}",
+            json={"email": "updated@example.com", "disabled": True}
         )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["email"] == "updated@example.com"
+        assert response.json()["disabled"] is True
+        assert response.json()["token_version"] == 1
 
         response = await client.put(
             "/api/v1/users/123e4567-e89b-12d3-a456-426614174000",
-            json={"email": "updated@example.com"},
-            headers={"Authorization": "Bearer admin_token"}
+            json={"email": "missing@example.com"}
         )
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == status.HTTP_404_NOT_FOUND
 
     @pytest.mark.asyncio
-    async def test_admin_delete_user(self, test_user_data, client, mocker):
+    async def test_admin_delete_user(self, client, db_session):
         """测试管理员删除用户"""
-        # Mock admin user
-        mock_admin = UserInDB(
-            username=test_user_data["username"],
-            email=test_user_data["email"],
-            full_name=test_user_data["full_name"],
-            hashed_password=test_user_data["hashed_password"],
-            is_admin=True
-        )
-        mocker.patch(
-            "api.models.user.UserInDB.get_current_user",
-            return_value=mock_admin
-        )
-        # Mock target user
-        mock_user = UserInDB(
+        target = DBUser(
             username="target_user",
             email="target@example.com",
             hashed_password="hashed123"
         )
-        mocker.patch(
-            "api.models.user.UserInDB.get_by_id",
-            return_value=mock_user
-        )
-        mocker.patch(
-            "api.models.user.UserInDB.delete",
-            return_value=True
-        )
+        db_session.add(target)
+        await db_session.commit()
 
-        response = await client.delete(
-            "/api/v1/users/123e4567-e89b-12d3-a456-426614174000",
-            headers={"Authorization": "Bearer admin_token"}
-        )
+        response = await client.delete(f"/api/v1/users/{target.id}")
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["message"] == "User deleted successfully"
 
+        response = await client.delete(f"/api/v1/users/{target.id}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     # 权限测试
     @pytest.mark.asyncio
-    async def test_non_admin_access(self, test_user_data, client, mocker):
+    async def test_non_admin_access(self, test_app, client):
         """测试非管理员访问管理员端点"""
-        # Mock regular user
-        mock_user = UserInDB(
-            username=test_user_data["username"],
-            email=test_user_data["email"],
-            full_name=test_user_data["full_name"],
-            hashed_password=test_user_data["hashed_password"],
-            is_admin=False
-        )
-        mocker.patch(
-            "api.models.user.UserInDB.get_current_user",
-            return_value=mock_user
-        )
+        from api.auth import get_admin_user
+
+        # 使用真实的管理员校验，当前用户为普通测试用户
+        test_app.dependency_overrides.pop(get_admin_user)
 
         # 测试列表用户
-        response = await client.get(
-            "/api/v1/users/",
-            headers={"Authorization": "Bearer user_token"}
-        )
+        response = await client.get("/api/v1/users/")
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
         # 测试获取用户
-        response = await client.get(
-            "/api/v1/users/123e4567-e89b-12d3-a456-426614174000",
-            headers={"Authorization": "Bearer user_token"}
-        )
+        response = await client.get("/api/v1/users/123e4567-e89b-12d3-a456-426614174000")
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
         # 测试更新用户
         response = await client.put(
             "/api/v1/users/123e4567-e89b-12d3-a456-426614174000",
-            json={"email": "updated@example.com"},
-            headers={"Authorization": "Bearer user_token"}
+            json={"email": "updated@example.com"}
         )
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
         # 测试删除用户
-        response = await client.delete(
-            "/api/v1/users/123e4567-e89b-12d3-a456-426614174000",
-            headers={"Authorization": "Bearer user_token"}
-        )
+        response = await client.delete("/api/v1/users/123e4567-e89b-12d3-a456-426614174000")
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
     # 密码哈希验证测试
@@ -476,34 +411,140 @@ class TestUserAPI:
 
     # JWT令牌测试
     @pytest.mark.asyncio
-    async def test_jwt_token_verification(self, test_user_data, client, mocker):
+    async def test_jwt_token_verification(self, test_user, test_app, client):
         """测试JWT令牌验证"""
-        # Mock用户数据
-        mock_user = UserInDB(
-            username=test_user_data["username"],
-            email=test_user_data["email"],
-            full_name=test_user_data["full_name"],
-            hashed_password=test_user_data["hashed_password"]
-        )
-        mocker.patch(
-            "api.models.user.UserInDB.get_current_user",
-            return_value=mock_user
-        )
+        from api.auth import get_current_user
+
+        # 使用真实的令牌校验
+        test_app.dependency_overrides.pop(get_current_user)
+        token = create_access_token(Principal.from_user(test_user).claims())
 
         # 测试有效令牌
         response = await client.get(
             "/api/v1/users/me",
-            headers={"Authorization": "Bearer valid_token"}
+            headers={"Authorization": f"Bearer {token}"}
         )
         assert response.status_code == status.HTTP_200_OK
 
         # 测试无效令牌
-        mocker.patch(
-            "api.models.user.UserInDB.get_current_user",
-            return_value=None
-        )
         response = await client.get(
             "/api/v1/users/me",
             headers={"Authorization": "Bearer invalid_token"}
         )
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestTokenLifecycle:
+    """登录、刷新与登出"""
+
+    @pytest_asyncio.fixture
+    async def auth_client(self, test_app, test_user, db_session, mocker):
+        """使用真实令牌校验的客户端，登录时跳过密码哈希"""
+        from api.auth import get_current_user, get_admin_user
+
+        test_app.dependency_overrides.pop(get_current_user)
+        test_app.dependency_overrides.pop(get_admin_user)
+        mocker.patch(
+            "api.models.user.UserInDB.authenticate",
+            return_value=await UserInDB.get_by_id(test_user.id, db_session)
+        )
+        async with AsyncClient(app=test_app, base_url="http://test") as ac:
+            yield ac
+
+    async def _login(self, client, username):
+        response = await client.post(
+            "/api/v1/users/login",
+            data={"username": username, "password": "secret"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return response
+
+    @pytest.mark.asyncio
+    async def test_login_issues_token_pair(self, auth_client, test_user):
+        """测试登录签发带声明的访问令牌与刷新令牌"""
+        response = await self._login(auth_client, test_user.username)
+        data = response.json()
+        claims = decode_access_token(data["access_token"])
+        assert claims["sub"] == test_user.username
+        assert claims["uid"] == str(test_user.id)
+        assert claims["type"] == "access"
+        assert decode_access_token(data["refresh_token"], "refresh")["uid"] == str(test_user.id)
+        assert data["expires_in"] > 0
+
+        set_cookie = response.headers["set-cookie"]
+        assert "refresh_token=" in set_cookie
+        assert "HttpOnly" in set_cookie
+        assert "Path=/api/v1/users" in set_cookie
+
+        me = await auth_client.get(
+            "/api/v1/users/me",
+            headers={"Authorization": f"Bearer {data['access_token']}"}
+        )
+        assert me.status_code == status.HTTP_200_OK
+        assert me.json()["username"] == test_user.username
+
+    @pytest.mark.asyncio
+    async def test_refresh_token_cannot_authenticate(self, auth_client, test_user):
+        """测试刷新令牌不能当作访问令牌使用"""
+        data = (await self._login(auth_client, test_user.username)).json()
+        me = await auth_client.get(
+            "/api/v1/users/me",
+            headers={"Authorization": f"Bearer {data['refresh_token']}"}
+        )
+        assert me.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @pytest.mark.asyncio
+    async def test_refresh_rotates_token(self, auth_client, test_user):
+        """测试刷新后签发新令牌，旧刷新令牌失效"""
+        first = (await self._login(auth_client, test_user.username)).json()
+
+        auth_client.cookies.set("refresh_token", first["refresh_token"])
+        response = await auth_client.post("/api/v1/users/refresh")
+        assert response.status_code == status.HTTP_200_OK
+        second = response.json()
+        assert second["refresh_token"] != first["refresh_token"]
+        assert second["access_token"] != first["access_token"]
+
+        replay = await auth_client.post(
+            "/api/v1/users/refresh",
+            json={"refresh_token": first["refresh_token"]}
+        )
+        assert replay.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = await auth_client.post(
+            "/api/v1/users/refresh",
+            json={"refresh_token": second["refresh_token"]}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    @pytest.mark.asyncio
+    async def test_refresh_rejects_disabled_user(self, auth_client, test_user, db_session):
+        """测试用户被禁用后无法刷新令牌"""
+        data = (await self._login(auth_client, test_user.username)).json()
+        test_user.disabled = True
+        await db_session.commit()
+
+        response = await auth_client.post(
+            "/api/v1/users/refresh",
+            json={"refresh_token": data["refresh_token"]}
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert (await auth_client.post("/api/v1/users/refresh")).status_code == status.HTTP_401_UNAUTHORIZED
+
+    @pytest.mark.asyncio
+    async def test_logout_revokes_tokens(self, auth_client, test_user):
+        """测试登出后访问令牌与刷新令牌均失效"""
+        data = (await self._login(auth_client, test_user.username)).json()
+        headers = {"Authorization": f"Bearer {data['access_token']}"}
+
+        auth_client.cookies.set("refresh_token", data["refresh_token"])
+        response = await auth_client.post("/api/v1/users/logout", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert 'refresh_token=""' in response.headers["set-cookie"]
+
+        assert (await auth_client.get("/api/v1/users/me", headers=headers)).status_code == status.HTTP_401_UNAUTHORIZED
+        refresh = await auth_client.post(
+            "/api/v1/users/refresh",
+            json={"refresh_token": data["refresh_token"]}
+        )
+        assert refresh.status_code == status.HTTP_401_UNAUTHORIZED